@@ -0,0 +1,114 @@
+"""
+Микробенчмарк пост-обработки: время и выделения памяти на кадр
+до (прежняя покадровая реализация) и после векторизации.
+
+Запуск: python -m NeuroVisionQt.bench.postprocess [--frames 200]
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import torch
+import torchvision
+
+from NeuroVisionQt.mediapipeModel.mediapipeModel import MediaPipePose
+
+
+class _Landmark:
+    __slots__ = ("x", "y", "visibility")
+
+    def __init__(self, x, y, visibility):
+        self.x, self.y, self.visibility = x, y, visibility
+
+
+def legacy_landmarks(landmarks, w, h):
+    keypoints = []
+    for lm in landmarks:
+        keypoints.append((lm.x * w, lm.y * h, lm.visibility))
+    return keypoints
+
+
+def legacy_process_predictions(pred, conf_thres=0.25, iou_thres=0.45):
+    pred = pred[0]
+    pred = pred[pred[:, 4] > conf_thres]
+    if pred.shape[0] == 0:
+        return []
+    boxes = pred[:, :4]
+    scores = pred[:, 4] * pred[:, 5]
+    boxes_xyxy = boxes.clone()
+    boxes_xyxy[:, 2] = boxes[:, 0] + boxes[:, 2]
+    boxes_xyxy[:, 3] = boxes[:, 1] + boxes[:, 3]
+    return pred[torchvision.ops.nms(boxes_xyxy, scores, iou_thres)]
+
+
+def legacy_scale_people(people, ratio, pad):
+    result = []
+    for person in people:
+        coords = np.atleast_2d(np.array(person[:, :3]))
+        coords[:, 0] = (coords[:, 0] - pad[0]) / ratio[0]
+        coords[:, 1] = (coords[:, 1] - pad[1]) / ratio[1]
+        result.append(coords)
+    return result
+
+
+def measure(fn, frames):
+    """Возвращает (мс на кадр, пиковые байты на кадр, выделенные блоки на кадр)"""
+    fn()  # прогрев
+    tracemalloc.start()
+    blocks_before = len(tracemalloc.take_snapshot().traces)
+    peak = 0
+    start = time.perf_counter()
+    results = []
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        results.append(fn())  # результаты удерживаются, чтобы посчитать их блоки
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    elapsed = time.perf_counter() - start
+    blocks = len(tracemalloc.take_snapshot().traces) - blocks_before
+    tracemalloc.stop()
+    return elapsed * 1000 / frames, peak, blocks / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--people", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    model = MediaPipePose.__new__(MediaPipePose)  # без загрузки графа Mediapipe
+    landmarks = [_Landmark(*rng.random(3)) for _ in range(33)]
+    pred = torch.from_numpy(rng.random((1, 15300, 57), dtype=np.float32))
+    pred[..., 4] *= 0.3  # примерно как на реальном кадре: мало кандидатов выше порога
+    pred[..., :4] *= 640
+    people = (rng.random((args.people, 17, 3), dtype=np.float32) * 640)
+    buffer = np.empty_like(people)  # scale_coords работает на месте, исходные данные не портим
+    ratio, pad = (0.5, 0.5), (0.0, 140.0)
+
+    def scale_in_place():
+        np.copyto(buffer, people)
+        return model.scale_coords(buffer, ratio, pad, (1080, 1920))
+
+    cases = [
+        ("mediapipe landmarks",
+         lambda: legacy_landmarks(landmarks, 1920, 1080),
+         lambda: model.landmarks_to_array(landmarks, 1920, 1080)),
+        ("yolo process_predictions",
+         lambda: legacy_process_predictions(pred),
+         lambda: model.process_predictions(pred)),
+        ("scale_coords",
+         lambda: legacy_scale_people(people, ratio, pad),
+         scale_in_place),
+    ]
+
+    print(f"{'case':<26}{'impl':<8}{'ms/frame':>10}{'peak B':>12}{'blocks':>9}")
+    for name, before, after in cases:
+        for impl, fn in (("before", before), ("after", after)):
+            ms, peak, blocks = measure(fn, args.frames)
+            print(f"{name:<26}{impl:<8}{ms:>10.4f}{peak:>12d}{blocks:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
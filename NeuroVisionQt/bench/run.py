@@ -0,0 +1,332 @@
+"""
+Воспроизводимый бенчмарк моделей и конвейера кадров.
+
+Для каждого разрешения (480p, 1080p, 4k) генерируется синтетический ролик
+(или используются ролики из --clips), после чего измеряются:
+  - каждая запись plugin: process_frame + draw_skeleton на кадрах в памяти;
+  - полный конвейер (декодер -> инференс -> запись) тем же кодом, что и VideoThread, без GUI.
+Отчёт: кадры/с, перцентили задержки на кадр, пиковый RSS и его рост за время случая,
+выделения памяти на кадр (JSON).
+С --baseline результаты сравниваются с сохранённым прогоном; регрессия -> код выхода 1.
+
+Пример:
+    python -m NeuroVisionQt.bench.run --models MediaPipe --resolutions 480p,1080p \\
+        --output bench.json --baseline bench_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from NeuroVisionQt.profiling import LatencyWindow
+from NeuroVisionQt.registry import distinct_models
+
+
+RESOLUTIONS = {
+    "480p": (854, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+
+def current_rss_mb():
+    """Текущий RSS процесса: через psutil, если установлен, иначе /proc (Linux); None — неизвестен"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1 << 20)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class RssSampler:
+    """
+    Пиковый RSS за время одного случая бенчмарка. ru_maxrss процесса не убывает,
+    поэтому после тяжёлого случая все следующие показывали бы его пик; здесь текущий RSS
+    опрашивается фоновым потоком от входа в блок with до выхода из него.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start_mb = None
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak_mb = max(self.peak_mb, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        if self.start_mb is not None:
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+
+    def summary(self):
+        if self.start_mb is None:
+            return {"peak_rss_mb": None, "rss_growth_mb": None}
+        return {"peak_rss_mb": round(self.peak_mb, 1),
+                "rss_growth_mb": round(self.peak_mb - self.start_mb, 1)}
+
+
+def synthetic_frames(width, height, count, seed=0):
+    """Детерминированные кадры: шум фона и движущиеся фигуры"""
+    rng = np.random.default_rng(seed)
+    background = rng.integers(0, 80, size=(height, width, 3), dtype=np.uint8)
+    for i in range(count):
+        frame = background.copy()
+        cx = int((0.2 + 0.6 * (i % 60) / 60) * width)
+        cy = height // 2
+        radius = max(8, height // 10)
+        cv2.circle(frame, (cx, cy - radius * 2), radius, (200, 180, 160), -1)
+        cv2.rectangle(frame, (cx - radius, cy - radius), (cx + radius, cy + radius * 3),
+                      (90, 120, 200), -1)
+        yield frame
+
+
+def write_synthetic_clip(path, width, height, count, fps=30):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for frame in synthetic_frames(width, height, count):
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def read_frames(path, count):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def allocations_per_frame(fn, frames, sample=10):
+    """Пиковые байты и число новых блоков памяти Python/NumPy на кадр (tracemalloc)"""
+    frames = frames[:sample]
+    if not frames:
+        return 0, 0.0
+    tracemalloc.start()
+    blocks_before = len(tracemalloc.take_snapshot().traces)
+    peak = 0
+    for frame in frames:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn(frame)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    blocks = len(tracemalloc.take_snapshot().traces) - blocks_before
+    tracemalloc.stop()
+    return peak, blocks / len(frames)
+
+
+def bench_model(name, model, frames, warmup=5):
+    def step(frame):
+        frame = frame.copy()
+        points = model.process_frame(frame)
+        if points is not None:
+            model.draw_skeleton(frame, points)
+
+    with RssSampler() as rss:
+        for frame in frames[:warmup]:
+            step(frame)
+        latency = LatencyWindow(size=len(frames))
+        start = time.perf_counter()
+        for frame in frames:
+            frame_start = time.perf_counter()
+            step(frame)
+            latency.add((time.perf_counter() - frame_start) * 1000)
+        elapsed = time.perf_counter() - start
+    alloc_bytes, alloc_blocks = allocations_per_frame(step, frames)
+    return {
+        "kind": "model",
+        "name": name,
+        "frames": len(frames),
+        "fps": len(frames) / elapsed if elapsed > 0 else 0.0,
+        **{f"{k}_ms": v for k, v in latency.summary().items() if k != "count"},
+        "alloc_bytes_per_frame": alloc_bytes,
+        "alloc_blocks_per_frame": alloc_blocks,
+        **rss.summary(),
+    }
+
+
+def bench_pipeline(clip, models, batch_size=1):
+    """Полный конвейер VideoThread без GUI и без темпа источника"""
+    from NeuroVisionQt.headless import HeadlessRunner
+
+    runner = HeadlessRunner(models, batch_size=batch_size)
+    runner.profiler.window = 1 << 20  # перцентили по всем кадрам случая, а не по последним
+    with RssSampler() as rss:
+        stats = runner.process(clip)
+    # Задержка кадра от декодирования до записи — под теми же ключами, что у моделей,
+    # чтобы compare отслеживал и рост p95 конвейера
+    latency = stats["latency_ms"].get("latency", {})
+    decode = stats["latency_ms"].get("decode", {})
+    per_model = {stage: values for stage, values in stats["latency_ms"].items()
+                 if stage.startswith("model:")}
+    return {
+        "kind": "pipeline",
+        "name": "+".join(models) or "decode-only",
+        "frames": stats["frames"],
+        "fps": stats["fps"],
+        **{f"{k}_ms": latency.get(k, 0.0) for k in ("mean", "p50", "p95", "p99")},
+        "decode_p50_ms": decode.get("p50", 0.0),
+        "decode_p95_ms": decode.get("p95", 0.0),
+        "models": per_model,
+        **rss.summary(),
+    }
+
+
+def environment():
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+    }
+    try:
+        import torch
+        info["torch"] = torch.__version__
+        info["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return info
+
+
+def case_key(result):
+    return f"{result['kind']}/{result['name']}/{result['resolution']}"
+
+
+def compare(results, baseline, tolerance):
+    """Регрессии относительно базового прогона: падение fps или рост p95 больше tolerance"""
+    previous = {case_key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        old = previous.get(case_key(result))
+        if old is None:
+            continue
+        if old["fps"] > 0 and result["fps"] < old["fps"] * (1 - tolerance):
+            regressions.append(f"{case_key(result)}: fps {old['fps']:.1f} -> {result['fps']:.1f}")
+        old_p95, new_p95 = old.get("p95_ms"), result.get("p95_ms")
+        if old_p95 and new_p95 and new_p95 > old_p95 * (1 + tolerance):
+            regressions.append(f"{case_key(result)}: p95 {old_p95:.1f} -> {new_p95:.1f} ms")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк моделей и конвейера NeuroVision")
+    parser.add_argument("--models", default="all",
+                        help="записи plugin через запятую или all")
+    parser.add_argument("--resolutions", default="480p,1080p,4k",
+                        help=f"через запятую: {', '.join(RESOLUTIONS)}")
+    parser.add_argument("--clips", nargs="*", default=[], help="дополнительные реальные ролики")
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--threads", type=int, default=None,
+                        help="фиксированное число потоков OpenCV/PyTorch для воспроизводимости")
+    parser.add_argument("--skip-pipeline", action="store_true")
+    parser.add_argument("--output", help="файл JSON с результатами")
+    parser.add_argument("--baseline", help="JSON базового прогона для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="допустимое ухудшение, доля")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.threads:
+        cv2.setNumThreads(args.threads)
+        try:
+            import torch
+            torch.set_num_threads(args.threads)
+        except ImportError:
+            pass
+
+    from NeuroVisionQt.plugin import plugin
+
+    names = list(plugin.keys()) if args.models == "all" else \
+        [name.strip() for name in args.models.split(",") if name.strip()]
+    models = {}
+    for name in names:
+        try:
+            models[name] = plugin.acquire(name)
+        except Exception as exc:  # нет фреймворка или весов модели: измеряем остальные
+            print(f"пропуск {name}: {exc}", file=sys.stderr)
+    models = distinct_models(models)  # одинаковые записи (YOLOv7, YOLOv7_2, ...) измеряются один раз
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        clips = []
+        for label in args.resolutions.split(","):
+            width, height = RESOLUTIONS[label.strip().lower()]
+            path = os.path.join(tmp, f"synthetic_{label}.mp4")
+            clips.append((label, write_synthetic_clip(path, width, height, args.frames)))
+        for path in args.clips:
+            clips.append((os.path.basename(path), path))
+
+        for label, clip in clips:
+            frames = read_frames(clip, args.frames)
+            benched = set()
+            for name, model in models.items():
+                if id(model) in benched:
+                    continue  # общий экземпляр уже измерен под другим именем
+                benched.add(id(model))
+                result = bench_model(name, model, frames)
+                result["resolution"] = label
+                results.append(result)
+                print(f"{label:>8} model    {name:<20} {result['fps']:8.1f} fps  "
+                      f"p95 {result['p95_ms']:7.1f} ms", file=sys.stderr)
+            if not args.skip_pipeline:
+                result = bench_pipeline(clip, models)
+                result["resolution"] = label
+                results.append(result)
+                print(f"{label:>8} pipeline {result['name']:<20} {result['fps']:8.1f} fps  "
+                      f"p95 {result['p95_ms']:7.1f} ms", file=sys.stderr)
+
+    report = {"environment": environment(), "frames": args.frames, "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
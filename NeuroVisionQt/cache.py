@@ -0,0 +1,129 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+MISSING = object()  # Промах кэша (None — допустимый результат модели)
+
+# Версия файлов кэша на диске. 2: номера кадров считаются с 0 (в версии 1 — с 1),
+# поэтому файлы прежней версии не читаются
+DISK_FORMAT = 2
+
+
+def video_fingerprint(path, sample_bytes=1 << 20):
+    """
+    Хэш содержимого видеофайла: размер + первый и последний мегабайт.
+    Не зависит от имени файла и считается мгновенно даже для многогигабайтных файлов.
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        digest.update(f.read(sample_bytes))
+        if size > sample_bytes:
+            f.seek(max(sample_bytes, size - sample_bytes))
+            digest.update(f.read(sample_bytes))
+    return digest.hexdigest()
+
+
+def model_key(model):
+    """Конфигурация модели для ключа кэша (ModelRegistry проставляет config_key экземплярам)"""
+    key = getattr(model, "config_key", None)
+    if key is None:
+        key = f"{type(model).__module__}.{type(model).__qualname__}"
+    return str(key)
+
+
+def result_nbytes(points):
+    if points is None:
+        return 0
+    if hasattr(points, "nbytes"):
+        return int(points.nbytes)
+    if hasattr(points, "element_size"):  # torch.Tensor
+        return int(points.element_size() * points.numel())
+    return 64 * len(points) if hasattr(points, "__len__") else 64
+
+
+class ResultCache:
+    """
+    Кэш результатов моделей по ключу (хэш видео, номер кадра, имя модели, конфигурация модели).
+    Первый уровень — LRU в памяти с бюджетом memory_budget байт,
+    второй (необязательный) — файлы .npy в disk_dir для результатов-массивов.
+    """
+
+    def __init__(self, memory_budget=256 << 20, disk_dir=None):
+        self.memory_budget = memory_budget
+        self.disk_dir = disk_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(video_key, frame_index, model_name, model, resolution=None):
+        key = (video_key, frame_index, model_name, model_key(model))
+        # Разрешение инференса добавляется только если задано: прежние ключи не меняются
+        return key if resolution is None else key + (resolution,)
+
+    def _disk_path(self, key):
+        name = hashlib.sha1(repr((DISK_FORMAT, key)).encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, name[:2], name + ".npy")
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        if self.disk_dir:
+            path = self._disk_path(key)
+            if os.path.exists(path):
+                points = np.load(path, allow_pickle=False)
+                self._remember(key, points)
+                with self._lock:
+                    self.hits += 1
+                return points
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def put(self, key, points):
+        self._remember(key, points)
+        if self.disk_dir and isinstance(points, np.ndarray):
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, points, allow_pickle=False)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key, points):
+        size = result_nbytes(points)
+        if size > self.memory_budget:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= result_nbytes(old)
+            self._entries[key] = points
+            self._nbytes += size
+            while self._nbytes > self.memory_budget and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= result_nbytes(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,115 @@
+import threading
+
+import cv2
+import numpy as np
+from PyQt5.QtGui import QImage
+
+
+def fit_size(width, height, box_width, box_height):
+    """Размер кадра, вписанного в box с сохранением пропорций (аналог Qt.KeepAspectRatio)"""
+    if width <= 0 or height <= 0 or box_width <= 0 or box_height <= 0:
+        return width, height
+    scale = min(box_width / width, box_height / height)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+class FrameBufferPool:
+    """
+    Пул переиспользуемых буферов для отображения.
+    Буферы выдаются рабочему потоку и возвращаются после отрисовки в GUI.
+    Если все буферы заняты (GUI не успевает), acquire возвращает None — кадр пропускается.
+    """
+
+    def __init__(self, max_buffers=3):
+        self.max_buffers = max_buffers
+        self._free = []
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, shape):
+        with self._lock:
+            for i, buffer in enumerate(self._free):
+                if buffer.shape == shape:
+                    self._in_use += 1
+                    return self._free.pop(i)
+            if self._in_use >= self.max_buffers:
+                return None
+            if len(self._free) + self._in_use >= self.max_buffers and self._free:
+                self._free.pop(0)  # размер окна изменился: старый буфер больше не нужен
+            self._in_use += 1
+        return np.empty(shape, dtype=np.uint8)
+
+    def release(self, buffer):
+        with self._lock:
+            self._in_use -= 1
+            self._free.append(buffer)
+
+
+class DisplayFrame:
+    """
+    Кадр, готовый к показу: QImage ссылается на буфер пула без копирования.
+    После отрисовки нужно вызвать release(), чтобы вернуть буфер в пул.
+    """
+    __slots__ = ("image", "_buffer", "_pool")
+
+    def __init__(self, pool, buffer):
+        h, w, ch = buffer.shape
+        self._pool = pool
+        self._buffer = buffer
+        self.image = QImage(buffer.data, w, h, ch * w, QImage.Format_RGB888)
+
+    @property
+    def array(self):
+        """RGB-буфер кадра (до release)"""
+        return self._buffer
+
+    def release(self):
+        if self._buffer is not None:
+            self.image = None
+            self._pool.release(self._buffer)
+            self._buffer = None
+
+
+def draw_hud(image, lines, origin=(8, 8), line_height=16):
+    """Полупрозрачная панель с текстом поверх кадра (рисуется в буфер отображения)"""
+    if not lines:
+        return
+    x, y = origin
+    width = min(image.shape[1] - x, 8 + 7 * max(len(line) for line in lines))
+    height = min(image.shape[0] - y, 6 + line_height * len(lines))
+    if width <= 0 or height <= 0:
+        return
+    panel = image[y:y + height, x:x + width]
+    panel //= 3  # затемнение фона без дополнительного буфера
+    for i, line in enumerate(lines):
+        cv2.putText(image, line, (x + 4, y + line_height * (i + 1)), cv2.FONT_HERSHEY_PLAIN,
+                    0.9, (255, 255, 255), 1, cv2.LINE_AA)
+
+
+class DisplayConverter:
+    """
+    Перевод BGR-кадра в RGB с уменьшением до размера виджета на стороне рабочего потока.
+    Масштабирование идёт в промежуточный буфер, цветовое преобразование — сразу в буфер пула.
+    """
+
+    def __init__(self, pool=None):
+        self.pool = pool or FrameBufferPool()
+        self._scratch = None
+
+    def convert(self, frame, box_size):
+        h, w = frame.shape[:2]
+        tw, th = fit_size(w, h, *box_size) if box_size else (w, h)
+        buffer = self.pool.acquire((th, tw, 3))
+        if buffer is None:
+            return None
+
+        if (tw, th) != (w, h):
+            if self._scratch is None or self._scratch.shape != (th, tw, 3):
+                self._scratch = np.empty((th, tw, 3), dtype=np.uint8)
+            interpolation = cv2.INTER_AREA if tw < w else cv2.INTER_LINEAR
+            cv2.resize(frame, (tw, th), dst=self._scratch, interpolation=interpolation)
+            source = self._scratch
+        else:
+            source = frame
+        cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=buffer)
+        return DisplayFrame(self.pool, buffer)
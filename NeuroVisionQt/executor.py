@@ -0,0 +1,243 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from NeuroVisionQt.cache import MISSING
+from NeuroVisionQt.resolution import ProxyFrames, scale_points
+from NeuroVisionQt.overlay import OverlayRenderer
+
+
+# Модели, созданные внутри процессов-воркеров (по одной копии на процесс)
+_worker_models = {}
+
+
+def _process_in_worker(model_key, factory, frame):
+    model = _worker_models.get(model_key)
+    if model is None:
+        model = factory()
+        _worker_models[model_key] = model
+    return model.process_frame(frame)
+
+
+class ModelExecutor:
+    """
+    Запускает process_frame всех активных моделей параллельно на одном кадре,
+    затем применяет draw_skeleton в детерминированном порядке (порядок словаря моделей).
+
+    Модели не должны изменять входной кадр в process_frame: кадр общий для всех.
+    Отрисовку выполняет OverlayRenderer: модели с массивом рёбер skeleton рисуются пакетно.
+    Если один экземпляр модели активен под несколькими именами, он запускается один раз.
+    Модели, упирающиеся в GIL, можно вынести в пул процессов через process_models —
+    в каждом процессе создаётся своя копия модели: по записи реестра (model_spec) с теми же
+    параметрами, а для моделей не из реестра — конструктором класса без аргументов.
+    С кэшем (ResultCache) модели не запускаются на кадрах, уже обработанных ранее.
+    С профилировщиком (Profiler) время моделей и отрисовки пишется в стадии
+    model:<имя> и draw:<имя>.
+    Для модели можно задать разрешение инференса (set_resolution): она получает
+    уменьшенную копию кадра, общую для всех моделей с той же высотой, а её точки
+    переводятся обратно в координаты исходного кадра.
+    """
+
+    def __init__(self, max_workers=None, process_models=(), max_processes=None, cache=None,
+                 profiler=None):
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2))
+        self.max_processes = max_processes
+        self.process_models = set(process_models)
+        self.cache = cache
+        self.profiler = profiler
+        self.overlay = OverlayRenderer(profiler)
+        self.resolutions = {}  # имя модели -> высота кадра для инференса
+        self._thread_pool = None
+        self._process_pool = None
+
+    def _threads(self):
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix="model")
+        return self._thread_pool
+
+    def _processes(self):
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_processes)
+        return self._process_pool
+
+    def set_resolution(self, model_name, height):
+        """Высота кадра для инференса модели; None — исходное разрешение"""
+        if height is None:
+            self.resolutions.pop(model_name, None)
+        else:
+            self.resolutions[model_name] = int(height)
+
+    def _cache_key(self, frame_key, model_name, model):
+        return self.cache.make_key(*frame_key, model_name, model,
+                                   resolution=self.resolutions.get(model_name))
+
+    def _timed(self, model_name, model, frame):
+        if self.profiler is None:
+            return model.process_frame(frame)
+        start = time.perf_counter()
+        try:
+            return model.process_frame(frame)
+        finally:
+            self.profiler.record(f"model:{model_name}", start)
+
+    def submit(self, model_name, model, frame):
+        if model_name in self.process_models:
+            start = time.perf_counter()
+            spec = getattr(model, "model_spec", None)
+            factory = spec.build if spec is not None else type(model)
+            model_key = getattr(model, "config_key", model_name)
+            future = self._processes().submit(_process_in_worker, model_key, factory, frame)
+            if self.profiler is not None:
+                # Время процесса-воркера включает передачу кадра между процессами
+                future.add_done_callback(
+                    lambda _: self.profiler.record(f"model:{model_name}", start))
+            return future
+        return self._threads().submit(self._timed, model_name, model, frame)
+
+    def _run(self, frame, items):
+        """Запускает модели items и возвращает {имя: точки}"""
+        if not items:
+            return {}
+        proxies = ProxyFrames(frame)
+        if len(items) == 1 and items[0][0] not in self.process_models:
+            model_name, model = items[0]
+            image, scale = proxies.get(self.resolutions.get(model_name))
+            return {model_name: scale_points(self._timed(model_name, model, image), scale)}
+
+        # Общий экземпляр запускается один раз на каждое разрешение
+        futures = {}
+        for model_name, model in items:
+            height = self.resolutions.get(model_name)
+            if (id(model), height) not in futures:
+                image, scale = proxies.get(height)
+                futures[id(model), height] = (self.submit(model_name, model, image), scale)
+        results = {}
+        for model_name, model in items:
+            future, scale = futures[id(model), self.resolutions.get(model_name)]
+            results[model_name] = scale_points(future.result(), scale)
+        return results
+
+    def _cached(self, items, frame_key):
+        """{имя: точки} для моделей, чьи результаты на этом кадре уже есть в кэше"""
+        if self.cache is None or frame_key is None:
+            return {}
+        cached = {}
+        for model_name, model in items:
+            points = self.cache.get(self._cache_key(frame_key, model_name, model), MISSING)
+            if points is not MISSING:
+                cached[model_name] = points
+        return cached
+
+    def cached_results(self, models, frame_key):
+        """
+        Поиск результатов кадра в кэше — один раз на кадр.
+        Возвращает (результаты всех моделей или None, если хотя бы одной не хватает;
+        найденные результаты {имя: точки}) — второе передаётся в infer(cached=...).
+        """
+        items = list(models.items())
+        cached = self._cached(items, frame_key)
+        if len(cached) != len(items):
+            return None, cached
+        return [(model_name, model, cached[model_name]) for model_name, model in items], cached
+
+    def _store(self, frame_key, items, computed):
+        if self.cache is None or frame_key is None:
+            return
+        for model_name, model in items:
+            if model_name in computed:
+                self.cache.put(self._cache_key(frame_key, model_name, model), computed[model_name])
+
+    def infer(self, frame, models, frame_key=None, cached=None):
+        """
+        Выполняет инференс всех моделей. Возвращает список (имя, модель, точки)
+        в порядке словаря models.
+        frame_key = (хэш видео, номер кадра) включает кэш результатов;
+        cached — результаты уже выполненного поиска в кэше (cached_results).
+        """
+        items = list(models.items())
+        if not items:
+            return []
+
+        points = dict(self._cached(items, frame_key) if cached is None else cached)
+        computed = self._run(frame, [(name, model) for name, model in items if name not in points])
+        self._store(frame_key, items, computed)
+        points.update(computed)
+        return [(model_name, model, points[model_name]) for model_name, model in items]
+
+    def draw(self, frame, results):
+        self.overlay.render(frame, results)
+
+    def process(self, frame, models):
+        """Инференс всех моделей и отрисовка результатов на кадре"""
+        results = self.infer(frame, models)
+        self.draw(frame, results)
+        return results
+
+    def infer_batch(self, frames, models, frame_keys=None):
+        """
+        Пакетный инференс: модели с методом process_batch(frames) получают весь пакет
+        за один вызов, остальные обрабатывают кадры по одному.
+        models — словарь моделей для всех кадров или список словарей, по одному на кадр
+        (кадры разных потоков со своими наборами моделей): экземпляр получает одним пакетом
+        все кадры, на которых он активен.
+        frame_keys — ключи кадров для кэша результатов (как frame_key в infer): модель
+        запускается только на кадрах, результатов которых нет в кэше.
+        Возвращает список результатов на каждый кадр в исходном порядке.
+        """
+        per_frame = [models] * len(frames) if isinstance(models, dict) else list(models)
+        items = [list(frame_models.items()) for frame_models in per_frame]
+        keys = list(frame_keys) if frame_keys is not None else [None] * len(frames)
+        cached = [self._cached(frame_items, key) for frame_items, key in zip(items, keys)]
+        proxies = [ProxyFrames(frame) for frame in frames]
+
+        # Общий экземпляр запускается один раз на каждое разрешение:
+        # (id модели, высота) -> (модель, {номер кадра: имена модели на этом кадре})
+        groups = {}
+        for i, frame_items in enumerate(items):
+            for model_name, model in frame_items:
+                if model_name in cached[i]:
+                    continue
+                entry = groups.setdefault((id(model), self.resolutions.get(model_name)), (model, {}))
+                entry[1].setdefault(i, []).append(model_name)
+        futures = []
+        for (model_id, height), (model, names) in groups.items():
+            todo = list(names)
+            images, scales = zip(*(proxies[i].get(height) for i in todo))
+            images = list(images)
+            if hasattr(model, "process_batch"):
+                future = self._threads().submit(model.process_batch, images)
+            else:
+                future = self._threads().submit(
+                    lambda m=model, images=images: [m.process_frame(image) for image in images])
+            futures.append((future, scales, names))
+
+        computed = [{} for _ in frames]
+        for future, scales, names in futures:
+            for (i, frame_names), points, scale in zip(names.items(), future.result(), scales):
+                points = scale_points(points, scale)
+                for model_name in frame_names:
+                    computed[i][model_name] = points
+
+        batch_results = []
+        for key, frame_items, hits, fresh in zip(keys, items, cached, computed):
+            self._store(key, frame_items, fresh)
+            hits = {**hits, **fresh}
+            batch_results.append([(model_name, model, hits[model_name])
+                                  for model_name, model in frame_items])
+        return batch_results
+
+    def process_batch(self, frames, models, frame_keys=None):
+        """Пакетный инференс и отрисовка результатов на каждом кадре"""
+        batch_results = self.infer_batch(frames, models, frame_keys)
+        for frame, results in zip(frames, batch_results):
+            self.draw(frame, results)
+        return batch_results
+
+    def shutdown(self):
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=True)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True)
+            self._process_pool = None
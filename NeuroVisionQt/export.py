@@ -0,0 +1,152 @@
+import threading
+import time
+
+import cv2
+
+from NeuroVisionQt.pipeline import FrameQueue, StageStats, BLOCK
+
+
+# Кодек по расширению выходного файла
+CODECS = {
+    ".mp4": "mp4v",
+    ".m4v": "mp4v",
+    ".mov": "mp4v",
+    ".avi": "MJPG",
+    ".mkv": "XVID",
+}
+
+
+def codec_for(path, default="mp4v"):
+    for extension, codec in CODECS.items():
+        if path.lower().endswith(extension):
+            return codec
+    return default
+
+
+def output_size(width, height, out_height=None):
+    """Размер выходного видео: высота out_height с сохранением пропорций (чётные стороны)"""
+    if not out_height or out_height >= height:
+        return width, height
+    out_width = int(round(width * out_height / height))
+    return out_width - out_width % 2, int(out_height) - int(out_height) % 2
+
+
+class VideoExporter(threading.Thread):
+    """
+    Стадия кодирования размеченного видео в отдельном потоке.
+    Кадры приходят через ограниченную очередь (submit), поэтому кодирование идёт параллельно
+    с декодированием и инференсом, а общая скорость определяется самой медленной стадией.
+
+    Тайминг сохраняется точно: если кадры были пропущены (темп источника, переполненная очередь,
+    занятый кодировщик), место каждого пропущенного кадра занимает копия предыдущего записанного.
+    Переход назад или вперёд больше чем на max_gap кадров (перемотка, новый круг) считается
+    разрывом и не заполняется.
+
+    С renderer (OverlayRenderer) переданные результаты рисуются здесь же — в копию кадра
+    в выходном разрешении, а не в кадр конвейера.
+    """
+
+    def __init__(self, path, fps, codec=None, quality=None, out_height=None, hardware=False,
+                 renderer=None, queue_size=32, max_gap=None):
+        super().__init__(name="export", daemon=True)
+        self.path = path
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.codec = codec or codec_for(path)
+        self.quality = quality  # 0..100, если бэкенд поддерживает VIDEOWRITER_PROP_QUALITY
+        self.out_height = out_height
+        self.hardware = hardware
+        self.renderer = renderer
+        self.max_gap = int(max_gap if max_gap is not None else self.fps * 2)
+        self.queue = FrameQueue(maxsize=queue_size, policy=BLOCK)
+        self.stats = StageStats("export")
+        self.written = 0
+        self.duplicated = 0
+        self.error = None
+        self._writer = None
+        self._next_index = None
+        self._last = None
+
+    def submit(self, index, frame, results=None, timeout=None):
+        """
+        Передаёт кадр на кодирование; ждёт места в очереди не дольше timeout.
+        timeout=0 — не ждать: при занятом кодировщике кадр пропускается
+        и будет заменён копией предыдущего. Возвращает False, если кадр не принят.
+        """
+        if self.queue.put((index, frame, results), timeout=timeout):
+            return True
+        self.stats.drop()
+        return False
+
+    def close(self, wait=True):
+        """Завершает запись после кодирования уже принятых кадров"""
+        self.queue.close()
+        if wait and self.is_alive():
+            self.join()
+
+    def _open(self, width, height):
+        fourcc = cv2.VideoWriter_fourcc(*self.codec)
+        if self.hardware and hasattr(cv2, "VIDEOWRITER_PROP_HW_ACCELERATION"):
+            params = [cv2.VIDEOWRITER_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+            writer = cv2.VideoWriter(self.path, cv2.CAP_ANY, fourcc, self.fps, (width, height), params)
+        else:
+            writer = cv2.VideoWriter(self.path, fourcc, self.fps, (width, height))
+        if not writer.isOpened():
+            raise IOError(f"Не удалось создать видеофайл: {self.path} (кодек {self.codec})")
+        if self.quality is not None:
+            writer.set(cv2.VIDEOWRITER_PROP_QUALITY, float(self.quality))
+        return writer
+
+    def _prepare(self, frame, results):
+        h, w = frame.shape[:2]
+        width, height = output_size(w, h, self.out_height)
+        if (width, height) != (w, h):
+            image = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        elif results and self.renderer is not None:
+            image = frame.copy()  # кадр конвейера может быть в кэше кадров
+        else:
+            return frame
+        if results and self.renderer is not None:
+            self.renderer.render(image, results, scale=width / w)
+        return image
+
+    def _write(self, index, frame, results):
+        image = self._prepare(frame, results)
+        if self._writer is None:
+            self._writer = self._open(image.shape[1], image.shape[0])
+
+        if self._next_index is not None:
+            gap = index - self._next_index
+            if 0 < gap <= self.max_gap:
+                for _ in range(gap):
+                    self._writer.write(self._last)
+                self.duplicated += gap
+        self._writer.write(image)
+        self.written += 1
+        self._last = image
+        self._next_index = index + 1
+
+    def run(self):
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break  # очередь закрыта и пуста
+                start = time.perf_counter()
+                self._write(*item)
+                self.stats.tick((time.perf_counter() - start) * 1000)
+        except Exception as exc:
+            self.error = exc
+            self.queue.close()  # производители больше не ждут места в очереди
+        finally:
+            if self._writer is not None:
+                self._writer.release()
+                self._writer = None
+
+    def summary(self):
+        return {
+            "file": self.path,
+            "written": self.written,
+            "duplicated": self.duplicated,
+            "dropped": self.stats.dropped,
+            "error": str(self.error) if self.error else None,
+        }
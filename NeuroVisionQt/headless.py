@@ -0,0 +1,269 @@
+"""
+Пакетная обработка видео без GUI.
+
+Пример:
+    python -m NeuroVisionQt.headless "footage/*.mp4" --models MediaPipe --output-dir out --workers 4
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+from NeuroVisionQt.pipeline import (
+    FrameQueue, StageStats, DecoderStage, InferenceStage, END_OF_STREAM, BLOCK, stage_error
+)
+from NeuroVisionQt.executor import ModelExecutor
+from NeuroVisionQt.profiling import Profiler
+from NeuroVisionQt.recording import KeypointWriter
+from NeuroVisionQt.cache import ResultCache, video_fingerprint
+from NeuroVisionQt.seek import KeyframeIndex, FrameCache
+from NeuroVisionQt.export import VideoExporter
+from NeuroVisionQt.registry import distinct_models
+
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+
+class HeadlessRunner:
+    """
+    Прогон моделей по одному файлу тем же конвейером, что и VideoThread,
+    но без темпа источника и без потери кадров (все очереди блокирующие).
+    """
+
+    def __init__(self, models, batch_size=1, batch_timeout_ms=50, cache_dir=None):
+        self.is_running = True
+        self.is_paused = False
+        self.loop_video = False
+        self.speed = 1.0
+        self.base_delay = 30
+        self.paced = False
+        self.adaptive_stride = False  # офлайн: модели запускаются на каждом кадре
+        self.model_stride = 1
+        self.temporal_smoothing = False  # записываются исходные точки моделей
+        self.overlay_on_display = False  # скелеты рисуются в записываемые кадры
+        self.batch_size = max(1, int(batch_size))
+        self.batch_timeout_ms = batch_timeout_ms
+        self.active_models = models
+        # Дисковый кэш результатов позволяет повторному прогону пропустить инференс
+        cache = ResultCache(memory_budget=64 << 20, disk_dir=cache_dir) if cache_dir else None
+        self.profiler = Profiler(trace=False)
+        self.executor = ModelExecutor(cache=cache, profiler=self.profiler)
+        self.video_key = None
+        self.keyframes = KeyframeIndex()
+        self.frame_cache = FrameCache(memory_budget=0)  # один проход: кадры не кэшируются
+        self.cap = None
+
+    def take_seek_target(self):
+        return -1
+
+    def process(self, path, video_out=None, keypoints_out=None, codec="mp4v", quality=None,
+                out_height=None, hardware=False):
+        """
+        Обрабатывает файл; возвращает словарь со статистикой.
+        Видео кодируется отдельной стадией (VideoExporter) параллельно с инференсом.
+        """
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Не удалось открыть видеофайл: {path}")
+        if self.executor.cache is not None:
+            self.video_key = video_fingerprint(path)
+
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        writer = None
+        if video_out:
+            writer = VideoExporter(video_out, fps, codec=codec, quality=quality,
+                                   out_height=out_height, hardware=hardware,
+                                   queue_size=max(8, self.batch_size * 2))
+            writer.start()
+        keypoints_file = None
+        if keypoints_out and keypoints_out.endswith(".jsonl"):
+            keypoints_file = JsonKeypointWriter(keypoints_out)
+        elif keypoints_out:
+            keypoints_file = KeypointWriter(keypoints_out)
+
+        stats = {name: StageStats(name) for name in ("decode", "inference", "write")}
+        decode_queue = FrameQueue(maxsize=max(4, self.batch_size * 2), policy=BLOCK)
+        output_queue = FrameQueue(maxsize=max(4, self.batch_size * 2), policy=BLOCK)
+        decoder = DecoderStage(self, decode_queue, stats["decode"])
+        inference = InferenceStage(self, decoder, decode_queue, output_queue, stats["inference"])
+
+        start = time.perf_counter()
+        frames = 0
+        decoder.start()
+        inference.start()
+        try:
+            while True:
+                packet = output_queue.get(timeout=0.5)
+                if packet is None:
+                    if not decoder.is_alive() and not inference.is_alive():
+                        break
+                    continue
+                if packet is END_OF_STREAM:
+                    break
+                write_start = time.perf_counter()
+                if writer is not None and not writer.submit(packet.index, packet.frame):
+                    raise IOError(f"Ошибка записи видео: {writer.error}")
+                if keypoints_file is not None:
+                    keypoints_file.add_results(packet.index, packet.results, packet.track_ids)
+                # Задержка кадра от декодирования до записи — как latency в VideoThread
+                self.profiler.record("latency", packet.decoded_at)
+                frames += 1
+                stats["write"].tick((time.perf_counter() - write_start) * 1000)
+        finally:
+            self.is_running = False
+            decode_queue.close()
+            output_queue.close()
+            decoder.join()
+            inference.join()
+            self.executor.shutdown()
+            self.cap.release()
+            if writer is not None:
+                writer.close()
+            if keypoints_file is not None:
+                keypoints_file.close()
+        error = stage_error(decoder, inference)
+        if error is not None:
+            raise RuntimeError(f"Ошибка конвейера: {error!r}") from error
+        if writer is not None and writer.error is not None:
+            raise IOError(f"Ошибка записи видео: {writer.error}")
+
+        elapsed = time.perf_counter() - start
+        return {
+            "file": path,
+            "frames": frames,
+            "seconds": round(elapsed, 3),
+            "fps": round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+            "stages": {name: s.snapshot() for name, s in stats.items()},
+            "export": writer.summary() if writer is not None else None,
+            "latency_ms": self.profiler.summary(),
+        }
+
+
+class JsonKeypointWriter:
+    """Текстовый формат для отладки: одна строка JSON на модель и кадр"""
+
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def add_results(self, frame_index, results, track_ids=None):
+        track_ids = track_ids or {}
+        for model_name, _, points in results:
+            if points is None:
+                continue
+            record = {"frame": frame_index, "model": model_name,
+                      "keypoints": np.asarray(points, dtype=np.float32).tolist()}
+            if track_ids.get(model_name):
+                record["ids"] = list(track_ids[model_name])
+            self._file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+def expand_inputs(inputs):
+    """Файлы, glob-шаблоны и каталоги -> отсортированный список видеофайлов без повторов"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = [os.path.join(item, name) for name in sorted(os.listdir(item))
+                       if name.lower().endswith(VIDEO_EXTENSIONS)]
+        else:
+            matches = sorted(glob.glob(item)) or [item]
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def output_paths(path, output_dir, write_video, write_keypoints_data, keypoints_format="nvk"):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    video_out = os.path.join(output_dir, f"{stem}_processed.mp4") if write_video else None
+    keypoints_out = None
+    if write_keypoints_data:
+        keypoints_out = os.path.join(output_dir, f"{stem}_keypoints.{keypoints_format}")
+    return video_out, keypoints_out
+
+
+def process_file(path, model_names, output_dir, write_video=True, write_keypoints_data=True,
+                 batch_size=1, codec="mp4v", keypoints_format="nvk", cache_dir=None,
+                 inference_height=None, quality=None, out_height=None, hardware=False):
+    """Точка входа процесса-воркера: собственный реестр моделей на процесс"""
+    from NeuroVisionQt.plugin import plugin
+
+    models = distinct_models({name: plugin.acquire(name) for name in model_names})
+    runner = HeadlessRunner(models, batch_size=batch_size, cache_dir=cache_dir)
+    for name in models:
+        runner.executor.set_resolution(name, inference_height)
+    video_out, keypoints_out = output_paths(path, output_dir, write_video, write_keypoints_data,
+                                            keypoints_format)
+    return runner.process(path, video_out, keypoints_out, codec=codec, quality=quality,
+                          out_height=out_height, hardware=hardware)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Обработка видео моделями NeuroVision без GUI")
+    parser.add_argument("inputs", nargs="+", help="видеофайлы, glob-шаблоны или каталоги")
+    parser.add_argument("-m", "--models", action="append", required=True,
+                        help="имя модели из plugin.py (можно повторять или перечислять через запятую)")
+    parser.add_argument("-o", "--output-dir", default="output")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="число процессов для параллельной обработки файлов")
+    parser.add_argument("--batch-size", type=int, default=1, help="пакетный инференс по N кадров")
+    parser.add_argument("--codec", default="mp4v", help="FourCC кодека выходного видео")
+    parser.add_argument("--quality", type=int, help="качество кодирования 0..100, если кодек поддерживает")
+    parser.add_argument("--output-height", type=int, help="высота выходного видео (по умолчанию исходная)")
+    parser.add_argument("--hw-encode", action="store_true",
+                        help="запросить аппаратное кодирование (OpenCV >= 4.5.2)")
+    parser.add_argument("--no-video", action="store_true", help="не сохранять размеченное видео")
+    parser.add_argument("--no-keypoints", action="store_true", help="не сохранять ключевые точки")
+    parser.add_argument("--keypoints-format", choices=("nvk", "jsonl"), default="nvk",
+                        help="nvk — компактный столбцовый формат (recording.py), jsonl — текст")
+    parser.add_argument("--cache-dir", help="каталог дискового кэша результатов моделей")
+    parser.add_argument("--inference-height", type=int,
+                        help="высота уменьшенной копии кадра для инференса (по умолчанию исходная)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    model_names = [name.strip() for item in args.models for name in item.split(",") if name.strip()]
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("Нет входных файлов", file=sys.stderr)
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    options = dict(write_video=not args.no_video, write_keypoints_data=not args.no_keypoints,
+                   batch_size=args.batch_size, codec=args.codec,
+                   keypoints_format=args.keypoints_format, cache_dir=args.cache_dir,
+                   inference_height=args.inference_height, quality=args.quality,
+                   out_height=args.output_height, hardware=args.hw_encode)
+    failed = 0
+    if args.workers <= 1:
+        for path in paths:
+            try:
+                print(json.dumps(process_file(path, model_names, args.output_dir, **options)))
+            except Exception as exc:
+                failed += 1
+                print(f"{path}: {exc}", file=sys.stderr)
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {pool.submit(process_file, path, model_names, args.output_dir, **options): path
+                       for path in paths}
+            for future in as_completed(futures):
+                try:
+                    print(json.dumps(future.result()))
+                except Exception as exc:
+                    failed += 1
+                    print(f"{futures[future]}: {exc}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
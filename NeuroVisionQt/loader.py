@@ -0,0 +1,49 @@
+import queue
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class ModelLoader(QThread):
+    """
+    Фоновая загрузка моделей реестра, чтобы окно не ждало импорта фреймворков и весов.
+    Сначала импортирует фабрики всех записей (check) и сообщает о недоступных,
+    затем создаёт модели по запросам request(name, owner) в порядке поступления
+    (owner — владелец экземпляра для записей с shared=False).
+    """
+    loaded = pyqtSignal(str)  # имя записи, модель создана
+    failed = pyqtSignal(str, str)  # имя записи, текст ошибки
+
+    def __init__(self, models, probe=True):
+        super().__init__()
+        self.models = models
+        self.probe = probe
+        self.is_running = True
+        self._requests = queue.Queue()
+
+    def request(self, name, owner=None):
+        self._requests.put((name, owner))
+
+    def run(self):
+        if self.probe:
+            for name in list(self.models.keys()):
+                if not self.is_running:
+                    return
+                error = self.models.check(name)
+                if error is not None:
+                    self.failed.emit(name, error)
+
+        while self.is_running:
+            try:
+                name, owner = self._requests.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                self.models.get(name, owner)
+            except Exception as exc:
+                self.failed.emit(name, f"{type(exc).__name__}: {exc}")
+            else:
+                self.loaded.emit(name)
+
+    def stop(self):
+        self.is_running = False
+        self.wait()
@@ -1,20 +1,41 @@
 import sys
 import time
 
-from PyQt5.QtCore import QThread, pyqtSignal, Qt, QMutex
-from PyQt5.QtGui import QImage, QPixmap, QColor
+STARTED_AT = time.perf_counter()  # для замера времени до показа окна
+
+import cv2
+from PyQt5.QtCore import QThread, pyqtSignal, Qt, QMutex, QTimer
+from PyQt5.QtGui import QPixmap, QColor
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QLabel, QPushButton,
     QVBoxLayout, QHBoxLayout, QWidget, QFileDialog,
-    QCheckBox, QMessageBox, QGroupBox, QButtonGroup, QSlider
+    QCheckBox, QMessageBox, QGroupBox, QButtonGroup, QSlider, QInputDialog, QComboBox
 )
 
-from NeuroVisionQt.plugin import *
+from NeuroVisionQt.plugin import plugin
+from NeuroVisionQt.registry import distinct_models
+from NeuroVisionQt.loader import ModelLoader
+from NeuroVisionQt.pipeline import (
+    FrameQueue, StageStats, DecoderStage, InferenceStage,
+    END_OF_STREAM, DROP_OLDEST, BLOCK, stage_error
+)
+from NeuroVisionQt.executor import ModelExecutor
+from NeuroVisionQt.display import DisplayConverter, draw_hud
+from NeuroVisionQt.profiling import Profiler
+from NeuroVisionQt.recording import KeypointWriter
+from NeuroVisionQt.cache import ResultCache, video_fingerprint
+from NeuroVisionQt.seek import KeyframeIndex, FrameCache
+from NeuroVisionQt.multistream import MultiStreamWindow
+from NeuroVisionQt.sources import LiveCapture, parse_source
+from NeuroVisionQt.resolution import INFERENCE_RESOLUTIONS
+from NeuroVisionQt.overlay import OverlayLayer
+from NeuroVisionQt.export import VideoExporter
 
 
 class VideoThread(QThread):
-    change_pixmap_signal = pyqtSignal(np.ndarray)  # Отправка кадра для отображения
+    change_pixmap_signal = pyqtSignal(object)  # DisplayFrame, готовый к отображению
     finished_signal = pyqtSignal()  # Сигнал завершения видео
+    error_signal = pyqtSignal(str)  # Конвейер остановлен ошибкой (модели, декодера)
     position_changed = pyqtSignal(int, int)  # Текущая позиция и общая длина
 
     def __init__(self):
@@ -26,60 +47,186 @@ class VideoThread(QThread):
         self.is_paused = False
         self.speed = 1.0
         self.base_delay = 30
-        self.last_frame_time = 0
 
         self.seeking = False
         self.target_frame = -1
         self.seek_lock = QMutex()
+        self.keyframes = KeyframeIndex()  # строится в фоне при открытии файла
+        self.frame_cache = FrameCache(memory_budget=256 << 20)  # кадры вокруг позиции
+
+        # Конвейер: декодер -> инференс -> отображение (этот поток)
+        self.decode_queue = FrameQueue(maxsize=2, policy=DROP_OLDEST)
+        self.render_queue = FrameQueue(maxsize=2, policy=BLOCK)
+        self.stage_stats = {name: StageStats(name) for name in ("decode", "inference", "render")}
+        self.decoder = None
+        self.inference = None
+        self.is_live = False  # живой источник (камера, сетевой поток, канал)
+        # Задержки по стадиям и моделям (p50/p95/p99), оверлей и экспорт метрик
+        self.profiler = Profiler()
+        self.show_hud = False
+        self._hud_lines = []
+        self._hud_updated = 0.0
+
+        # Параллельный запуск активных моделей; повторные проходы берут результаты из кэша
+        self.executor = ModelExecutor(cache=ResultCache(memory_budget=256 << 20),
+                                      profiler=self.profiler)
+        self.video_key = None  # хэш содержимого открытого видео
+
+        # Пакетный режим (офлайн/экспорт): batch_size > 1 отключает темп источника
+        self.batch_size = 1
+        self.batch_timeout_ms = 50
+        self.paced = True  # декодирование в темпе источника
+
+        # Модели запускаются на каждом k-м кадре, k подбирается по их задержке
+        self.adaptive_stride = True
+        # Модели не чаще чем раз в model_stride кадров; промежуточные кадры заполняет трекер,
+        # он же сглаживает точки и присваивает людям устойчивые ID
+        self.model_stride = 1
+        self.temporal_smoothing = True
+
+        # Конвертация для показа выполняется здесь, а не в GUI-потоке
+        self.display_converter = DisplayConverter()
+        self.display_size = None  # (ширина, высота) виджета отображения
+        # Скелеты рисуются не в кадр источника, а в буфер отображения (меньше пикселей),
+        # отдельным слоем, который переиспользуется, пока результаты не изменились
+        self.overlay_on_display = True
+        self.overlay_layer = OverlayLayer(self.executor.overlay)
+
+        self.keypoint_writer = None  # KeypointWriter, если включена запись точек
+        self.exporter = None  # VideoExporter, если включено сохранение видео
 
     def run(self):
-        while self.is_running:
-            self.seek_lock.lock()
-            seeking = self.seeking
+        self.decode_queue.reopen()
+        self.render_queue.reopen()
+        for stats in self.stage_stats.values():
+            stats.reset()
+        self.profiler.reset()
+
+        self.decoder = DecoderStage(self, self.decode_queue, self.stage_stats["decode"])
+        self.decoder.add_downstream(self.render_queue)
+        self.inference = InferenceStage(self, self.decoder, self.decode_queue,
+                                        self.render_queue, self.stage_stats["inference"])
+        self.decoder.start()
+        self.inference.start()
+
+        try:
+            while self.is_running:
+                packet = self.render_queue.get(timeout=0.05)
+                if packet is None:
+                    continue
+                if packet is END_OF_STREAM:
+                    error = stage_error(self.decoder, self.inference)
+                    if error is not None:
+                        self.error_signal.emit(f"{type(error).__name__}: {error}")
+                    else:
+                        self.finished_signal.emit()
+                    break
+                if packet.generation != self.decoder.generation:
+                    continue
+
+                start_time = time.perf_counter()
+                display_frame = self.display_converter.convert(packet.frame, self.display_size)
+                self.profiler.record("convert", start_time)
+                if display_frame is not None:
+                    if self.overlay_on_display and packet.results:
+                        scale = display_frame.array.shape[1] / packet.frame.shape[1]
+                        self.overlay_layer.composite(display_frame.array, packet.results,
+                                                     scale=scale, rgb=True)
+                    if self.show_hud:
+                        draw_hud(display_frame.array, self.hud_lines())
+                    self.change_pixmap_signal.emit(display_frame)
+                else:
+                    self.stage_stats["render"].drop()  # GUI ещё не отрисовал предыдущие кадры
+                # Ползунок показывает число пройденных кадров: показанный кадр включительно
+                self.position_changed.emit(packet.index + 1, packet.total)
+                # Задержка от захвата/декодирования кадра до его отправки на экран
+                self.profiler.record("latency", packet.decoded_at)
+                writer = self.keypoint_writer
+                if writer is not None:
+                    writer.add_results(packet.index, packet.results, packet.track_ids)
+                exporter = self.exporter
+                if exporter is not None:
+                    # В темпе источника кодировщик не задерживает показ: если он занят,
+                    # кадр пропускается и заменяется в файле копией предыдущего
+                    results = packet.results if self.overlay_on_display else None
+                    exporter.submit(packet.index, packet.frame, results,
+                                    timeout=0 if self.paced else None)
+                self.stage_stats["render"].tick((time.perf_counter() - start_time) * 1000)
+        finally:
+            self._stop_stages()
+
+    def _stop_stages(self):
+        for stage in (self.decoder, self.inference):
+            if stage is not None:
+                stage.stop()
+        self.decode_queue.close()
+        self.render_queue.close()
+        for stage in (self.decoder, self.inference):
+            if stage is not None and stage.is_alive():
+                stage.join()
+
+    def set_batch_mode(self, batch_size, timeout_ms=50):
+        """
+        Включает пакетный инференс: кадры не теряются (очередь декодера блокирующая)
+        и декодируются без темпа источника. batch_size=1 возвращает обычный режим.
+        Вызывается только при остановленном потоке: работающие стадии держат прежние очереди.
+        """
+        self._check_stopped("пакетного режима")
+        self.batch_size = max(1, int(batch_size))
+        self.batch_timeout_ms = timeout_ms
+        self.paced = self.batch_size == 1
+        if self.batch_size > 1:
+            self.decode_queue = FrameQueue(maxsize=self.batch_size * 2, policy=BLOCK)
+        else:
+            self.decode_queue = FrameQueue(maxsize=2, policy=DROP_OLDEST)
+
+    def set_live_mode(self, live):
+        """
+        Для живого источника очереди укорачиваются до одного кадра: только свежие кадры.
+        Вызывается только при остановленном потоке, как и set_batch_mode.
+        """
+        self._check_stopped("режима источника")
+        self.is_live = live
+        size = 1 if live else 2
+        self.decode_queue = FrameQueue(maxsize=size, policy=DROP_OLDEST)
+        self.render_queue = FrameQueue(maxsize=size, policy=BLOCK)
+        self.batch_size = 1
+        self.paced = True
+
+    def _check_stopped(self, what):
+        if self.isRunning():
+            raise RuntimeError(f"Смена {what} возможна только при остановленной обработке (stop())")
+
+    def take_seek_target(self):
+        """Забирает отложенный запрос перемотки (-1, если его нет)"""
+        self.seek_lock.lock()
+        try:
+            if not self.seeking or self.target_frame < 0:
+                return -1
             target = self.target_frame
+            self.seeking = False
+            self.target_frame = -1
+            self.is_paused = False
+            return target
+        finally:
             self.seek_lock.unlock()
 
-            if seeking and target >= 0:
-                self.cap.set(cv2.CAP_PROP_POS_FRAMES, target)
-                self.seek_lock.lock()
-                self.seeking = False
-                self.target_frame = -1
-                self.is_paused = False
-                self.seek_lock.unlock()
-                continue
-
-            if not self.is_paused:
-                start_time = time.time() * 1000
-
-                if self.cap and self.cap.isOpened():
-                    ret, frame = self.cap.read()
-                    if not ret:
-                        if self.loop_video:
-                            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                            continue
-                        else:
-                            self.finished_signal.emit()
-                            break
-
-                    for model_name, model in self.active_models.items():
-                        points = model.process_frame(frame)
-                        if points is not None:
-                            model.draw_skeleton(frame, points)
-
-                    self.change_pixmap_signal.emit(frame)
-                    pos = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
-                    total = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                    self.position_changed.emit(pos, total)
-
-                if self.last_frame_time > 0:
-                    elapsed = (time.time() * 1000) - self.last_frame_time
-                    target_delay = self.base_delay / self.speed
-                    remaining_delay = max(1, target_delay - elapsed)
-                    self.msleep(int(remaining_delay))
-
-                self.last_frame_time = time.time() * 1000
-            else:
-                self.msleep(50)
+    def hud_lines(self):
+        """Строки оверлея; пересчитываются не чаще двух раз в секунду"""
+        now = time.perf_counter()
+        if now - self._hud_updated > 0.5:
+            stats = self.pipeline_stats()
+            fps = " / ".join(f"{name} {s['fps']:.0f}" for name, s in stats.items())
+            self._hud_lines = [f"fps: {fps}"] + self.profiler.hud_lines()
+            self._hud_updated = now
+        return self._hud_lines
+
+    def pipeline_stats(self):
+        """Счётчики пропускной способности по стадиям"""
+        stats = {name: s.snapshot() for name, s in self.stage_stats.items()}
+        stats["decode"]["queue_dropped"] = self.decode_queue.dropped
+        stats["inference"]["queue_dropped"] = self.render_queue.dropped
+        return stats
 
     def pause(self):
         self.is_paused = True
@@ -89,13 +236,16 @@ class VideoThread(QThread):
 
     def stop(self):
         self.is_running = False
+        self.decode_queue.close()
+        self.render_queue.close()
+        self.wait()  # стадии конвейера завершаются вместе с run()
+        self.executor.shutdown()
         if self.cap:
             self.cap.release()
         self.quit()
 
     def update_active_models(self, models_dict):
-        self.active_models = {name: model for name, model in models_dict.items()
-                              if model is not None}
+        self.active_models = distinct_models(models_dict)
 
     def seek(self, position):
         """Безопасная установка позиции для перемотки"""
@@ -116,12 +266,25 @@ class MainWindow(QMainWindow):
 
         self.models = plugin
         self.active_models = {}
+        self.multi_window = None  # окно мультипотока: одно на приложение
 
         self.video_thread = VideoThread()
         self.init_ui()
 
+        # Модели и их фреймворки загружаются в фоне: окно показывается сразу
+        self.model_loader = ModelLoader(self.models)
+        self.model_loader.loaded.connect(self.model_loaded)
+        self.model_loader.failed.connect(self.model_failed)
+        self.model_loader.start()
+
+        # Периодическая выгрузка давно не используемых моделей
+        self.unload_timer = QTimer(self)
+        self.unload_timer.timeout.connect(self.models.unload_idle)
+        self.unload_timer.start(30000)
+
         self.video_thread.change_pixmap_signal.connect(self.update_image)
         self.video_thread.finished_signal.connect(self.video_finished)
+        self.video_thread.error_signal.connect(self.pipeline_failed)
         self.video_thread.position_changed.connect(self.update_progress)
 
     def init_ui(self):
@@ -132,10 +295,23 @@ class MainWindow(QMainWindow):
         self.video_label.setMinimumSize(800, 600)
 
         self.open_btn = QPushButton("📁 Выбрать видео", self)
+        self.stream_btn = QPushButton("📡 Поток", self)
         self.start_btn = QPushButton("▶ Старт", self)
         self.stop_btn = QPushButton("⏹ Стоп", self)
         self.loop_btn = QPushButton("🔁 Зациклить", self)
         self.loop_btn.setCheckable(True)
+        self.record_btn = QPushButton("⏺ Запись точек", self)
+        self.record_btn.setCheckable(True)
+        self.export_btn = QPushButton("💾 Сохранить видео", self)
+        self.export_btn.setCheckable(True)
+        self.hud_checkbox = QCheckBox("HUD", self)
+        self.smoothing_checkbox = QCheckBox("Сглаживание", self)
+        self.smoothing_checkbox.setChecked(True)
+        # Отношение частоты моделей к частоте кадров; пропущенные кадры заполняет трекер
+        self.model_rate_box = QComboBox(self)
+        self.model_rate_box.addItems(["Модели: каждый кадр", "Модели: 1/2", "Модели: 1/3", "Модели: 1/4"])
+        self.metrics_btn = QPushButton("📊 Метрики", self)
+        self.multi_btn = QPushButton("▦ Мультипоток", self)
 
         self.speed_slider = QSlider(Qt.Horizontal)
         self.speed_slider.setMinimum(10)  # 0.1x
@@ -147,12 +323,26 @@ class MainWindow(QMainWindow):
         self.model_layout = QVBoxLayout()
 
         self.model_buttons = {}
+        self.model_states = {}  # имя -> loading / ready / error
+        self.resolution_boxes = {}
         for model_name in self.models.keys():
             checkbox = QCheckBox(model_name, self)
             checkbox.setChecked(False)
             checkbox.stateChanged.connect(self.update_model_selection)
             self.model_buttons[model_name] = checkbox
-            self.model_layout.addWidget(checkbox)
+
+            # Разрешение, на котором модель видит кадр (отображение остаётся в исходном)
+            resolution_box = QComboBox(self)
+            resolution_box.addItems(list(INFERENCE_RESOLUTIONS))
+            resolution_box.setToolTip("Разрешение инференса")
+            resolution_box.currentTextChanged.connect(
+                lambda text, name=model_name: self.change_resolution(name, text))
+            self.resolution_boxes[model_name] = resolution_box
+
+            row = QHBoxLayout()
+            row.addWidget(checkbox, 1)
+            row.addWidget(resolution_box)
+            self.model_layout.addLayout(row)
 
         self.model_group.setLayout(self.model_layout)
 
@@ -160,9 +350,17 @@ class MainWindow(QMainWindow):
 
         control_layout = QHBoxLayout()
         control_layout.addWidget(self.open_btn)
+        control_layout.addWidget(self.stream_btn)
         control_layout.addWidget(self.start_btn)
         control_layout.addWidget(self.stop_btn)
         control_layout.addWidget(self.loop_btn)
+        control_layout.addWidget(self.record_btn)
+        control_layout.addWidget(self.export_btn)
+        control_layout.addWidget(self.hud_checkbox)
+        control_layout.addWidget(self.smoothing_checkbox)
+        control_layout.addWidget(self.model_rate_box)
+        control_layout.addWidget(self.metrics_btn)
+        control_layout.addWidget(self.multi_btn)
 
         control_layout.addWidget(QLabel("Скорость:"))
         control_layout.addWidget(self.speed_slider)
@@ -185,9 +383,17 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(container)
 
         self.open_btn.clicked.connect(self.open_video)
+        self.stream_btn.clicked.connect(self.open_stream)
         self.start_btn.clicked.connect(self.start_processing)
         self.stop_btn.clicked.connect(self.stop_processing)
         self.loop_btn.toggled.connect(self.toggle_loop)
+        self.record_btn.toggled.connect(self.toggle_recording)
+        self.export_btn.toggled.connect(self.toggle_export)
+        self.hud_checkbox.toggled.connect(self.toggle_hud)
+        self.smoothing_checkbox.toggled.connect(self.toggle_smoothing)
+        self.model_rate_box.currentIndexChanged.connect(self.change_model_rate)
+        self.metrics_btn.clicked.connect(self.export_metrics)
+        self.multi_btn.clicked.connect(self.open_multistream)
 
         self.speed_slider.valueChanged.connect(self.change_speed)
 
@@ -215,6 +421,8 @@ class MainWindow(QMainWindow):
 
     def update_progress(self, pos, total):
         """Обновление прогресс-бара и времени"""
+        if self.video_thread.is_live:
+            return  # у живого источника нет длины и перемотки
         if not self.video_thread.seeking and total > 0:
             self.progress_slider.blockSignals(True)  # Блокируем сигналы
             self.progress_slider.setMaximum(total)
@@ -233,34 +441,74 @@ class MainWindow(QMainWindow):
 
     def seek_video(self, position):
         """Обработчик перемотки видео"""
+        if self.video_thread.is_live:
+            return
         if hasattr(self, 'video_thread') and self.video_thread.cap and self.video_thread.cap.isOpened():
             self.video_thread.seek(position)
 
     def update_model_selection(self):
         self.active_models = {}
         for model_name, checkbox in self.model_buttons.items():
-            if checkbox.isChecked():
-                self.active_models[model_name] = self.models[model_name]
+            if not checkbox.isChecked():
+                self.models.release(model_name)
+            elif self.models.is_loaded(model_name):
+                self.active_models[model_name] = self.models.acquire(model_name)
+            elif self.model_states.get(model_name) != "loading":
+                # Модель подключится после загрузки в фоне (model_loaded)
+                self.set_model_state(model_name, "loading")
+                self.model_loader.request(model_name)
 
         self.video_thread.update_active_models(self.active_models)
         self.status_label.setText(f"Активные модели: {', '.join(self.active_models.keys())}")
 
-    def update_image(self, cv_img):
-        """Отображение обработанного кадра"""
-        qt_img = self.convert_cv_qt(cv_img)
-        self.video_label.setPixmap(qt_img)
-
-    def convert_cv_qt(self, cv_img):
-        """Конвертация OpenCV изображения в QPixmap"""
-        rgb_image = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_image.shape
-        bytes_per_line = ch * w
-        qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        return QPixmap.fromImage(qt_image.scaled(
-            self.video_label.width(),
-            self.video_label.height(),
-            Qt.KeepAspectRatio
-        ))
+    def set_model_state(self, model_name, state, message=""):
+        """Состояние модели на флажке: loading — загружается, ready — готова, error — недоступна"""
+        self.model_states[model_name] = state
+        checkbox = self.model_buttons[model_name]
+        if state == "loading":
+            checkbox.setText(f"{model_name} ⏳")
+            checkbox.setToolTip("Загрузка...")
+            checkbox.setStyleSheet("")
+        elif state == "error":
+            checkbox.setText(f"{model_name} ⚠")
+            checkbox.setToolTip(message)
+            checkbox.setStyleSheet("color: #b00000;")
+        else:
+            checkbox.setText(model_name)
+            checkbox.setToolTip("Готова")
+            checkbox.setStyleSheet("")
+
+    def model_loaded(self, model_name):
+        self.set_model_state(model_name, "ready")
+        if self.model_buttons[model_name].isChecked():
+            self.update_model_selection()
+
+    def model_failed(self, model_name, message):
+        self.set_model_state(model_name, "error", message)
+        checkbox = self.model_buttons[model_name]
+        if checkbox.isChecked():
+            checkbox.blockSignals(True)
+            checkbox.setChecked(False)
+            checkbox.blockSignals(False)
+            self.update_model_selection()
+            self.status_label.setText(f"Модель {model_name} недоступна: {message}")
+
+    def change_resolution(self, model_name, text):
+        """Меняет разрешение инференса модели; применяется со следующего кадра"""
+        self.video_thread.executor.set_resolution(model_name, INFERENCE_RESOLUTIONS[text])
+
+    def update_image(self, display_frame):
+        """Отображение обработанного кадра (уже в RGB и размере виджета)"""
+        start_time = time.perf_counter()
+        try:
+            self.video_label.setPixmap(QPixmap.fromImage(display_frame.image))
+        finally:
+            display_frame.release()  # буфер возвращается в пул после отрисовки
+        self.video_thread.profiler.record("paint", start_time)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.video_thread.display_size = (self.video_label.width(), self.video_label.height())
 
     def change_speed(self, value):
         speed = value / 100.0
@@ -288,6 +536,11 @@ class MainWindow(QMainWindow):
 
             self.video_thread.cap = cv2.VideoCapture(file_name)
             if self.video_thread.cap.isOpened():
+                self.video_thread.set_live_mode(False)
+                self.set_progress_enabled(True)
+                self.video_thread.video_key = video_fingerprint(file_name)
+                self.video_thread.keyframes = KeyframeIndex.probe_async(file_name)
+                self.video_thread.frame_cache.clear()
 
                 total_frames = int(self.video_thread.cap.get(cv2.CAP_PROP_FRAME_COUNT))
                 self.progress_slider.setRange(0, total_frames)
@@ -306,6 +559,46 @@ class MainWindow(QMainWindow):
             else:
                 QMessageBox.warning(self, "Ошибка", "Не удалось открыть видеофайл!")
 
+    def open_stream(self):
+        """Живой источник: номер камеры, RTSP/HTTP URL или именованный канал"""
+        text, ok = QInputDialog.getText(
+            self,
+            "Открыть поток",
+            "Номер камеры, RTSP/HTTP URL или путь к именованному каналу:",
+            text="0"
+        )
+        if not ok or not text.strip():
+            return
+        source, live = parse_source(text)
+        if self.video_thread.isRunning():
+            self.video_thread.stop()
+
+        if live:
+            self.video_thread.cap = LiveCapture(source)
+        else:
+            self.video_thread.cap = cv2.VideoCapture(source)
+            if not self.video_thread.cap.isOpened():
+                QMessageBox.warning(self, "Ошибка", "Не удалось открыть источник!")
+                return
+        self.video_thread.set_live_mode(live)
+        fps = self.video_thread.cap.get(cv2.CAP_PROP_FPS)
+        self.video_thread.base_delay = int(1000 / fps) if fps > 0 else 33
+        self.video_thread.video_key = None
+        self.video_thread.keyframes = KeyframeIndex()
+        self.video_thread.frame_cache.clear()
+        self.set_progress_enabled(not live)
+        self.time_label.setText("● LIVE" if live else "00:00 / 00:00")
+
+        self.open_btn.setStyleSheet("")
+        self.status_label.setText(f"Источник: {text.strip()}")
+        self.start_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+
+    def set_progress_enabled(self, enabled):
+        self.progress_slider.setEnabled(enabled)
+        if not enabled:
+            self.progress_slider.setValue(0)
+
     def start_processing(self):
         if not self.video_thread.cap or not self.video_thread.cap.isOpened():
             QMessageBox.warning(self, "Ошибка", "Сначала выберите видео!")
@@ -340,15 +633,135 @@ class MainWindow(QMainWindow):
         self.video_thread.loop_video = checked
         self.loop_btn.setStyleSheet("background-color: #a0e0a0;" if checked else "")
 
+    def open_multistream(self):
+        """
+        Окно с сеткой потоков; модели берутся из того же реестра и не загружаются повторно.
+        Открытое окно поднимается, а не создаётся заново: иначе старое окно удалилось бы
+        вместе с работающими потоками загрузчика и планировщика.
+        """
+        if self.multi_window is not None and self.multi_window.isVisible():
+            self.multi_window.showNormal()
+            self.multi_window.raise_()
+            self.multi_window.activateWindow()
+            return
+        self.multi_window = MultiStreamWindow(self.models)
+        self.multi_window.show()
+
+    def toggle_smoothing(self, checked):
+        self.video_thread.temporal_smoothing = checked
+
+    def change_model_rate(self, index):
+        self.video_thread.model_stride = index + 1
+
+    def toggle_hud(self, checked):
+        self.video_thread.show_hud = checked
+
+    def export_metrics(self):
+        """Экспорт задержек по стадиям: CSV, JSON-сводка или Chrome trace"""
+        file_name, selected = QFileDialog.getSaveFileName(
+            self,
+            "Экспорт метрик",
+            "metrics.csv",
+            "CSV (*.csv);;JSON (*.json);;Chrome trace (*.trace.json)"
+        )
+        if not file_name:
+            return
+        if selected.startswith("Chrome") and not file_name.endswith(".trace.json"):
+            file_name = file_name.rsplit(".json", 1)[0] + ".trace.json"
+        try:
+            self.video_thread.profiler.export(file_name)
+        except OSError as exc:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить метрики: {exc}")
+            return
+        self.status_label.setText(f"Метрики сохранены: {file_name.split('/')[-1]}")
+
+    def toggle_recording(self, checked):
+        """Запись ключевых точек всех активных моделей в файл .nvk"""
+        if checked:
+            file_name, _ = QFileDialog.getSaveFileName(
+                self,
+                "Сохранить ключевые точки",
+                "keypoints.nvk",
+                "Ключевые точки (*.nvk)"
+            )
+            if not file_name:
+                self.record_btn.blockSignals(True)
+                self.record_btn.setChecked(False)
+                self.record_btn.blockSignals(False)
+                return
+            self.video_thread.keypoint_writer = KeypointWriter(file_name)
+            self.record_btn.setStyleSheet("background-color: #e0a0a0;")
+        else:
+            self.stop_recording()
+
+    def stop_recording(self):
+        writer = self.video_thread.keypoint_writer
+        self.video_thread.keypoint_writer = None
+        if writer is not None:
+            writer.close()
+        self.record_btn.setStyleSheet("")
+
+    def toggle_export(self, checked):
+        """Сохранение обработанного видео (с отрисованными скелетами) в файл"""
+        if checked:
+            file_name, _ = QFileDialog.getSaveFileName(
+                self,
+                "Сохранить обработанное видео",
+                "processed.mp4",
+                "Видео файлы (*.mp4 *.avi *.mkv)"
+            )
+            resolution, ok = (None, False)
+            if file_name:
+                resolution, ok = QInputDialog.getItem(
+                    self, "Сохранить видео", "Разрешение:", list(INFERENCE_RESOLUTIONS), 0, False)
+            if not file_name or not ok:
+                self.export_btn.blockSignals(True)
+                self.export_btn.setChecked(False)
+                self.export_btn.blockSignals(False)
+                return
+            cap = self.video_thread.cap
+            fps = cap.get(cv2.CAP_PROP_FPS) if cap is not None else 0
+            exporter = VideoExporter(file_name, fps, out_height=INFERENCE_RESOLUTIONS[resolution],
+                                     renderer=self.video_thread.executor.overlay)
+            exporter.start()
+            self.video_thread.exporter = exporter
+            self.export_btn.setStyleSheet("background-color: #e0a0a0;")
+        else:
+            self.stop_export()
+
+    def stop_export(self):
+        exporter = self.video_thread.exporter
+        self.video_thread.exporter = None
+        if exporter is not None:
+            exporter.close()  # дожидается кодирования уже принятых кадров
+            if exporter.error is not None:
+                QMessageBox.warning(self, "Ошибка", f"Ошибка записи видео: {exporter.error}")
+        self.export_btn.blockSignals(True)
+        self.export_btn.setChecked(False)
+        self.export_btn.blockSignals(False)
+        self.export_btn.setStyleSheet("")
+
     def video_finished(self):
         self.stop_processing()
         if not self.video_thread.loop_video:
+            self.stop_export()
             QMessageBox.information(self, "Информация", "Видео завершено!")
 
         self.start_btn.setEnabled(True)
 
+    def pipeline_failed(self, message):
+        self.status_label.setText(f"Ошибка обработки | {message}")
+        self.stop_export()
+        QMessageBox.warning(self, "Ошибка", f"Обработка остановлена: {message}")
+        self.start_btn.setEnabled(True)
+
     def closeEvent(self, event):
+        if self.multi_window is not None and self.multi_window.isVisible():
+            self.multi_window.close()  # closeEvent окна останавливает его потоки
         self.video_thread.stop()
+        self.model_loader.stop()
+        self.stop_recording()
+        self.stop_export()
         event.accept()
 
 
@@ -356,4 +769,6 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
+    window.status_label.setText(
+        f"Статус: Остановлено | окно показано за {(time.perf_counter() - STARTED_AT) * 1000:.0f} мс")
     sys.exit(app.exec_())
@@ -5,105 +5,134 @@ import mediapipe as mp # 0.10.9
 import torchvision# 0.14
 
 from utils.datasets import letterbox
+from NeuroVisionQt.overlay import edge_array, draw_keypoints
 
 
+NUM_LANDMARKS = 33  # количество точек в Mediapipe Pose
+
+# Общий результат «поза не найдена»: не создаётся заново на каждый промах
+NO_KEYPOINTS = np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32)
+NO_KEYPOINTS.flags.writeable = False
+
 class MediaPipePose:
-    def __init__(self):
+    # Параметры векторной отрисовки (OverlayRenderer)
+    skeleton_style = {"color": (255, 0, 0), "thickness": 2, "radius": 5}
+
+    def __init__(self, static_image_mode=False, model_complexity=1):
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(static_image_mode=False,
-                    model_complexity=1,
+        self.pose = self.mp_pose.Pose(static_image_mode=static_image_mode,
+                    model_complexity=model_complexity,
                     min_detection_confidence=0.5,
                     min_tracking_confidence=0.5)
+        self.skeleton = edge_array(self.mp_pose.POSE_CONNECTIONS)
 
+    def close(self):
+        """Освобождает граф Mediapipe при выгрузке модели из реестра"""
+        self.pose.close()
 
     def process_predictions(self, pred, conf_thres=0.25, iou_thres=0.45):
         """
         Обрабатывает выход модели:
           - Убирает предсказания с низкой уверенность (индекс 4).
           - Применяет Non-Maximum Suppression (NMS) для bbox.
+        Берётся первый элемент батча; для пакета используйте process_predictions_batch.
         """
-        # Убираем размер батча
-        pred = pred[0]  # теперь форма (15300, 57)
-
-        # Фильтрация по порогу уверенности объекта (индекс 4)
-        mask = pred[:, 4] > conf_thres
-        pred = pred[mask]
-
-        if pred.shape[0] == 0:
-            return []
+        return self.process_predictions_batch(pred[:1], conf_thres, iou_thres)[0]
 
-        # Извлекаем ограничивающие прямоугольники
-        boxes = pred[:, :4]
-        # Считаем итоговую уверенность: объектная уверенность * уверенность класса
-        scores = pred[:, 4] * pred[:, 5]
-
-        # Применяем NMS (для этого могут потребоваться координаты в формате [x1, y1, x2, y2])
-        # Если у вас bbox заданы как (x, y, w, h), преобразуем:
-        boxes_xyxy = boxes.clone()
-        boxes_xyxy[:, 2] = boxes[:, 0] + boxes[:, 2]  # x2 = x + w
-        boxes_xyxy[:, 3] = boxes[:, 1] + boxes[:, 3]  # y2 = y + h
-
-        keep = torchvision.ops.nms(boxes_xyxy, scores, iou_thres)
-        pred = pred[keep]
-
-        return pred
+    def process_predictions_batch(self, pred, conf_thres=0.25, iou_thres=0.45):
+        """
+        Векторизованная обработка всего батча (B, 15300, 57) за один проход:
+        фильтрация по уверенности, перевод bbox (x, y, w, h) -> (x1, y1, x2, y2)
+        и batched NMS, где кадры батча разделены индексом.
+        Возвращает список тензоров (N_i, 57) по кадрам.
+        """
+        batch_size = pred.shape[0]
+        mask = pred[..., 4] > conf_thres
+        image_idx, row_idx = mask.nonzero(as_tuple=True)
+        if row_idx.numel() == 0:
+            return [pred[i, :0] for i in range(batch_size)]
+
+        candidates = pred[image_idx, row_idx]
+        # Итоговая уверенность: объектная уверенность * уверенность класса
+        scores = candidates[:, 4] * candidates[:, 5]
+        # Если bbox заданы как (x, y, w, h): x2 = x + w, y2 = y + h (одна операция без clone)
+        xy = candidates[:, :2]
+        boxes_xyxy = torch.cat((xy, xy + candidates[:, 2:4]), dim=1)
+
+        # Индексы отсортированы по убыванию уверенности, как у покадрового nms
+        keep = torchvision.ops.batched_nms(boxes_xyxy, scores, image_idx, iou_thres)
+        kept, kept_idx = candidates[keep], image_idx[keep]
+        return [kept[kept_idx == i] for i in range(batch_size)]
+
+    @staticmethod
+    def decode_keypoints(pred, num_keypoints=17):
+        """
+        Ключевые точки из строк предсказаний YOLO-pose (6 + K * 3 столбцов)
+        как представление (N, K, 3) без копирования данных.
+        """
+        return pred[:, 6:6 + num_keypoints * 3].reshape(-1, num_keypoints, 3)
 
     def scale_coords(self, coords, ratio, pad, original_shape):
         """
         Преобразует координаты, полученные на letterbox-изображении, в координаты исходного изображения.
-        :param coords: numpy-массив координат (N, 2) или (N, 3) (x, y, [conf])
+        Работает на месте для float-массивов любой формы (..., 2+), в том числе (N, K, 3);
+        целочисленные координаты копируются в float32 (деление на месте для них невозможно).
+        :param coords: numpy-массив координат (N, 2), (N, 3) или (N, K, 3) (x, y, [conf])
         :param ratio: коэффициент масштабирования, возвращаемый letterbox
         :param pad: tuple (pad_x, pad_y), отступы, возвращаемые letterbox
         :param original_shape: кортеж (h, w) исходного изображения
-        :return: преобразованные координаты
+        :return: преобразованные координаты (тот же массив, если он уже не менее чем двумерный и float)
         """
         coords = np.atleast_2d(coords)  # если coords уже (N,2), то ничего не меняется
+        if not np.issubdtype(coords.dtype, np.floating):
+            coords = coords.astype(np.float32)
 
         # Распаковываем отступы
         pad_x, pad_y = pad  # убедитесь, что pad передается как кортеж (pad_x, pad_y)
 
         # Преобразуем координаты обратно к размерам исходного изображения
-        coords[:, 0] = (coords[:, 0] - pad_x) / ratio[0]
-        coords[:, 1] = (coords[:, 1] - pad_y) / ratio[1]
+        xy = coords[..., :2]
+        xy -= (pad_x, pad_y)
+        xy /= (ratio[0], ratio[1])
         return coords
 
     def process_frame(self, frame):
         """
         Обрабатывает кадр с помощью Mediapipe Pose:
         - преобразует кадр в RGB,
-        - выполняет инференс,
-        - рисует найденные ключевые точки (синим цветом) на кадре.
-        Возвращает список точек в формате [(x, y, visibility), ...].
+        - выполняет инференс.
+        Кадр не изменяется: он может одновременно обрабатываться другими моделями.
+        Возвращает массив float32 формы (N, 33, 3) с точками (x, y, visibility);
+        N = 0, если поза не найдена.
         """
         img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        print("Shape:", img_rgb.shape, "Dtype:", img_rgb.dtype)
         results = self.pose.process(img_rgb)
-        keypoints = []
-        h, w, _ = frame.shape
-
-        if results.pose_landmarks:
-            for lm in results.pose_landmarks.landmark:
-                x, y, visibility = lm.x * w, lm.y * h, lm.visibility
-                keypoints.append((x, y, visibility))
-                cv2.circle(frame, (int(x), int(y)), 5, (255, 0, 0), -1)
-        else:
-            # Если не обнаружено, заполняем список нулями (количество точек в Mediapipe = 33)
-            keypoints = [(0, 0, 0)] * 33
+        if not results.pose_landmarks:
+            return NO_KEYPOINTS
 
+        h, w, _ = frame.shape
+        return self.landmarks_to_array(results.pose_landmarks.landmark, w, h)
+
+    @staticmethod
+    def landmarks_to_array(landmarks, w, h):
+        """Переводит landmark'и Mediapipe в массив (1, K, 3) пикселей за одно выделение памяти"""
+        keypoints = np.fromiter(
+            (v for lm in landmarks for v in (lm.x, lm.y, lm.visibility)),
+            dtype=np.float32, count=len(landmarks) * 3
+        ).reshape(1, len(landmarks), 3)
+        keypoints[..., 0] *= w
+        keypoints[..., 1] *= h
         return keypoints
 
     def draw_skeleton(self, frame, landmarks, flag=False):
         """
         Отрисовывает линии скелета для ключевых точек Mediapipe.
-        Используем набор соединений, предоставленный Mediapipe.
+        Используем набор соединений, предоставленный Mediapipe (все рёбра и точки — пакетно).
+        :param landmarks: массив (N, K, 3) или (K, 3) точек (x, y, visibility)
         """
-        for connection in self.mp_pose.POSE_CONNECTIONS:
-            start_idx, end_idx = connection
-            if start_idx < len(landmarks) and end_idx < len(landmarks):
-                x1, y1, *_ = landmarks[start_idx]
-                x2, y2, *_ = landmarks[end_idx]
-                if flag:
-                    cv2.line(frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 0, 255), 1)
-                else:
-                    cv2.line(frame, (int(x1), int(y1)), (int(x2), int(y2)), (255, 0, 0), 2)
-
+        people = np.asarray(landmarks).reshape(-1, NUM_LANDMARKS, 3)
+        if flag:
+            draw_keypoints(frame, people, self.skeleton, color=(0, 0, 255), point_color=(255, 0, 0),
+                           thickness=1, radius=5)
+        else:
+            draw_keypoints(frame, people, self.skeleton, **self.skeleton_style)
@@ -0,0 +1,328 @@
+"""
+Мультипоточный режим: несколько видео в сетке одного окна.
+У каждой панели свой декодер, а инференс выполняет один общий планировщик:
+кадры разных потоков собираются в пакет, а процессорное время делится поровну между потоками.
+Модели берутся из plugin: общие экземпляры (shared) обрабатывают кадры всех потоков одним пакетом,
+модели с состоянием между кадрами (shared=False) создаются на каждый поток отдельно.
+
+Запуск: python -m NeuroVisionQt.multistream a.mp4 b.mp4 c.mp4
+"""
+import math
+import sys
+import time
+
+import cv2
+from PyQt5.QtCore import QThread, pyqtSignal, Qt
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import (
+    QApplication, QMainWindow, QLabel, QPushButton, QVBoxLayout, QHBoxLayout,
+    QGridLayout, QWidget, QFileDialog, QCheckBox, QGroupBox, QMessageBox
+)
+
+from NeuroVisionQt.pipeline import FrameQueue, StageStats, DecoderStage, END_OF_STREAM, DROP_OLDEST
+from NeuroVisionQt.loader import ModelLoader
+from NeuroVisionQt.executor import ModelExecutor
+from NeuroVisionQt.display import DisplayConverter
+from NeuroVisionQt.profiling import Profiler
+from NeuroVisionQt.seek import KeyframeIndex, FrameCache
+from NeuroVisionQt.registry import distinct_models
+
+
+class VideoStream:
+    """Один поток мультиоконного режима: собственный декодер и очередь свежих кадров"""
+
+    def __init__(self, index, path, profiler):
+        self.index = index
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Не удалось открыть видеофайл: {path}")
+
+        # Атрибуты, которые читает DecoderStage
+        self.is_running = True
+        self.is_paused = False
+        self.loop_video = True
+        self.speed = 1.0
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.base_delay = 1000 / fps if fps > 0 else 30
+        self.paced = True
+        self.batch_size = 1
+        self.overlay_on_display = True  # скелеты рисуются в буфер панели, кадры не изменяются
+        self.keyframes = KeyframeIndex()
+        self.frame_cache = FrameCache(memory_budget=0)
+        self.profiler = profiler
+
+        self.queue = FrameQueue(maxsize=2, policy=DROP_OLDEST)
+        self.stats = StageStats(f"decode[{index}]")
+        self.decoder = DecoderStage(self, self.queue, self.stats)
+        self.converter = DisplayConverter()
+        self.display_size = None
+        self.active_models = {}  # модели этого потока: экземпляры shared=False только его
+        self.busy = 0.0  # накопленное время инференса, с
+
+    def take_seek_target(self):
+        return -1
+
+    def start(self):
+        self.decoder.start()
+
+    def stop(self):
+        self.is_running = False
+        self.queue.close()
+        self.decoder.stop()
+        if self.decoder.is_alive():
+            self.decoder.join()
+        self.cap.release()
+
+
+class MultiStreamThread(QThread):
+    """
+    Общий планировщик инференса. В каждом раунде берёт по одному свежему кадру
+    у потоков в порядке возрастания полученного ими процессорного времени
+    (не больше max_batch), прогоняет кадры через модели потоков и раздаёт результаты панелям.
+    Каждый экземпляр модели получает одним пакетом кадры всех потоков, где он активен.
+    """
+    frame_ready = pyqtSignal(int, object)  # номер панели, DisplayFrame
+
+    def __init__(self, max_batch=8):
+        super().__init__()
+        self.max_batch = max_batch
+        self.streams = []
+        self.is_running = True
+        self.is_paused = False
+        self.profiler = Profiler(trace=False)
+        self.executor = ModelExecutor(profiler=self.profiler)
+
+    def add_stream(self, path):
+        stream = VideoStream(len(self.streams), path, self.profiler)
+        # Новый поток не должен получить приоритет за всё прошлое время остальных
+        stream.busy = min((s.busy for s in self.streams), default=0.0)
+        self.streams.append(stream)
+        if self.isRunning():
+            stream.start()
+        return stream
+
+    def run(self):
+        for stream in self.streams:
+            if not stream.decoder.is_alive():
+                stream.start()
+        while self.is_running:
+            if self.is_paused:
+                self.msleep(50)
+                continue
+            batch = self._collect()
+            if not batch:
+                self.msleep(2)
+                continue
+
+            # Один вызов на раунд: общий экземпляр (например, YOLO) получает кадры всех потоков
+            # одним пакетом, даже если у потоков свои экземпляры моделей с shared=False
+            start = time.perf_counter()
+            batch_results = self.executor.infer_batch(
+                [packet.frame for _, packet in batch],
+                [stream.active_models for stream, _ in batch])
+            share = (time.perf_counter() - start) / len(batch)
+            for (stream, packet), results in zip(batch, batch_results):
+                packet.results = results
+                stream.busy += share
+                display_frame = stream.converter.convert(packet.frame, stream.display_size)
+                if display_frame is not None:
+                    # Скелеты рисуются сразу в разрешении панели, а не в кадре источника
+                    scale = display_frame.array.shape[1] / packet.frame.shape[1]
+                    self.executor.overlay.render(display_frame.array, results, scale=scale,
+                                                 rgb=True)
+                    self.frame_ready.emit(stream.index, display_frame)
+
+    def _collect(self):
+        batch = []
+        for stream in sorted(self.streams, key=lambda s: s.busy):
+            packet = stream.queue.get(timeout=0)
+            if packet is None or packet is END_OF_STREAM:
+                continue
+            batch.append((stream, packet))
+            if len(batch) >= self.max_batch:
+                break
+        return batch
+
+    def set_paused(self, paused):
+        self.is_paused = paused
+        for stream in self.streams:
+            stream.is_paused = paused
+
+    def stop(self):
+        self.is_running = False
+        self.wait()
+        for stream in self.streams:
+            stream.stop()
+        self.executor.shutdown()
+
+
+class MultiStreamWindow(QMainWindow):
+    def __init__(self, models=None, paths=()):
+        super().__init__()
+        self.setWindowTitle("Model Pose — мультипоток")
+        self.setGeometry(120, 120, 1280, 860)
+
+        if models is None:
+            from NeuroVisionQt.plugin import plugin
+            models = plugin
+        self.models = models  # общий реестр: общие модели загружаются один раз на все панели
+        self.selected_models = []  # имена отмеченных моделей в порядке флажков
+        self._requested = set()  # (имя, id потока) — модели, ожидающие загрузки в фоне
+        self.panes = []
+
+        self.stream_thread = MultiStreamThread()
+        self.stream_thread.frame_ready.connect(self.update_pane)
+        self.init_ui()
+        # Модели создаются в фоне, как и в главном окне: GUI не ждёт импорта и весов
+        self.model_loader = ModelLoader(self.models)
+        self.model_loader.loaded.connect(self.model_loaded)
+        self.model_loader.failed.connect(self.model_failed)
+        self.model_loader.start()
+        for path in paths:
+            self.add_stream(path)
+
+    def init_ui(self):
+        self.grid = QGridLayout()
+        self.grid.setSpacing(4)
+
+        self.add_btn = QPushButton("📁 Добавить видео", self)
+        self.start_btn = QPushButton("▶ Старт", self)
+        self.pause_btn = QPushButton("⏸ Пауза", self)
+        self.pause_btn.setCheckable(True)
+
+        self.model_group = QGroupBox("Активные модели")
+        model_layout = QHBoxLayout()
+        self.model_buttons = {}
+        for model_name in self.models.keys():
+            checkbox = QCheckBox(model_name, self)
+            checkbox.stateChanged.connect(self.update_model_selection)
+            self.model_buttons[model_name] = checkbox
+            model_layout.addWidget(checkbox)
+        self.model_group.setLayout(model_layout)
+
+        control_layout = QHBoxLayout()
+        control_layout.addWidget(self.add_btn)
+        control_layout.addWidget(self.start_btn)
+        control_layout.addWidget(self.pause_btn)
+
+        main_layout = QVBoxLayout()
+        main_layout.addLayout(self.grid, 1)
+        main_layout.addWidget(self.model_group)
+        main_layout.addLayout(control_layout)
+
+        container = QWidget()
+        container.setLayout(main_layout)
+        self.setCentralWidget(container)
+
+        self.add_btn.clicked.connect(self.open_videos)
+        self.start_btn.clicked.connect(self.start_processing)
+        self.pause_btn.toggled.connect(self.stream_thread.set_paused)
+
+    def open_videos(self):
+        file_names, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Выберите видео",
+            "",
+            "Видео файлы (*.mp4 *.avi *.mov)"
+        )
+        for file_name in file_names:
+            self.add_stream(file_name)
+
+    def add_stream(self, path):
+        try:
+            stream = self.stream_thread.add_stream(path)
+        except IOError as exc:
+            QMessageBox.warning(self, "Ошибка", str(exc))
+            return
+        self.refresh_models()
+        label = QLabel(self)
+        label.setAlignment(Qt.AlignCenter)
+        label.setMinimumSize(320, 180)
+        label.setStyleSheet("background-color: black;")
+        self.panes.append(label)
+        self.relayout()
+
+    def relayout(self):
+        columns = max(1, math.ceil(math.sqrt(len(self.panes))))
+        for i, label in enumerate(self.panes):
+            self.grid.addWidget(label, i // columns, i % columns)
+        self.update_pane_sizes()
+
+    def update_pane_sizes(self):
+        for stream, label in zip(self.stream_thread.streams, self.panes):
+            stream.display_size = (label.width(), label.height())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_pane_sizes()
+
+    def update_model_selection(self):
+        self.selected_models = [name for name, checkbox in self.model_buttons.items()
+                                if checkbox.isChecked()]
+        for model_name in self.model_buttons:
+            if model_name not in self.selected_models:
+                for stream in self.stream_thread.streams:
+                    self.models.release(model_name, owner=stream)
+        self.refresh_models()
+
+    def refresh_models(self):
+        """
+        Подключает к потокам загруженные отмеченные модели, остальные запрашивает у загрузчика.
+        Владелец — поток: модели с shared=False получают по экземпляру на поток.
+        """
+        for stream in self.stream_thread.streams:
+            active = {}
+            for model_name in self.selected_models:
+                request = (model_name, id(stream))
+                if self.models.is_loaded(model_name, owner=stream):
+                    self._requested.discard(request)
+                    active[model_name] = self.models.acquire(model_name, owner=stream)
+                elif request not in self._requested:
+                    self._requested.add(request)
+                    self.model_loader.request(model_name, owner=stream)
+            stream.active_models = distinct_models(active)
+
+    def model_loaded(self, model_name):
+        if model_name in self.selected_models:
+            self.refresh_models()
+
+    def model_failed(self, model_name, message):
+        """Модель недоступна (например, не установлен фреймворк): флажок снимается и блокируется"""
+        self._requested = {request for request in self._requested if request[0] != model_name}
+        checkbox = self.model_buttons[model_name]
+        checkbox.setToolTip(message)
+        checkbox.setStyleSheet("color: #b00000;")
+        if checkbox.isChecked():
+            checkbox.setChecked(False)  # update_model_selection уберёт модель у потоков
+            QMessageBox.warning(self, "Ошибка", f"Модель {model_name} недоступна: {message}")
+
+    def start_processing(self):
+        if not self.stream_thread.streams:
+            QMessageBox.warning(self, "Ошибка", "Сначала добавьте видео!")
+            return
+        self.update_pane_sizes()
+        if not self.stream_thread.isRunning():
+            self.stream_thread.start()
+        self.start_btn.setEnabled(False)
+
+    def update_pane(self, index, display_frame):
+        try:
+            self.panes[index].setPixmap(QPixmap.fromImage(display_frame.image))
+        finally:
+            display_frame.release()
+
+    def closeEvent(self, event):
+        self.model_loader.stop()
+        self.stream_thread.stop()
+        for stream in self.stream_thread.streams:
+            for model_name in stream.active_models:
+                self.models.release(model_name, owner=stream)
+        event.accept()
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = MultiStreamWindow(paths=sys.argv[1:])
+    window.show()
+    sys.exit(app.exec_())
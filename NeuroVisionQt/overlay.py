@@ -0,0 +1,117 @@
+import time
+
+import cv2
+import numpy as np
+
+from NeuroVisionQt.resolution import scale_points
+
+
+def edge_array(connections):
+    """Соединения скелета (пары индексов точек) -> массив (E, 2) int32 для векторной отрисовки"""
+    return np.array(sorted(connections), dtype=np.int32).reshape(-1, 2)
+
+
+def draw_keypoints(image, keypoints, edges, color=(255, 0, 0), point_color=None, thickness=2,
+                   radius=5, scale=1.0, rgb=False):
+    """
+    Рисует скелеты всех людей двумя вызовами OpenCV вместо цикла по рёбрам и точкам:
+    все видимые рёбра — одним cv2.polylines, все видимые точки — вторым
+    (отрезок нулевой длины толщиной 2 * radius OpenCV рисует кругом).
+    :param keypoints: массив (N, K, 2+) или (K, 2+) точек (x, y, [visibility])
+    :param edges: массив (E, 2) индексов соединённых точек
+    :param scale: множитель координат (например, размер отображения / размер кадра)
+    :param rgb: изображение в RGB — цвета (заданные в BGR) переставляются
+    """
+    people = np.asarray(keypoints)
+    if people.size == 0:
+        return
+    people = people.reshape(-1, people.shape[-2], people.shape[-1])
+    xy = np.rint(people[..., :2] * scale).astype(np.int32)  # (N, K, 2)
+    if people.shape[-1] > 2:
+        visible = people[..., 2] > 0
+    else:
+        visible = np.ones(people.shape[:2], dtype=bool)
+
+    point_color = color if point_color is None else point_color
+    if rgb:
+        color, point_color = tuple(color[::-1]), tuple(point_color[::-1])
+
+    if len(edges) and thickness > 0:
+        keep = visible[:, edges].all(axis=2)  # (N, E): оба конца ребра видимы
+        segments = xy[:, edges][keep]  # (M, 2, 2)
+        if len(segments):
+            cv2.polylines(image, segments, False, color, thickness)
+    if radius > 0:
+        dots = np.repeat(xy[visible][:, None, :], 2, axis=1)  # (M, 2, 2)
+        if len(dots):
+            cv2.polylines(image, dots, False, point_color, radius * 2)
+
+
+class OverlayRenderer:
+    """
+    Отрисовка результатов всех моделей.
+    Модели с атрибутом skeleton (массив рёбер (E, 2)) рисуются векторно через draw_keypoints
+    с параметрами skeleton_style; остальные — собственным draw_skeleton
+    (он рисует цветами BGR, поэтому RGB-буфер на время отрисовки переводится в BGR).
+    Координаты точек умножаются на scale, поэтому рисовать можно и в кадр источника,
+    и сразу в буфер отображения меньшего размера.
+    """
+
+    def __init__(self, profiler=None):
+        self.profiler = profiler
+
+    def render(self, image, results, scale=1.0, rgb=False):
+        for model_name, model, points in results:
+            if points is None:
+                continue
+            start = time.perf_counter()
+            edges = getattr(model, "skeleton", None)
+            if edges is not None:
+                draw_keypoints(image, points, edges, scale=scale, rgb=rgb,
+                               **getattr(model, "skeleton_style", {}))
+            else:
+                self._draw_fallback(image, model, scale_points(points, 1.0 / scale), rgb)
+            if self.profiler is not None:
+                self.profiler.record(f"draw:{model_name}", start)
+
+    @staticmethod
+    def _draw_fallback(image, model, points, rgb):
+        if not rgb:
+            model.draw_skeleton(image, points)
+            return
+        bgr = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        model.draw_skeleton(bgr, points)
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=image)
+
+
+class OverlayLayer:
+    """
+    Оверлей отдельным слоем: отрисованный слой переиспользуется, пока не изменились
+    результаты (те же массивы точек — перенесённые на кадры без инференса, из кэша,
+    пустые) и размер изображения; иначе слой перерисовывается. Слой накладывается
+    на изображение по маске ненулевых пикселей (чисто чёрные линии не поддерживаются).
+    """
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self._key = None
+        self._results = None
+        self._layer = None
+        self._mask = None
+
+    def composite(self, image, results, scale=1.0, rgb=False):
+        if not any(points is not None and np.size(points) for _, _, points in results):
+            return
+        key = (tuple(id(points) for _, _, points in results), image.shape, scale, rgb)
+        if key != self._key:
+            if self._layer is None or self._layer.shape != image.shape:
+                self._layer = np.empty_like(image)
+            self._layer.fill(0)
+            self.renderer.render(self._layer, results, scale, rgb)
+            self._mask = self._layer.any(axis=2)
+            self._key = key
+            self._results = results  # ссылки на массивы: их id не будут переиспользованы
+        np.copyto(image, self._layer, where=self._mask[..., None])
+
+    def reset(self):
+        self._key = self._results = None
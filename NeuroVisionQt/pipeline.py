@@ -0,0 +1,462 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from NeuroVisionQt.scheduler import DeadlineScheduler, AdaptiveStride
+from NeuroVisionQt.tracking import TemporalLayer
+from NeuroVisionQt.seek import SeekPlanner
+
+
+# Политики переполнения очереди
+DROP_OLDEST = "drop_oldest"  # выбрасываем самый старый кадр (минимальная задержка)
+DROP_NEWEST = "drop_newest"  # выбрасываем новый кадр (очередь не меняется)
+BLOCK = "block"  # производитель ждёт освобождения места
+
+END_OF_STREAM = object()  # Маркер конца видео, проходит через все стадии
+
+# Ожидание кадра живого источника, с: между попытками проверяются остановка, пауза и перемотка
+LIVE_READ_TIMEOUT = 0.2
+
+
+class FramePacket:
+    """Кадр, передаваемый между стадиями конвейера"""
+    __slots__ = ("index", "total", "generation", "frame", "results", "track_ids", "decoded_at")
+
+    def __init__(self, index, total, generation, frame):
+        self.index = index  # номер кадра в видео, с 0
+        self.total = total
+        self.generation = generation
+        self.frame = frame
+        self.results = []  # [(имя модели, модель, точки)] после стадии инференса
+        self.track_ids = {}  # имя модели -> ID людей по строкам точек (при сопровождении)
+        self.decoded_at = time.perf_counter()
+
+
+class FrameQueue:
+    """
+    Ограниченная кольцевая очередь между стадиями конвейера.
+    Поведение при переполнении задаётся политикой: DROP_OLDEST, DROP_NEWEST или BLOCK.
+    """
+
+    def __init__(self, maxsize=2, policy=DROP_OLDEST):
+        if policy not in (DROP_OLDEST, DROP_NEWEST, BLOCK):
+            raise ValueError(f"Неизвестная политика очереди: {policy}")
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self.dropped = 0
+        self._items = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item, timeout=None, force=False):
+        """
+        Кладёт элемент в очередь. Возвращает False, если элемент был отброшен.
+        force=True вытесняет старый элемент и при DROP_NEWEST (для служебных маркеров);
+        при BLOCK маркер, как и кадры, ждёт свободного места, чтобы кадры не терялись.
+        """
+        with self._cond:
+            if self._closed:
+                return False
+            if len(self._items) >= self.maxsize:
+                if self.policy == DROP_OLDEST or (force and self.policy == DROP_NEWEST):
+                    self._items.popleft()
+                    self.dropped += 1
+                elif self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                else:
+                    deadline = None if timeout is None else time.monotonic() + timeout
+                    while len(self._items) >= self.maxsize and not self._closed:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            return False
+                        self._cond.wait(remaining)
+                    if self._closed:
+                        return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Извлекает элемент из очереди. Возвращает None по таймауту или после закрытия."""
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._items and not self._closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        with self._cond:
+            self._items.clear()
+            self._closed = False
+            self.dropped = 0
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class StageStats:
+    """Счётчики пропускной способности одной стадии конвейера"""
+
+    def __init__(self, name, window=2.0):
+        self.name = name
+        self.window = window
+        self.processed = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.busy_ms = 0.0
+        self._ticks = deque()
+        self._lock = threading.Lock()
+
+    def tick(self, busy_ms=0.0):
+        now = time.monotonic()
+        with self._lock:
+            self.processed += 1
+            self.busy_ms = busy_ms
+            self._ticks.append(now)
+            while self._ticks and now - self._ticks[0] > self.window:
+                self._ticks.popleft()
+
+    def drop(self, count=1):
+        with self._lock:
+            self.dropped += count
+
+    def skip(self, count=1):
+        with self._lock:
+            self.skipped += count
+
+    @property
+    def fps(self):
+        with self._lock:
+            if len(self._ticks) < 2:
+                return 0.0
+            span = self._ticks[-1] - self._ticks[0]
+            return (len(self._ticks) - 1) / span if span > 0 else 0.0
+
+    def snapshot(self):
+        return {
+            "stage": self.name,
+            "fps": round(self.fps, 2),
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "skipped": self.skipped,
+            "busy_ms": round(self.busy_ms, 2),
+        }
+
+    def reset(self):
+        with self._lock:
+            self.processed = 0
+            self.dropped = 0
+            self.skipped = 0
+            self.busy_ms = 0.0
+            self._ticks.clear()
+
+
+def collect_batch(queue, size, timeout_ms, poll=0.05):
+    """
+    Собирает до size элементов из очереди, ожидая не дольше timeout_ms после первого.
+    Порядок элементов сохраняется; END_OF_STREAM всегда завершает пакет.
+    """
+    first = queue.get(timeout=poll)
+    if first is None:
+        return []
+    batch = [first]
+    deadline = time.monotonic() + timeout_ms / 1000.0
+    while len(batch) < size and batch[-1] is not END_OF_STREAM:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        item = queue.get(timeout=remaining)
+        if item is None:
+            break
+        batch.append(item)
+    return batch
+
+
+def stage_error(*stages):
+    """Первое исключение, остановившее одну из стадий (None, если стадии работали без ошибок)"""
+    for stage in stages:
+        if stage is not None and stage.error is not None:
+            return stage.error
+    return None
+
+
+class DecoderStage(threading.Thread):
+    """
+    Стадия декодирования: читает кадры из owner.cap по расписанию DeadlineScheduler
+    (base_delay / speed) и складывает их в выходную очередь. При отставании от
+    настенных часов лишние кадры пропускаются через grab() без декодирования.
+    Также применяет запросы перемотки от owner.take_seek_target(): кадры берутся из
+    owner.frame_cache, а позиция декодера меняется через SeekPlanner с учётом owner.keyframes.
+    На паузе SeekPlanner читает несколько кадров в направлении последней перемотки.
+    """
+
+    def __init__(self, owner, out_queue, stats):
+        super().__init__(name="decoder", daemon=True)
+        self.owner = owner
+        self.out_queue = out_queue
+        self.stats = stats
+        self.generation = 0
+        self.scheduler = DeadlineScheduler()
+        self.error = None  # исключение, остановившее стадию
+        self._stop_event = threading.Event()
+        self._downstream = [out_queue]
+
+    def add_downstream(self, queue):
+        """Очереди, которые нужно сбрасывать при перемотке"""
+        self._downstream.append(queue)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def running(self):
+        return self.owner.is_running and not self._stop_event.is_set()
+
+    def run(self):
+        try:
+            self._decode()
+        except Exception as exc:
+            self.error = exc
+            self.out_queue.put(END_OF_STREAM, timeout=1.0, force=True)
+
+    def _decode(self):
+        cap = self.owner.cap
+        live = getattr(cap, "is_live", False)  # LiveCapture: без темпа, кэша и перемотки
+        frame_cache = self.owner.frame_cache
+        use_cache = frame_cache.enabled and not live
+        planner = SeekPlanner(self.owner.keyframes, frame_cache)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))  # фактическая позиция cap
+        next_index = position  # индекс следующего кадра для показа
+        user_seek = False  # позиция меняется по запросу пользователя, а не из-за отставания
+        read_ahead = False  # упреждающее чтение на текущей паузе уже выполнено
+        while self.running():
+            # Запросы перемотки схлопываются: берётся только последний
+            target = self.owner.take_seek_target()
+            if target >= 0:
+                planner.note_seek(next_index, target)
+                next_index = target
+                user_seek = True
+                self.generation += 1
+                for queue in self._downstream:
+                    queue.clear()
+                self.scheduler.reset()
+                continue
+
+            if self.owner.is_paused:
+                self.scheduler.reset()
+                if use_cache and not read_ahead:
+                    position = planner.read_ahead(cap, position, next_index)
+                    read_ahead = True
+                time.sleep(0.05)
+                continue
+            read_ahead = False
+
+            if self.owner.paced and not live:
+                # Пакетный и headless режимы декодируют без темпа источника,
+                # живой источник задаёт темп сам
+                next_index = self._keep_pace(next_index)
+
+            start = time.perf_counter()
+            # Кадры из кэша копируются, только если модели рисуют прямо в кадр
+            annotated = not self.owner.overlay_on_display
+            frame = frame_cache.get(next_index) if use_cache else None
+            if frame is not None:
+                if annotated:
+                    frame = frame.copy()
+            else:
+                if position != next_index and not live:
+                    position = planner.reposition(cap, position, next_index, user_seek)
+                ret, frame = cap.read(timeout=LIVE_READ_TIMEOUT) if live else cap.read()
+                if not ret:
+                    if live and cap.isOpened():
+                        continue  # источник молчит (камера отключена, поток недоступен)
+                    if self.owner.loop_video and not live:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        position = next_index = 0
+                        self.scheduler.reset()
+                        continue
+                    self.out_queue.put(END_OF_STREAM, force=True)
+                    break
+                position += 1
+                if use_cache:
+                    frame_cache.put(next_index, frame.copy() if annotated else frame)
+            user_seek = False
+            index = next_index
+            next_index += 1
+            self.owner.profiler.record("decode", start)
+
+            packet = FramePacket(index, total, self.generation, frame)
+            if live:
+                packet.decoded_at = cap.frame_timestamp  # отсчёт задержки от момента захвата
+            while not self.out_queue.put(packet, timeout=0.5):
+                if self.out_queue.policy != BLOCK or not self.running():
+                    self.stats.drop()
+                    break
+            self.stats.tick((time.perf_counter() - start) * 1000)
+
+    def _keep_pace(self, next_index):
+        """
+        Ждёт срока следующего кадра или, если мы отстали от настенных часов,
+        пропускает кадры (дальше они проматываются grab() без retrieve()).
+        Возвращает новый индекс следующего кадра.
+        """
+        self.scheduler.set_rate(self.owner.base_delay / 1000.0, self.owner.speed, next_index)
+        wait = self.scheduler.wait_time(next_index)
+        if wait > 0:
+            time.sleep(wait)
+            return next_index
+
+        skipped = self.scheduler.frames_behind(next_index)
+        if skipped:
+            self.stats.skip(skipped)
+        return next_index + skipped
+
+
+class InferenceStage(threading.Thread):
+    """
+    Стадия инференса: прогоняет активные модели owner.active_models через owner.executor.
+    Модели запускаются на каждом k-м кадре (AdaptiveStride подбирает k по их задержке),
+    на остальных кадрах рисуются экстраполированные результаты (TemporalLayer).
+    owner.model_stride задаёт минимальный шаг — отношение частоты кадров к частоте моделей,
+    owner.temporal_smoothing включает сглаживание точек и сопровождение людей.
+    При owner.batch_size > 1 собирает пакет кадров (не больше batch_size или
+    ожидание до batch_timeout_ms) и выполняет пакетный инференс с сохранением порядка.
+    При owner.overlay_on_display результаты не рисуются в кадр: их рисует отображение.
+    """
+
+    def __init__(self, owner, decoder, in_queue, out_queue, stats):
+        super().__init__(name="inference", daemon=True)
+        self.owner = owner
+        self.decoder = decoder
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.stats = stats
+        self.stride = AdaptiveStride()
+        self.carry = TemporalLayer()
+        self.error = None  # исключение, остановившее стадию
+        self._generation = decoder.generation
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def running(self):
+        return self.owner.is_running and not self._stop_event.is_set()
+
+    def run(self):
+        try:
+            self._infer()
+        except Exception as exc:
+            # Без этого поток умер бы молча, а декодер вечно ждал бы места в блокирующей очереди:
+            # декодер останавливается, потребитель получает END_OF_STREAM и проверяет stage_error
+            self.error = exc
+            self.decoder.stop()
+            self.in_queue.close()
+            self.out_queue.put(END_OF_STREAM, timeout=1.0, force=True)
+
+    def _infer(self):
+        while self.running():
+            if self.owner.batch_size > 1:
+                self._run_batch()
+                continue
+
+            packet = self.in_queue.get(timeout=0.05)
+            if packet is None:
+                continue
+            if packet is END_OF_STREAM:
+                self.out_queue.put(packet, force=True)
+                continue
+            if packet.generation != self.decoder.generation:
+                continue  # кадр устарел после перемотки
+
+            start = time.perf_counter()
+            self._process(packet)
+
+            while not self.out_queue.put(packet, timeout=0.5):
+                if self.out_queue.policy != BLOCK or not self.running():
+                    self.stats.drop()
+                    break
+            self.stats.tick((time.perf_counter() - start) * 1000)
+
+    def _process(self, packet):
+        executor = self.owner.executor
+        models = self.owner.active_models
+        if packet.generation != self._generation:
+            self._generation = packet.generation
+            self.stride.reset()
+            self.carry.reset()
+
+        self.carry.set_enabled(self.owner.temporal_smoothing)
+        self.carry.frame_period = self.owner.base_delay / 1000.0
+        self.stride.min_stride = max(1, int(self.owner.model_stride))
+        use_stride = self.owner.adaptive_stride or self.stride.min_stride > 1
+
+        frame_key = (self.owner.video_key, packet.index) if self.owner.video_key else None
+        results, cached = executor.cached_results(models, frame_key)
+        predicted = False
+        if results is None and use_stride and not self.stride.should_infer(packet.index):
+            results = self.carry.predict(packet.index, models)
+            predicted = results is not None
+            if predicted:
+                self.stats.skip()
+        if results is None:
+            start = time.perf_counter()
+            results = executor.infer(packet.frame, models, frame_key, cached=cached)
+            self.stride.observe(time.perf_counter() - start)
+            if self.owner.adaptive_stride:
+                self.stride.update(self.owner.base_delay / 1000.0 / max(self.owner.speed, 1e-3))
+            else:
+                self.stride.stride = self.stride.min_stride
+        if not predicted:
+            # Сглаженные результаты не попадают в кэш: executor кэширует исходные
+            results = self.carry.update(packet.index, results)
+        if not self.owner.overlay_on_display:
+            executor.draw(packet.frame, results)
+        packet.results = results
+        if self.carry.enabled:
+            packet.track_ids = {name: self.carry.ids(name) for name, _, _ in results}
+
+    def _run_batch(self):
+        batch = collect_batch(self.in_queue, self.owner.batch_size, self.owner.batch_timeout_ms)
+        end_of_stream = bool(batch) and batch[-1] is END_OF_STREAM
+        packets = [p for p in batch
+                   if p is not END_OF_STREAM and p.generation == self.decoder.generation]
+
+        if packets:
+            start = time.perf_counter()
+            executor = self.owner.executor
+            run_batch = executor.infer_batch if self.owner.overlay_on_display else executor.process_batch
+            video_key = self.owner.video_key
+            frame_keys = [(video_key, p.index) for p in packets] if video_key else None
+            batch_results = run_batch([p.frame for p in packets], self.owner.active_models, frame_keys)
+            busy_ms = (time.perf_counter() - start) * 1000 / len(packets)
+            for packet, results in zip(packets, batch_results):
+                packet.results = results
+                while not self.out_queue.put(packet, timeout=0.5):
+                    if not self.running():
+                        return
+                self.stats.tick(busy_ms)
+
+        if end_of_stream:
+            self.out_queue.put(END_OF_STREAM, force=True)
@@ -1,13 +1,22 @@
-from NeuroVisionQt.mediapipeModel.mediapipeModel import *
-from NeuroVisionQt.yolo.yolo_7 import *
-
-
-plugin = {
-    "YOLOv7": Yolo7(),
-    "YOLOv7_2": Yolo7(),
-    "YOLOv7_3": Yolo7(),
-    "YOLOv7_4": Yolo7(),
-    "YOLOv7_5": Yolo7(),
-    "MediaPipe": MediaPipePose()
-}
+from NeuroVisionQt.registry import ModelRegistry
+
+
+# Модели создаются лениво при первой активации; записи с одинаковыми
+# параметрами используют один общий экземпляр (одни веса).
+# Фабрики заданы строками «модуль:класс»: torch, torchvision и mediapipe импортируются
+# только при создании модели, а отсутствие фреймворка выключает лишь его модели.
+YOLO7 = "NeuroVisionQt.yolo.yolo_7:Yolo7"
+MEDIAPIPE_POSE = "NeuroVisionQt.mediapipeModel.mediapipeModel:MediaPipePose"
+
+plugin = ModelRegistry(idle_timeout=300)
+plugin.register("YOLOv7", YOLO7)
+plugin.register("YOLOv7_2", YOLO7)
+plugin.register("YOLOv7_3", YOLO7)
+plugin.register("YOLOv7_4", YOLO7)
+plugin.register("YOLOv7_5", YOLO7)
+# Граф Mediapipe хранит состояние между кадрами и не потокобезопасен (shared=False):
+# у каждого владельца (окна, потока мультиоконного режима) свой экземпляр
+plugin.register("MediaPipe", MEDIAPIPE_POSE, shared=False)
+# Поза только на обрезках вокруг найденных и отслеживаемых людей
+plugin.register("MediaPipe ROI", "NeuroVisionQt.roi:RoiPoseModel", shared=False, detect_every=5)
 
@@ -0,0 +1,166 @@
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyWindow:
+    """Скользящее окно последних измерений задержки (мс) с перцентилями"""
+
+    def __init__(self, size=300):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+
+    def percentiles(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {f"p{p}": 0.0 for p in PERCENTILES}
+        last = len(ordered) - 1
+        return {f"p{p}": ordered[min(last, int(round(p / 100 * last)))] for p in PERCENTILES}
+
+    def summary(self):
+        result = {"count": self.count}
+        result["mean"] = sum(self.samples) / len(self.samples) if self.samples else 0.0
+        result.update(self.percentiles())
+        return result
+
+
+class Profiler:
+    """
+    Инструментирование конвейера: задержки по стадиям и моделям
+    (decode, model:<имя>, draw:<имя>, convert, paint).
+    Хранит скользящие окна для p50/p95/p99 и, при trace=True, события для Chrome trace.
+    """
+
+    def __init__(self, window=300, trace=True, max_events=200000):
+        self.window = window
+        self.trace = trace
+        self.enabled = True
+        self._windows = {}
+        self._events = deque(maxlen=max_events)
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, stage, start, end=None):
+        """Регистрирует интервал [start, end] в секундах perf_counter()"""
+        if not self.enabled:
+            return
+        end = time.perf_counter() if end is None else end
+        ms = (end - start) * 1000
+        with self._lock:
+            window = self._windows.get(stage)
+            if window is None:
+                window = self._windows[stage] = LatencyWindow(self.window)
+            window.add(ms)
+            if self.trace:
+                self._events.append((stage, start, end, threading.get_ident()))
+
+    @contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, start)
+
+    def reset(self):
+        with self._lock:
+            self._windows.clear()
+            self._events.clear()
+            self._origin = time.perf_counter()
+
+    def summary(self):
+        """{стадия: {count, mean, p50, p95, p99}} в миллисекундах"""
+        with self._lock:
+            return {stage: window.summary() for stage, window in sorted(self._windows.items())}
+
+    def hud_lines(self):
+        """Короткие строки для оверлея поверх видео"""
+        lines = []
+        for stage, stats in self.summary().items():
+            lines.append(f"{stage:<18} p50 {stats['p50']:6.1f}  p95 {stats['p95']:6.1f}  p99 {stats['p99']:6.1f} ms")
+        return lines
+
+    def export(self, path):
+        """Формат по расширению: .csv — таблица, .trace.json — Chrome trace, .json — сводка"""
+        if path.endswith(".csv"):
+            self.export_csv(path)
+        elif path.endswith(".trace.json"):
+            self.export_chrome_trace(path)
+        else:
+            self.export_json(path)
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def export_csv(self, path):
+        fields = ["stage", "count", "mean"] + [f"p{p}" for p in PERCENTILES]
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for stage, stats in self.summary().items():
+                writer.writerow({"stage": stage, **{k: round(v, 3) for k, v in stats.items()}})
+
+    def export_chrome_trace(self, path):
+        """События в формате chrome://tracing / Perfetto (микросекунды)"""
+        with self._lock:
+            events = list(self._events)
+            origin = self._origin
+        trace = [{
+            "name": stage,
+            "cat": stage.split(":", 1)[0],
+            "ph": "X",
+            "ts": (start - origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": tid,
+        } for stage, start, end, tid in events]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+
+def import_profile(module="NeuroVisionQt.main", top=25):
+    """
+    Время импорта модуля и всех его зависимостей (python -X importtime в отдельном процессе,
+    чтобы уже загруженные модули не искажали результат).
+    :return: [(модуль, собственное время мс, время с зависимостями мс)] по убыванию второго
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Профиль времени импорта при запуске приложения")
+    parser.add_argument("module", nargs="?", default="NeuroVisionQt.main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args(argv)
+    print(f"{'модуль':<50} {'своё, мс':>10} {'всего, мс':>10}")
+    for name, self_ms, cumulative_ms in import_profile(args.module, args.top):
+        print(f"{name:<50} {self_ms:10.1f} {cumulative_ms:10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
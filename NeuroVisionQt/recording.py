@@ -0,0 +1,221 @@
+"""
+Компактный столбцовый формат ключевых точек (.nvk) и чтение через memory-map.
+
+Структура файла:
+    заголовок  MAGIC (4 байта) + версия (uint32)
+    чанки      столбцы frame_idx, model, person, keypoint, x, y, conf подряд
+               (person — ID человека из сопровождения или номер строки результата),
+               каждый выровнен по 8 байт; внутри чанка строки отсортированы по кадру,
+               один кадр никогда не разбивается между чанками; если номер кадра
+               уменьшается (цикл видео, перемотка назад), начинается новый чанк
+    индекс     JSON: имена моделей и (смещение, строки, первый/последний кадр) каждого чанка
+    хвост      смещение индекса (uint64) + MAGIC
+"""
+import json
+import struct
+import threading
+
+import numpy as np
+
+
+MAGIC = b"NVKP"
+VERSION = 1
+ALIGN = 8
+
+COLUMNS = (
+    ("frame_idx", np.uint32),
+    ("model", np.uint16),
+    ("person", np.uint16),
+    ("keypoint", np.uint16),
+    ("x", np.float32),
+    ("y", np.float32),
+    ("conf", np.float32),
+)
+
+
+def _padding(size):
+    return (-size) % ALIGN
+
+
+class KeypointWriter:
+    """
+    Потоковая запись (frame_idx, model, person, keypoint, x, y, conf) чанками.
+    add() потокобезопасен; после close() вызовы add() игнорируются.
+    """
+
+    def __init__(self, path, chunk_rows=1 << 16):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.models = []
+        self._model_ids = {}
+        self._chunks = []
+        self._pending = []  # список массивов-строк (N, 7) текущего чанка
+        self._pending_rows = 0
+        self._last_frame = None
+        self._lock = threading.Lock()
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + struct.pack("<I", VERSION))
+        self._file.write(b"\0" * _padding(self._file.tell()))
+
+    def _model_id(self, model_name):
+        model_id = self._model_ids.get(model_name)
+        if model_id is None:
+            model_id = len(self.models)
+            self.models.append(model_name)
+            self._model_ids[model_name] = model_id
+        return model_id
+
+    def add(self, frame_idx, model_name, points, person_ids=None):
+        """
+        Добавляет точки модели на кадре: массив (N, K, 3) или (K, 3).
+        person_ids — устойчивые ID людей (по строкам массива) из сопровождения;
+        без них в столбец person пишется номер строки.
+        """
+        with self._lock:
+            if self._file is None or points is None:
+                return
+            points = np.asarray(points, dtype=np.float32)
+            if points.size == 0:
+                return
+            points = points.reshape(-1, points.shape[-2], points.shape[-1])
+            people, keypoints = points.shape[:2]
+
+            if self._last_frame is not None and frame_idx < self._last_frame:
+                self._flush()  # кадры пошли назад: чанк должен остаться отсортированным
+            elif frame_idx != self._last_frame and self._pending_rows >= self.chunk_rows:
+                self._flush()
+            self._last_frame = frame_idx
+
+            rows = np.empty((people * keypoints, len(COLUMNS)), dtype=np.float64)
+            rows[:, 0] = frame_idx
+            rows[:, 1] = self._model_id(model_name)
+            if person_ids is None or len(person_ids) != people:
+                person_ids = np.arange(people)
+            # Столбец uint16: ID длинной сессии сворачиваются по модулю 65536
+            rows[:, 2] = np.repeat(np.asarray(person_ids, dtype=np.int64) % 65536, keypoints)
+            rows[:, 3] = np.tile(np.arange(keypoints), people)
+            rows[:, 4:7] = points[..., :3].reshape(-1, 3)
+            self._pending.append(rows)
+            self._pending_rows += len(rows)
+
+    def add_results(self, frame_idx, results, track_ids=None):
+        """
+        Записывает результаты стадии инференса [(имя, модель, точки)];
+        track_ids — {имя модели: ID людей} (FramePacket.track_ids).
+        """
+        track_ids = track_ids or {}
+        for model_name, _, points in results:
+            self.add(frame_idx, model_name, points, track_ids.get(model_name))
+
+    def _flush(self):
+        if not self._pending:
+            return
+        rows = np.concatenate(self._pending)
+        offset = self._file.tell()
+        for i, (_, dtype) in enumerate(COLUMNS):
+            column = rows[:, i].astype(dtype)
+            self._file.write(column.tobytes())
+            self._file.write(b"\0" * _padding(column.nbytes))
+        self._chunks.append({
+            "offset": offset,
+            "rows": len(rows),
+            "first_frame": int(rows[0, 0]),
+            "last_frame": int(rows[-1, 0]),
+        })
+        self._pending = []
+        self._pending_rows = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._flush()
+            index_offset = self._file.tell()
+            index = {"models": self.models, "chunks": self._chunks,
+                     "columns": [name for name, _ in COLUMNS]}
+            self._file.write(json.dumps(index).encode("utf-8"))
+            self._file.write(struct.pack("<Q", index_offset) + MAGIC)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class KeypointReader:
+    """
+    Чтение .nvk через memory-map: столбцы возвращаются как представления NumPy
+    без разбора данных. Диапазон внутри одного чанка не копируется;
+    диапазон, захватывающий несколько чанков, склеивается.
+    Если кадры записывались повторно (цикл, перемотка), строки всех проходов
+    возвращаются в порядке записи.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._data[:4]) != MAGIC or bytes(self._data[-4:]) != MAGIC:
+            raise ValueError(f"Файл не в формате .nvk: {path}")
+        index_offset = struct.unpack("<Q", bytes(self._data[-12:-4]))[0]
+        index = json.loads(bytes(self._data[index_offset:-12]).decode("utf-8"))
+        self.models = index["models"]
+        self._chunks = index["chunks"]
+        self._columns = [self._chunk_columns(chunk) for chunk in self._chunks]
+
+    def _chunk_columns(self, chunk):
+        columns = {}
+        offset = chunk["offset"]
+        rows = chunk["rows"]
+        for name, dtype in COLUMNS:
+            nbytes = rows * np.dtype(dtype).itemsize
+            columns[name] = self._data[offset:offset + nbytes].view(dtype)
+            offset += nbytes + _padding(nbytes)
+        return columns
+
+    @property
+    def frame_range(self):
+        if not self._chunks:
+            return 0, 0
+        return (min(chunk["first_frame"] for chunk in self._chunks),
+                max(chunk["last_frame"] for chunk in self._chunks) + 1)
+
+    def frames(self, start, stop):
+        """Столбцы для кадров start <= frame_idx < stop: {имя столбца: массив}"""
+        parts = []
+        for chunk, columns in zip(self._chunks, self._columns):
+            if chunk["last_frame"] < start or chunk["first_frame"] >= stop:
+                continue
+            frame_column = columns["frame_idx"]
+            lo = np.searchsorted(frame_column, start, side="left")
+            hi = np.searchsorted(frame_column, stop, side="left")
+            parts.append({name: column[lo:hi] for name, column in columns.items()})
+
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+        return {name: np.concatenate([part[name] for part in parts]) for name, _ in COLUMNS}
+
+    def people(self, frame_idx, model_name):
+        """ID людей (по возрастанию) и их точки на кадре: (массив (N,), массив (N, K, 3))"""
+        columns = self.frames(frame_idx, frame_idx + 1)
+        empty = np.zeros(0, dtype=np.uint16), np.zeros((0, 0, 3), dtype=np.float32)
+        if model_name not in self.models:
+            return empty
+        mask = columns["model"] == self.models.index(model_name)
+        if not mask.any():
+            return empty
+        ids, person = np.unique(columns["person"][mask], return_inverse=True)
+        keypoint = columns["keypoint"][mask]
+        result = np.zeros((len(ids), int(keypoint.max()) + 1, 3), dtype=np.float32)
+        result[person, keypoint, 0] = columns["x"][mask]
+        result[person, keypoint, 1] = columns["y"][mask]
+        result[person, keypoint, 2] = columns["conf"][mask]
+        return ids, result
+
+    def keypoints(self, frame_idx, model_name):
+        """Точки модели на кадре в виде массива (N, K, 3), люди в порядке ID"""
+        return self.people(frame_idx, model_name)[1]
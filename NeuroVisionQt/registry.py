@@ -0,0 +1,205 @@
+import importlib
+import threading
+import time
+
+
+class ModelSpec:
+    """
+    Описание модели в реестре: фабрика и параметры её создания.
+    shared=False — модель с состоянием между кадрами (трекинг, граф Mediapipe) или
+    не потокобезопасная: каждый владелец получает собственный экземпляр.
+    Фабрика — вызываемый объект или строка «модуль:атрибут»; строка импортируется только
+    при первом обращении (resolve), поэтому тяжёлые фреймворки не загружаются при старте.
+    """
+
+    def __init__(self, name, factory, config, shared=True):
+        self.name = name
+        self._factory = factory
+        self.config = config
+        self.shared = shared
+
+    @property
+    def factory_name(self):
+        if isinstance(self._factory, str):
+            return self._factory.replace(":", ".")
+        return f"{self._factory.__module__}.{getattr(self._factory, '__qualname__', repr(self._factory))}"
+
+    @property
+    def config_key(self):
+        """Ключ для совместного использования весов: одинаковая фабрика и параметры"""
+        return self.factory_name, tuple(sorted((k, repr(v)) for k, v in self.config.items()))
+
+    def resolve(self):
+        """Импортирует фабрику, заданную строкой; ImportError — если нет зависимости модели"""
+        if isinstance(self._factory, str):
+            module_name, _, attribute = self._factory.partition(":")
+            self._factory = getattr(importlib.import_module(module_name), attribute)
+        return self._factory
+
+    @property
+    def factory(self):
+        return self.resolve()
+
+    def build(self):
+        return self.resolve()(**self.config)
+
+
+def distinct_models(models):
+    """
+    {имя: модель} без повторов: экземпляр, включённый под несколькими именами
+    (записи с одинаковыми параметрами), остаётся только под первым именем,
+    чтобы его точки не рисовались и не записывались несколько раз.
+    """
+    unique, seen = {}, set()
+    for name, model in models.items():
+        if model is None:
+            continue
+        key = getattr(model, "config_key", None) or id(model)
+        if key not in seen:
+            seen.add(key)
+            unique[name] = model
+    return unique
+
+
+class ModelRegistry:
+    """
+    Реестр плагинов. Хранит фабрики моделей вместо готовых экземпляров:
+    - модель создаётся при первой активации (acquire),
+    - записи с одинаковой фабрикой и параметрами используют один экземпляр,
+      кроме записей с shared=False: у них свой экземпляр на каждого владельца (owner),
+    - экземпляры, не используемые дольше idle_timeout секунд, выгружаются (unload_idle).
+    Ошибки создания (например, не установлен необязательный фреймворк) запоминаются
+    по записи и доступны через error(name).
+    """
+
+    def __init__(self, idle_timeout=300):
+        self.idle_timeout = idle_timeout
+        self._specs = {}
+        self._instances = {}  # ключ экземпляра -> экземпляр модели
+        self._users = {}  # ключ экземпляра -> множество активных (владелец, имя)
+        self._idle_since = {}  # ключ экземпляра -> время освобождения
+        self._errors = {}  # имя -> текст последней ошибки создания
+        self._building = {}  # ключ экземпляра -> блокировка создания модели
+        self._lock = threading.RLock()
+
+    def register(self, name, factory, shared=True, **config):
+        self._specs[name] = ModelSpec(name, factory, config, shared)
+        return self
+
+    def keys(self):
+        return self._specs.keys()
+
+    def __iter__(self):
+        return iter(self._specs)
+
+    def __contains__(self, name):
+        return name in self._specs
+
+    def __len__(self):
+        return len(self._specs)
+
+    def spec(self, name):
+        return self._specs[name]
+
+    def _key(self, name, owner):
+        """Ключ экземпляра: общий для одинаковых параметров или собственный для владельца"""
+        spec = self._specs[name]
+        return spec.config_key if spec.shared else (spec.config_key, id(owner))
+
+    def get(self, name, owner=None):
+        """
+        Возвращает экземпляр модели, создавая его при необходимости (без активации).
+        Модель создаётся вне общей блокировки: пока фоновый поток загружает одну модель,
+        другие потоки получают уже загруженные без ожидания.
+        """
+        spec = self._specs[name]
+        key = self._key(name, owner)
+        with self._lock:
+            model = self._instances.get(key)
+            if model is not None:
+                return model
+            building = self._building.setdefault(key, threading.Lock())
+        with building:  # одну модель создаёт только один поток
+            with self._lock:
+                model = self._instances.get(key)
+                if model is not None:
+                    return model
+            try:
+                model = spec.build()
+            except Exception as exc:
+                with self._lock:
+                    self._errors[name] = f"{type(exc).__name__}: {exc}"
+                raise
+            model.config_key = repr(spec.config_key)  # используется как часть ключа кэша результатов
+            model.model_spec = spec  # по нему процессы-воркеры создают свою копию модели
+            with self._lock:
+                self._errors.pop(name, None)
+                self._instances[key] = model
+                self._idle_since.setdefault(key, time.monotonic())
+                self._building.pop(key, None)
+            return model
+
+    __getitem__ = get
+
+    def acquire(self, name, owner=None):
+        """
+        Активирует модель по имени и возвращает её экземпляр.
+        owner различает окна и потоки, использующие одну запись (повторный acquire идемпотентен);
+        для записей с shared=False у каждого owner свой экземпляр.
+        """
+        key = self._key(name, owner)
+        while True:
+            model = self.get(name, owner)
+            with self._lock:
+                if self._instances.get(key) is model:  # не выгружена между get и активацией
+                    self._users.setdefault(key, set()).add((id(owner), name))
+                    self._idle_since.pop(key, None)
+                    return model
+
+    def release(self, name, owner=None):
+        """Снимает активацию; модель остаётся в памяти до unload_idle"""
+        key = self._key(name, owner)
+        user = (id(owner), name)
+        with self._lock:
+            users = self._users.get(key)
+            if not users or user not in users:
+                return
+            users.discard(user)
+            if not users and key in self._instances:
+                self._idle_since[key] = time.monotonic()
+
+    def is_loaded(self, name, owner=None):
+        return self._key(name, owner) in self._instances
+
+    def check(self, name):
+        """Импортирует фабрику записи без создания модели. Возвращает текст ошибки или None"""
+        try:
+            self._specs[name].resolve()  # импорт — вне блокировки, как и создание модели
+        except Exception as exc:
+            message = f"{type(exc).__name__}: {exc}"
+            with self._lock:
+                self._errors[name] = message
+            return message
+        return None
+
+    def error(self, name):
+        with self._lock:
+            return self._errors.get(name)
+
+    def unload_idle(self, now=None):
+        """Выгружает экземпляры без активных пользователей дольше idle_timeout. Возвращает их число"""
+        now = time.monotonic() if now is None else now
+        unloaded = 0
+        with self._lock:
+            for key, since in list(self._idle_since.items()):
+                if self._users.get(key):
+                    continue
+                if now - since >= self.idle_timeout:
+                    model = self._instances.pop(key, None)
+                    self._idle_since.pop(key, None)
+                    if model is not None:
+                        close = getattr(model, "close", None)
+                        if callable(close):
+                            close()
+                        unloaded += 1
+        return unloaded
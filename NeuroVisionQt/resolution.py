@@ -0,0 +1,57 @@
+import cv2
+import numpy as np
+
+
+# Варианты разрешения инференса: подпись -> высота кадра (None — исходное разрешение)
+INFERENCE_RESOLUTIONS = {
+    "Исходное": None,
+    "1080p": 1080,
+    "720p": 720,
+    "480p": 480,
+    "360p": 360,
+}
+
+
+class ProxyFrames:
+    """
+    Уменьшенные копии одного кадра для инференса: по одной на каждую целевую высоту,
+    общие для всех моделей, которым нужен этот размер. Кадр меньше цели не увеличивается.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._copies = {}
+
+    def get(self, height):
+        """(изображение, масштаб) для целевой высоты; масштаб = размер копии / размер кадра"""
+        h, w = self.frame.shape[:2]
+        if height is None or height >= h:
+            return self.frame, 1.0
+        proxy = self._copies.get(height)
+        if proxy is None:
+            scale = height / h
+            image = cv2.resize(self.frame, (max(1, int(round(w * scale))), height),
+                               interpolation=cv2.INTER_AREA)
+            proxy = self._copies[height] = (image, scale)
+        return proxy
+
+
+def scale_points(points, scale):
+    """
+    Переводит точки (..., 2+) из координат уменьшенной копии в координаты кадра.
+    Возвращает новый массив: результаты моделей могут быть общими (кэш, константы).
+    Списки и тензоры приводятся к массиву; None и пустые результаты возвращаются без изменений.
+    TypeError — результат модели не является массивом точек и не может быть масштабирован.
+    """
+    if scale == 1.0 or points is None:
+        return points
+    try:
+        array = np.array(points, dtype=np.float32)  # всегда копия
+    except (TypeError, ValueError) as exc:
+        raise TypeError(f"Результат модели не является массивом точек: {type(points).__name__}") from exc
+    if array.size == 0:
+        return points
+    if array.ndim < 2 or array.shape[-1] < 2:
+        raise TypeError(f"Точки модели должны иметь форму (..., 2+), получено {array.shape}")
+    array[..., :2] /= scale
+    return array
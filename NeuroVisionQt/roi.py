@@ -0,0 +1,187 @@
+import cv2
+import numpy as np
+
+from NeuroVisionQt.mediapipeModel.mediapipeModel import MediaPipePose, NO_KEYPOINTS
+
+
+def iou_matrix(a, b):
+    """Попарный IoU рамок (N, 4) и (M, 4) в формате x1, y1, x2, y2"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+class Track:
+    __slots__ = ("track_id", "box", "velocity", "misses", "detected", "frames")
+
+    def __init__(self, track_id, box):
+        self.track_id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)  # смещение рамки за один кадр
+        self.misses = 0
+        self.detected = self.box  # рамка последней детекции
+        self.frames = 0  # кадров после последней детекции
+
+
+class BoxTracker:
+    """
+    Трекинг рамок людей между детекциями: жадное сопоставление по IoU
+    и постоянная скорость для кадров без детекции.
+    Каждый кадр — один вызов update (кадр с детекцией) или predict (кадр без неё);
+    скорость — смещение за кадр: разница детекций делится на число кадров между ними.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_misses=3):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.tracks = []
+        self._next_id = 0
+
+    def predict(self):
+        for track in self.tracks:
+            track.box = track.box + track.velocity
+            track.frames += 1
+
+    def update(self, detections):
+        detections = np.asarray(detections, dtype=np.float32).reshape(-1, 4)
+        boxes = np.array([t.box for t in self.tracks], dtype=np.float32).reshape(-1, 4)
+        iou = iou_matrix(boxes, detections)
+
+        matched_tracks, matched_dets = set(), set()
+        for flat in np.argsort(-iou, axis=None):
+            t, d = np.unravel_index(flat, iou.shape)
+            if iou[t, d] < self.iou_threshold:
+                break
+            if t in matched_tracks or d in matched_dets:
+                continue
+            track = self.tracks[t]
+            track.velocity = (detections[d] - track.detected) / (track.frames + 1)
+            track.box = track.detected = detections[d]
+            track.frames = 0
+            track.misses = 0
+            matched_tracks.add(t)
+            matched_dets.add(d)
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+                track.box = track.box + track.velocity
+                track.frames += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        for d, box in enumerate(detections):
+            if d not in matched_dets:
+                self.tracks.append(Track(self._next_id, box))
+                self._next_id += 1
+
+    def refine(self, track, box):
+        """
+        Уточнение рамки по найденным ключевым точкам. Скорость не меняется: она оценивается
+        только по детекциям, рамки точек и детектора различаются по размеру.
+        """
+        track.box = np.asarray(box, dtype=np.float32)
+
+
+class HogPersonDetector:
+    """Детектор людей OpenCV (HOG + SVM) на уменьшенном кадре — не требует дополнительных весов"""
+
+    def __init__(self, detect_width=640):
+        self.detect_width = detect_width
+        self.hog = cv2.HOGDescriptor()
+        self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+
+    def __call__(self, frame):
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.detect_width / w)
+        small = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA) \
+            if scale < 1.0 else frame
+        rects, _ = self.hog.detectMultiScale(small, winStride=(8, 8), padding=(8, 8), scale=1.05)
+        if len(rects) == 0:
+            return np.zeros((0, 4), dtype=np.float32)
+        rects = np.asarray(rects, dtype=np.float32)
+        rects[:, 2:] += rects[:, :2]  # x, y, w, h -> x1, y1, x2, y2
+        return rects / scale
+
+
+class RoiPoseModel:
+    """
+    Поза только в областях людей:
+    - люди ищутся детектором на уменьшенном кадре раз в detect_every кадров,
+    - между детекциями рамки ведёт BoxTracker (и уточняет их по найденным точкам),
+    - модель позы запускается на расширенных обрезках, уменьшенных до crop_size,
+    - точки переводятся в координаты кадра через scale_coords (та же логика, что для letterbox).
+    """
+
+    def __init__(self, detect_every=5, padding=0.25, crop_size=384, max_people=6, detector=None):
+        self.detect_every = detect_every
+        self.padding = padding
+        self.crop_size = crop_size
+        self.max_people = max_people
+        self.detector = detector or HogPersonDetector()
+        self.pose = MediaPipePose(static_image_mode=True)  # обрезки разных людей независимы
+        self.tracker = BoxTracker()
+        self._frame_count = 0
+
+    def close(self):
+        self.pose.close()
+
+    def _crop(self, frame, box):
+        """Расширенная обрезка и (ratio, pad) для обратного преобразования координат"""
+        h, w = frame.shape[:2]
+        x1, y1, x2, y2 = box
+        pad_x, pad_y = (x2 - x1) * self.padding, (y2 - y1) * self.padding
+        x1, y1 = int(max(0, x1 - pad_x)), int(max(0, y1 - pad_y))
+        x2, y2 = int(min(w, x2 + pad_x)), int(min(h, y2 + pad_y))
+        if x2 - x1 < 16 or y2 - y1 < 16:
+            return None, None
+        crop = frame[y1:y2, x1:x2]
+        scale = min(1.0, self.crop_size / max(x2 - x1, y2 - y1))
+        if scale < 1.0:
+            crop = cv2.resize(crop, (int((x2 - x1) * scale), int((y2 - y1) * scale)),
+                              interpolation=cv2.INTER_AREA)
+        # (x_crop - pad) / ratio = x_crop / scale + x1
+        return crop, ((scale, scale), (-x1 * scale, -y1 * scale))
+
+    def process_frame(self, frame):
+        if self._frame_count % self.detect_every == 0 or not self.tracker.tracks:
+            self.tracker.update(self.detector(frame))
+        else:
+            self.tracker.predict()
+        self._frame_count += 1
+
+        people = []
+        for track in self.tracker.tracks[:self.max_people]:
+            crop, transform = self._crop(frame, track.box)
+            if crop is None:
+                continue
+            keypoints = self.pose.process_frame(crop)
+            if len(keypoints) == 0:
+                continue
+            ratio, pad = transform
+            keypoints = self.pose.scale_coords(keypoints, ratio, pad, frame.shape[:2])
+            visible = keypoints[0, keypoints[0, :, 2] > 0.5, :2]
+            if len(visible) >= 4:
+                self.tracker.refine(track, np.concatenate([visible.min(axis=0), visible.max(axis=0)]))
+            people.append(keypoints)
+
+        if not people:
+            return NO_KEYPOINTS
+        return np.concatenate(people)
+
+    @property
+    def skeleton(self):
+        return self.pose.skeleton
+
+    @property
+    def skeleton_style(self):
+        return self.pose.skeleton_style
+
+    def draw_skeleton(self, frame, landmarks, flag=False):
+        self.pose.draw_skeleton(frame, landmarks, flag)
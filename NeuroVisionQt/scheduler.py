@@ -0,0 +1,146 @@
+import math
+import time
+
+import numpy as np
+
+
+class DeadlineScheduler:
+    """
+    Расписание кадров по настенным часам: кадр i должен быть показан
+    в момент anchor_time + (i - anchor_index) * interval / speed.
+    Позволяет узнать, сколько ждать до следующего кадра или на сколько кадров мы отстали.
+    """
+
+    def __init__(self, max_skip=60):
+        self.max_skip = max_skip  # больше этого не догоняем, а переносим якорь
+        self.interval = 1 / 30
+        self.speed = 1.0
+        self._anchor_time = None
+        self._anchor_index = 0
+
+    def reset(self):
+        """Сброс якоря (пауза, перемотка, зацикливание)"""
+        self._anchor_time = None
+
+    def set_rate(self, interval, speed, next_index):
+        """Длительность кадра источника (с) и скорость; при изменении якорь переносится"""
+        speed = max(speed, 1e-3)
+        if interval != self.interval or speed != self.speed:
+            self.interval = interval
+            self.speed = speed
+            self.reset()
+        if self._anchor_time is None:
+            self._anchor_time = time.perf_counter()
+            self._anchor_index = next_index
+
+    def deadline(self, index):
+        return self._anchor_time + (index - self._anchor_index) * self.interval / self.speed
+
+    def wait_time(self, index):
+        """Сколько секунд осталось до срока кадра index (отрицательно — опаздываем)"""
+        return self.deadline(index) - time.perf_counter()
+
+    def frames_behind(self, index):
+        """
+        На сколько кадров мы отстали от настенных часов.
+        Если отставание больше max_skip, якорь переносится и возвращается 0.
+        """
+        late = -self.wait_time(index)
+        if late <= 0:
+            return 0
+        behind = int(late * self.speed / self.interval)
+        if behind > self.max_skip:
+            self._anchor_time = time.perf_counter()
+            self._anchor_index = index
+            return 0
+        return behind
+
+
+class AdaptiveStride:
+    """
+    Выбор шага инференса k: модели запускаются на каждом k-м кадре,
+    k подбирается по измеренной задержке моделей и текущей длительности кадра.
+    """
+
+    def __init__(self, max_stride=8, smoothing=0.2, min_stride=1):
+        self.max_stride = max_stride
+        self.min_stride = min_stride  # заданное отношение частоты кадров к частоте моделей
+        self.smoothing = smoothing
+        self.latency = 0.0  # скользящее среднее задержки моделей, с
+        self.stride = 1
+        self._last_index = None
+
+    def reset(self):
+        self._last_index = None
+
+    def observe(self, latency):
+        if self.latency == 0.0:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+
+    def update(self, frame_interval):
+        """frame_interval — сколько секунд отводится на кадр с учётом скорости"""
+        if frame_interval <= 0:
+            self.stride = self.min_stride
+        else:
+            self.stride = min(self.max_stride,
+                              max(self.min_stride, math.ceil(self.latency / frame_interval)))
+        return self.stride
+
+    def should_infer(self, index):
+        if self._last_index is None or index - self._last_index >= self.stride or index < self._last_index:
+            self._last_index = index
+            return True
+        return False
+
+
+class ResultCarry:
+    """
+    Результаты моделей для кадров без инференса: последние детекции переносятся вперёд,
+    а если у модели есть предыдущий результат той же формы — экстраполируются линейно по времени.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._last = None  # (индекс, результаты)
+        self._prev = None
+
+    def update(self, index, results):
+        """Запоминает результаты кадра index и возвращает их (наследники могут их изменить)"""
+        self._prev = self._last
+        self._last = (index, results)
+        return results
+
+    def predict(self, index, models):
+        """Результаты для кадра index или None, если набор моделей изменился"""
+        if self._last is None:
+            return None
+        last_index, last_results = self._last
+        if [name for name, _, _ in last_results] != list(models.keys()):
+            return None
+        if self._prev is None or self._prev[0] >= last_index:
+            return last_results
+
+        prev_index, prev_results = self._prev
+        t = (index - last_index) / (last_index - prev_index)
+        # Предыдущие результаты сопоставляются по имени модели: набор моделей мог измениться
+        prev_points = {name: points for name, _, points in prev_results}
+        predicted = []
+        for name, model, points in last_results:
+            if name in prev_points:
+                points = self._extrapolate(points, prev_points[name], t)
+            predicted.append((name, model, points))
+        return predicted
+
+    @staticmethod
+    def _extrapolate(points, prev_points, t):
+        if not isinstance(points, np.ndarray) or not isinstance(prev_points, np.ndarray):
+            return points
+        if points.shape != prev_points.shape or points.size == 0:
+            return points
+        result = points.copy()
+        result[..., :2] += (points[..., :2] - prev_points[..., :2]) * t
+        return result
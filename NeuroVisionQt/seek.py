@@ -0,0 +1,184 @@
+import bisect
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+
+import cv2
+
+
+class KeyframeIndex:
+    """
+    Индекс ключевых кадров видео (номера кадров в порядке показа).
+    Строится через ffprobe по списку пакетов без декодирования; если ffprobe
+    недоступен, индекс остаётся пустым и перемотка работает как раньше.
+    """
+
+    def __init__(self, keyframes=None):
+        self.keyframes = sorted(keyframes or [])
+
+    @property
+    def available(self):
+        return bool(self.keyframes)
+
+    def floor(self, index):
+        """Ближайший ключевой кадр не позже index (None, если индекс не построен)"""
+        keyframes = self.keyframes
+        if not keyframes:
+            return None
+        pos = bisect.bisect_right(keyframes, index) - 1
+        return keyframes[max(pos, 0)]
+
+    @classmethod
+    def probe(cls, path, timeout=60):
+        ffprobe = shutil.which("ffprobe")
+        if ffprobe is None:
+            return cls()
+        cmd = [ffprobe, "-v", "error", "-select_streams", "v:0",
+               "-show_entries", "packet=pts,flags", "-of", "csv=p=0", path]
+        try:
+            output = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout).stdout
+        except (OSError, subprocess.SubprocessError):
+            return cls()
+
+        packets = []
+        for line in output.splitlines():
+            pts, _, flags = line.partition(",")
+            if pts.strip().lstrip("-").isdigit():
+                packets.append((int(pts), "K" in flags))
+        packets.sort()  # порядок декодирования -> порядок показа
+        return cls([i for i, (_, key) in enumerate(packets) if key])
+
+    @classmethod
+    def probe_async(cls, path):
+        """Возвращает пустой индекс сразу и заполняет его в фоновом потоке"""
+        index = cls()
+
+        def build():
+            index.keyframes = cls.probe(path).keyframes
+
+        threading.Thread(target=build, name="keyframe-index", daemon=True).start()
+        return index
+
+
+class FrameCache:
+    """LRU декодированных (неразмеченных) кадров вокруг позиции воспроизведения с бюджетом в байтах"""
+
+    def __init__(self, memory_budget=256 << 20):
+        self.memory_budget = memory_budget
+        self._frames = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.memory_budget > 0
+
+    def get(self, index):
+        with self._lock:
+            frame = self._frames.get(index)
+            if frame is not None:
+                self._frames.move_to_end(index)
+            return frame
+
+    def __contains__(self, index):
+        with self._lock:
+            return index in self._frames
+
+    def put(self, index, frame):
+        if frame.nbytes > self.memory_budget:
+            return
+        with self._lock:
+            old = self._frames.pop(index, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            self._frames[index] = frame
+            self._nbytes += frame.nbytes
+            while self._nbytes > self.memory_budget:
+                _, evicted = self._frames.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._nbytes = 0
+
+
+class SeekPlanner:
+    """
+    Перемещение позиции декодера к нужному кадру с учётом ключевых кадров:
+    - если цель немного впереди и между ними нет ключевого кадра, декодируем вперёд
+      от текущей позиции, не сбрасывая декодер;
+    - иначе встаём на ближайший ключевой кадр и декодируем до цели.
+    Промежуточные кадры только проматываются grab(). Декодируются и сохраняются в FrameCache
+    лишь кадры упреждающего чтения в направлении последней перемотки пользователя:
+    при перемотке назад — prefetch кадров перед целью, на паузе — prefetch кадров
+    вперёд или назад от позиции (read_ahead).
+    """
+
+    def __init__(self, keyframes, frame_cache, max_forward=120, prefetch=8):
+        self.keyframes = keyframes
+        self.frame_cache = frame_cache
+        self.max_forward = max_forward
+        self.prefetch = prefetch
+        self.direction = 1  # направление последней перемотки пользователя: 1 — вперёд, -1 — назад
+
+    def note_seek(self, current, target):
+        """Запоминает направление перемотки пользователя с кадра current на target"""
+        if target != current:
+            self.direction = 1 if target > current else -1
+
+    def reposition(self, cap, position, target, user_seek=False):
+        """
+        position — текущая позиция cap (индекс следующего кадра). Возвращает новую позицию.
+        user_seek=False (догоняющий пропуск кадров) — кадры только проматываются, без декодирования.
+        """
+        if position == target:
+            return target
+        prefetch = self.prefetch if user_seek and self.direction < 0 else 0
+        keyframe = self.keyframes.floor(target)
+        forward = 0 <= target - position <= self.max_forward
+        if forward and (keyframe is None or keyframe <= position):
+            return self._walk(cap, position, target, prefetch)
+        if keyframe is None:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            return target
+        cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+        return self._walk(cap, keyframe, target, prefetch)
+
+    def read_ahead(self, cap, position, index):
+        """
+        Упреждающее чтение, пока воспроизведение стоит на паузе на кадре index:
+        после перемотки вперёд кэшируются кадры [index, index + prefetch),
+        после перемотки назад — [index - prefetch, index). Возвращает новую позицию cap.
+        """
+        if not self.frame_cache.enabled or self.prefetch <= 0:
+            return position
+        if self.direction > 0:
+            end = index + self.prefetch
+            if not index <= position < end:
+                return position  # кадры между index и позицией cap не прочитаны
+            return self._walk(cap, position, end, end - position)
+
+        start = max(0, index - self.prefetch)
+        if all(i in self.frame_cache for i in range(start, index)):
+            return position
+        keyframe = self.keyframes.floor(start)
+        if keyframe is None or index - keyframe > self.max_forward + self.prefetch:
+            return position  # без индекса или при длинной группе кадров чтение слишком дорого
+        cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+        return self._walk(cap, keyframe, index, index - start)
+
+    def _walk(self, cap, position, target, prefetch=0):
+        """Проматывает кадры [position, target); последние prefetch декодирует в кэш"""
+        while position < target:
+            if position >= target - prefetch and self.frame_cache.enabled \
+                    and position not in self.frame_cache:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self.frame_cache.put(position, frame)
+            elif not cap.grab():
+                break
+            position += 1
+        return position
@@ -0,0 +1,152 @@
+import os
+import stat
+import threading
+import time
+
+import cv2
+
+
+def parse_source(text):
+    """
+    Описание источника -> аргумент для cv2.VideoCapture и признак живого источника.
+    «0», «1»… — номер камеры; rtsp://, rtmp://, http(s)://, udp:// — сетевой поток;
+    именованный канал (FIFO) — живой поток; остальное — файл.
+    """
+    text = text.strip()
+    if text.isdigit():
+        return int(text), True
+    if "://" in text:
+        return text, True
+    try:
+        if stat.S_ISFIFO(os.stat(text).st_mode):
+            return text, True
+    except OSError:
+        pass
+    return text, False
+
+
+class LiveCapture:
+    """
+    Живой источник с интерфейсом cv2.VideoCapture (read, grab, retrieve, get, set, isOpened, release).
+    Отдельный поток захвата постоянно читает источник и хранит только самый свежий кадр,
+    поэтому устаревшие кадры из буфера не накапливают задержку. При обрыве соединения
+    источник переоткрывается с экспоненциальной задержкой от reconnect_min до reconnect_max секунд.
+    """
+    is_live = True
+
+    def __init__(self, source, reconnect_min=0.5, reconnect_max=10.0, api_preference=cv2.CAP_ANY):
+        self.source = source
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.api_preference = api_preference
+        self.fps = 0.0
+        self.frame_timestamp = 0.0  # perf_counter() момента захвата последнего выданного кадра
+        self.reconnects = 0
+        self._cap = None
+        self._frame = None
+        self._frame_time = 0.0
+        self._seq = 0
+        self._delivered = 0
+        self._released = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._capture_loop, name="live-capture", daemon=True)
+        self._thread.start()
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.source, self.api_preference)
+        if cap.isOpened():
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # минимальный буфер драйвера/бэкенда
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+            return cap
+        cap.release()
+        return None
+
+    def _capture_loop(self):
+        backoff = self.reconnect_min
+        while not self._released:
+            if self._cap is None:
+                self._cap = self._open()
+                if self._cap is None:
+                    self._sleep(backoff)
+                    backoff = min(backoff * 2, self.reconnect_max)
+                    continue
+
+            ret, frame = self._cap.read()
+            if not ret:
+                # Источник может открываться, но не отдавать кадры: задержка растёт
+                # и здесь, иначе переподключение крутится без пауз
+                self._cap.release()
+                self._cap = None
+                self.reconnects += 1
+                self._sleep(backoff)
+                backoff = min(backoff * 2, self.reconnect_max)
+                continue
+            backoff = self.reconnect_min  # связь восстановлена только после полученного кадра
+            with self._cond:
+                self._frame = frame  # предыдущий непрочитанный кадр просто заменяется
+                self._frame_time = time.perf_counter()
+                self._seq += 1
+                self._cond.notify_all()
+
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def _sleep(self, seconds):
+        """Пауза перед переподключением; release() прерывает её"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._released, timeout=seconds)
+
+    def read(self, timeout=None):
+        """Ждёт кадр новее последнего выданного. (False, None) только после release()"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._seq == self._delivered and not self._released:
+                remaining = 0.5 if deadline is None else deadline - time.monotonic()
+                if remaining <= 0:
+                    return False, None
+                self._cond.wait(min(remaining, 0.5))
+            if self._released:
+                return False, None
+            self._delivered = self._seq
+            self.frame_timestamp = self._frame_time
+            return True, self._frame
+
+    def grab(self):
+        # Пропускать нечего: поток захвата всегда держит только свежий кадр
+        return not self._released
+
+    def retrieve(self):
+        with self._cond:
+            if self._frame is None:
+                return False, None
+            self._delivered = self._seq
+            self.frame_timestamp = self._frame_time
+            return True, self._frame
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return 0  # длина живого источника неизвестна
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self._delivered
+        frame = self._frame
+        if frame is not None and prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return frame.shape[1]
+        if frame is not None and prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return frame.shape[0]
+        return 0
+
+    def set(self, prop, value):
+        return False  # перемотка живого источника невозможна
+
+    def isOpened(self):
+        return not self._released
+
+    def release(self):
+        with self._cond:
+            self._released = True
+            self._cond.notify_all()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
@@ -0,0 +1,202 @@
+import math
+
+import numpy as np
+
+from NeuroVisionQt.scheduler import ResultCarry
+
+
+class OneEuroFilter:
+    """
+    One-Euro фильтр (Casiez и др., 2012) для массива координат.
+    Частота среза растёт со скоростью движения: медленные точки сглаживаются сильно
+    (нет дрожания), быстрые — слабо (нет запаздывания). Хранит оценку скорости,
+    которая используется для экстраполяции.
+    """
+
+    def __init__(self, value, min_cutoff=1.0, beta=0.02, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.value = np.array(value, dtype=np.float32)
+        self.derivative = np.zeros_like(self.value)
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, value, dt, mask=None):
+        """Новое измерение через dt секунд; точки вне mask (невидимые) сохраняют прежнее значение"""
+        value = np.asarray(value, dtype=np.float32)
+        if mask is not None:
+            value = np.where(mask[..., None], value, self.value)
+        derivative = (value - self.value) / dt
+        self.derivative += self._alpha(self.d_cutoff, dt) * (derivative - self.derivative)
+        cutoff = self.min_cutoff + self.beta * np.abs(self.derivative)
+        self.value += self._alpha(cutoff, dt) * (value - self.value)
+        return self.value
+
+
+class PoseTrack:
+    __slots__ = ("track_id", "filter", "visibility", "time", "misses")
+
+    def __init__(self, track_id, points, t, filter_params):
+        self.track_id = track_id
+        self.filter = OneEuroFilter(points[:, :2], **filter_params)
+        self.visibility = points[:, 2].copy() if points.shape[1] > 2 else None
+        self.time = t
+        self.misses = 0
+
+    def points(self, xy=None):
+        xy = self.filter.value if xy is None else xy
+        if self.visibility is None:
+            return xy.copy()
+        return np.concatenate([xy, self.visibility[:, None]], axis=1)
+
+    def center(self):
+        return self.filter.value.mean(axis=0)
+
+    def size(self):
+        xy = self.filter.value
+        return float(np.linalg.norm(xy.max(axis=0) - xy.min(axis=0)))
+
+
+class PoseTracker:
+    """
+    Люди одной модели между кадрами: устойчивые ID (жадное сопоставление по расстоянию
+    между центрами скелетов относительно их размера), One-Euro фильтр на каждую точку
+    и экстраполяция по оценённой скорости для кадров без инференса.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.02, match_ratio=0.5, max_misses=5,
+                 max_extrapolation=0.5, visibility_threshold=0.3):
+        self.filter_params = {"min_cutoff": min_cutoff, "beta": beta}
+        self.match_ratio = match_ratio
+        self.max_misses = max_misses
+        self.max_extrapolation = max_extrapolation  # дальше, с, точки не экстраполируются
+        self.visibility_threshold = visibility_threshold
+        self.tracks = []
+        self.ids = []  # ID людей последнего результата, в порядке строк массива
+        self._next_id = 0
+
+    def update(self, people, t):
+        """people (N, K, 2+) -> сглаженные точки (N, K, 2+) в том же порядке"""
+        people = np.asarray(people, dtype=np.float32)
+        centers = people[..., :2].mean(axis=1) if len(people) else np.zeros((0, 2), np.float32)
+
+        assigned = [None] * len(people)
+        if self.tracks and len(people):
+            track_centers = np.array([track.center() for track in self.tracks])
+            distance = np.linalg.norm(track_centers[:, None] - centers[None], axis=2)
+            limit = np.array([max(track.size(), 1.0) * self.match_ratio for track in self.tracks])
+            used = set()
+            for flat in np.argsort(distance, axis=None):
+                i, j = np.unravel_index(flat, distance.shape)
+                if distance[i, j] > limit[i]:
+                    continue
+                if i in used or assigned[j] is not None:
+                    continue
+                used.add(i)
+                assigned[j] = self.tracks[i]
+
+        smoothed = np.empty_like(people)
+        rows = []
+        for j, person in enumerate(people):
+            track = assigned[j]
+            if track is None or t <= track.time:
+                track = PoseTrack(self._next_id, person, t, self.filter_params)
+                self._next_id += 1
+                self.tracks.append(track)
+            else:
+                mask = person[:, 2] > self.visibility_threshold if person.shape[1] > 2 else None
+                track.filter(person[:, :2], t - track.time, mask)
+                if track.visibility is not None:
+                    track.visibility = person[:, 2].copy()
+                track.time = t
+                track.misses = 0
+            rows.append(track)
+            smoothed[j] = track.points()
+
+        for track in self.tracks:
+            if all(track is not row for row in rows):
+                track.misses += 1
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+        self.ids = [track.track_id for track in rows]
+        return smoothed
+
+    def predict(self, t, shape):
+        """Экстраполированные точки сопровождаемых людей на момент t"""
+        live = [track for track in self.tracks if track.misses == 0]
+        if not live:
+            return np.zeros((0,) + tuple(shape[1:]), dtype=np.float32)
+        predicted = []
+        for track in live:
+            dt = min(max(t - track.time, 0.0), self.max_extrapolation)
+            predicted.append(track.points(track.filter.value + track.filter.derivative * dt))
+        self.ids = [track.track_id for track in live]
+        return np.stack(predicted).astype(np.float32)
+
+
+class TemporalLayer(ResultCarry):
+    """
+    Временной слой результатов моделей (расширение ResultCarry):
+    - update сглаживает точки каждой модели (PoseTracker) и возвращает сглаженные результаты;
+    - predict заполняет кадры без инференса (AdaptiveStride, model_stride) экстраполяцией трекера.
+    Результаты, не являющиеся массивами (N, K, 2+), переносятся как в ResultCarry.
+    С enabled=False ведёт себя как ResultCarry.
+    """
+
+    def __init__(self, frame_period=1 / 30, **tracker_params):
+        self.frame_period = frame_period
+        self.tracker_params = tracker_params
+        self.enabled = True
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.trackers = {}
+
+    def set_enabled(self, enabled):
+        if enabled != self.enabled:
+            self.enabled = enabled
+            self.reset()
+
+    @staticmethod
+    def _is_pose(points):
+        return isinstance(points, np.ndarray) and points.ndim == 3 and points.shape[-1] >= 2
+
+    def update(self, index, results):
+        if not self.enabled:
+            return super().update(index, results)
+        t = index * self.frame_period
+        smoothed = []
+        for name, model, points in results:
+            if self._is_pose(points):
+                tracker = self.trackers.get(name)
+                if tracker is None:
+                    tracker = self.trackers[name] = PoseTracker(**self.tracker_params)
+                points = tracker.update(points, t)
+            smoothed.append((name, model, points))
+        return super().update(index, smoothed)
+
+    def predict(self, index, models):
+        if not self.enabled:
+            return super().predict(index, models)
+        if self._last is None:
+            return None
+        last_index, last_results = self._last
+        if [name for name, _, _ in last_results] != list(models.keys()):
+            return None
+        t = index * self.frame_period
+        predicted = []
+        for name, model, points in last_results:
+            tracker = self.trackers.get(name)
+            if tracker is not None and self._is_pose(points):
+                points = tracker.predict(t, points.shape)
+            predicted.append((name, model, points))
+        return predicted
+
+    def ids(self, model_name):
+        """ID людей в последнем результате модели (порядок строк массива точек)"""
+        tracker = self.trackers.get(model_name) if self.enabled else None
+        return list(tracker.ids) if tracker is not None else []
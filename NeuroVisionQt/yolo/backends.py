@@ -0,0 +1,316 @@
+"""
+Бэкенды CPU-инференса YOLO: eager, TorchScript, INT8 (динамическая и статическая
+квантизация) и ONNX Runtime.
+
+Экспорт и прогрев кэшируются на диске: имя файла содержит хэш весов, бэкенд и размер входа,
+поэтому повторный запуск с теми же весами загружает готовую модель.
+compare_backends сравнивает точки каждого бэкенда с eager, а select_backend выбирает
+самый быстрый бэкенд в пределах допуска по ошибке точек.
+
+Пример:
+    python -m NeuroVisionQt.yolo.backends yolov7-w6-pose.pt --video clip.mp4 --tolerance 2.0
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+
+from NeuroVisionQt.yolo.batching import letterbox_batch
+
+
+BACKENDS = ("eager", "torchscript", "int8-dynamic", "int8-static", "onnx")
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "neurovision", "yolo")
+
+
+def weights_hash(path, chunk_size=1 << 20):
+    """SHA-256 файла весов (первые 16 символов) — ключ кэша экспортированных моделей"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def load_weights(path):
+    """Чекпойнт YOLOv7 ({"model": ...}) -> модель float32 в режиме eval на CPU"""
+    checkpoint = torch.load(path, map_location="cpu")
+    model = checkpoint["model"] if isinstance(checkpoint, dict) else checkpoint
+    return model.float().eval()
+
+
+class _FirstOutput(torch.nn.Module):
+    """Оставляет только тензор предсказаний: YOLO в eval возвращает (pred, признаки)"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x):
+        out = self.model(x)
+        return out[0] if isinstance(out, (tuple, list)) else out
+
+
+class YoloBackend:
+    """
+    Прямой проход YOLO выбранным бэкендом: tensor(N, 3, H, W) -> pred(N, ...).
+    Экземпляр можно передавать как forward в batching.infer_batch.
+    Размер кадра фиксирован (H, W из input_shape): TorchScript и INT8 трассируются под него
+    с пакетом из одного кадра, поэтому пакет они обрабатывают по кадру (size-специфичные
+    view в голове Detect не переносят трассировку на другой размер пакета);
+    eager и ONNX (экспорт с динамическим размером пакета) получают пакет целиком.
+    """
+
+    def __init__(self, weights, backend="eager", input_shape=(1, 3, 640, 640), cache_dir=None,
+                 calibration=None, warmup=3, model=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Неизвестный бэкенд: {backend} (доступны: {', '.join(BACKENDS)})")
+        self.weights = weights
+        self.backend = backend
+        self.input_shape = tuple(input_shape)
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.calibration = calibration  # тензоры входа для статической квантизации
+        self._model = model
+        self._forward = None
+        self._session = None
+        self.traced = backend not in ("eager", "onnx")
+        self._build()
+        self.warmup(warmup)
+
+    def _eager(self):
+        if self._model is None:
+            self._model = load_weights(self.weights)
+        return _FirstOutput(self._model).eval()
+
+    def cache_path(self, extension):
+        _, _, h, w = self.input_shape
+        name = f"{weights_hash(self.weights)}-{self.backend}-{h}x{w}{extension}"
+        return os.path.join(self.cache_dir, name)
+
+    def _build(self):
+        if self.backend == "eager":
+            self._forward = self._eager()
+        elif self.backend == "onnx":
+            self._forward = self._build_onnx()
+        else:
+            self._forward = self._build_torchscript()
+
+    def _example(self):
+        return torch.zeros((1,) + self.input_shape[1:], dtype=torch.float32)
+
+    def _build_torchscript(self):
+        path = self.cache_path(".pt")
+        if os.path.exists(path):
+            return torch.jit.load(path, map_location="cpu")
+
+        module = self._eager()
+        if self.backend == "int8-dynamic":
+            # Динамическая квантизация затрагивает только Linear: у свёрточной YOLO выигрыш мал,
+            # бэкенд оставлен для сравнения с остальными
+            module = torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+        elif self.backend == "int8-static":
+            module = self._quantize_static(module)
+
+        with torch.no_grad():
+            traced = torch.jit.trace(module, self._example(), check_trace=False)
+            traced = torch.jit.optimize_for_inference(torch.jit.freeze(traced.eval()))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        torch.jit.save(traced, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        return traced
+
+    def _quantize_static(self, module):
+        """Статическая INT8-квантизация FX: калибровка на переданных кадрах (или нулях)"""
+        from torch.ao.quantization import get_default_qconfig_mapping
+        from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+        example = self._example()
+        try:
+            prepared = prepare_fx(module, get_default_qconfig_mapping("fbgemm"), (example,))
+            with torch.no_grad():
+                for tensor in self.calibration or [example]:
+                    for frame in torch.split(tensor, 1):
+                        prepared(frame)
+            return convert_fx(prepared)
+        except Exception as exc:
+            # Символьная трассировка FX не проходит через управляющую логику головы Detect
+            raise RuntimeError(f"Статическая INT8-квантизация не применима к модели: {exc}") from exc
+
+    def _build_onnx(self):
+        try:
+            import onnxruntime as ort
+        except ImportError as exc:
+            raise RuntimeError("Бэкенд onnx требует пакет onnxruntime") from exc
+
+        path = self.cache_path(".onnx")
+        if not os.path.exists(path):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with torch.no_grad():
+                torch.onnx.export(self._eager(), self._example(), path + ".tmp", opset_version=13,
+                                  input_names=["images"], output_names=["pred"],
+                                  dynamic_axes={"images": {0: "batch"}, "pred": {0: "batch"}})
+            os.replace(path + ".tmp", path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        optimized = path[:-len(".onnx")] + ".opt.onnx"
+        if os.path.exists(optimized):
+            path = optimized
+        else:
+            options.optimized_model_filepath = optimized  # оптимизированный граф — в кэш
+        self._session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        input_name = self._session.get_inputs()[0].name
+
+        def forward(x):
+            pred = self._session.run(None, {input_name: x.detach().cpu().numpy()})[0]
+            return torch.from_numpy(pred)
+        return forward
+
+    def warmup(self, iterations=3):
+        example = self._example()
+        for _ in range(iterations):
+            self(example)
+
+    def __call__(self, x):
+        with torch.no_grad():
+            if self.traced and x.shape[0] != 1:
+                return torch.cat([self._forward(frame) for frame in torch.split(x, 1)])
+            return self._forward(x)
+
+
+def _people(points):
+    points = np.asarray(points, dtype=np.float32)
+    if points.size == 0:
+        return np.zeros((0, 1, 2), dtype=np.float32)
+    return points.reshape(-1, points.shape[-2], points.shape[-1])
+
+
+def keypoint_error(reference, candidate):
+    """
+    Ошибка точек (пиксели) между результатами двух бэкендов на одном кадре.
+    Люди сопоставляются жадно по расстоянию между центрами; несопоставленные считаются пропущенными.
+    :param reference, candidate: массивы (N, K, 2+)
+    :return: (список ошибок по сопоставленным людям, число пропущенных)
+    """
+    reference, candidate = _people(reference), _people(candidate)
+    if len(reference) == 0 or len(candidate) == 0:
+        return [], abs(len(reference) - len(candidate))
+
+    centers_ref = reference[..., :2].mean(axis=1)
+    centers_new = candidate[..., :2].mean(axis=1)
+    distance = np.linalg.norm(centers_ref[:, None] - centers_new[None], axis=2)
+    errors, used = [], set()
+    for i in np.argsort(distance.min(axis=1)):
+        j = next((j for j in np.argsort(distance[i]) if j not in used), None)
+        if j is None:
+            break
+        used.add(j)
+        errors.append(float(np.linalg.norm(reference[i, :, :2] - candidate[j, :, :2], axis=1).mean()))
+    return errors, abs(len(reference) - len(candidate))
+
+
+def compare_backends(weights, frames, postprocess, backends=BACKENDS, img_size=640, stride=64,
+                     cache_dir=None):
+    """
+    Прогоняет кадры через каждый бэкенд и сравнивает точки с eager.
+    :param postprocess: функция (pred(1, ...), ratio, pad, frame) -> точки (N, K, 3)
+    :return: {бэкенд: {ms, fps, error_px, max_error_px, missing}} или {бэкенд: {error}}
+    """
+    # auto=False: вход фиксированного размера, под который трассируются TorchScript и INT8
+    inputs = [(letterbox_batch([frame], img_size, stride, auto=False), frame) for frame in frames]
+    shape = (1,) + tuple(inputs[0][0][0].shape[1:])
+
+    report, reference = {}, None
+    for backend in ("eager",) + tuple(b for b in backends if b != "eager"):
+        try:
+            runner = YoloBackend(weights, backend, input_shape=shape, cache_dir=cache_dir,
+                                 calibration=[t for (t, _), _ in inputs[:16]])
+        except Exception as exc:
+            # Бэкенд исключается из выбора (select_backend), но причина должна быть видна
+            print(f"бэкенд {backend} недоступен, пропущен: {exc}", file=sys.stderr)
+            report[backend] = {"error": str(exc)}
+            continue
+
+        points, elapsed = [], 0.0
+        for (tensor, transforms), frame in inputs:
+            start = time.perf_counter()
+            pred = runner(tensor)
+            elapsed += time.perf_counter() - start
+            ratio, pad = transforms[0]
+            points.append(postprocess(pred[:1], ratio, pad, frame))
+
+        entry = {"ms": elapsed * 1000 / len(frames), "fps": len(frames) / elapsed if elapsed else 0.0}
+        if reference is None:
+            reference = points
+            entry.update(error_px=0.0, max_error_px=0.0, missing=0)
+        else:
+            errors, missing = [], 0
+            for ref, new in zip(reference, points):
+                frame_errors, frame_missing = keypoint_error(ref, new)
+                errors.extend(frame_errors)
+                missing += frame_missing
+            entry.update(error_px=float(np.mean(errors)) if errors else 0.0,
+                         max_error_px=float(np.max(errors)) if errors else 0.0,
+                         missing=missing)
+        report[backend] = entry
+    return report
+
+
+def select_backend(report, tolerance_px=2.0, max_missing=0):
+    """Самый быстрый бэкенд, чья средняя ошибка точек не больше tolerance_px"""
+    candidates = [(entry["ms"], backend) for backend, entry in report.items()
+                  if "error" not in entry and entry["error_px"] <= tolerance_px
+                  and entry["missing"] <= max_missing]
+    return min(candidates)[1] if candidates else "eager"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение CPU-бэкендов YOLO с eager")
+    parser.add_argument("weights", help="чекпойнт YOLOv7-pose (.pt)")
+    parser.add_argument("--video", required=True, help="ролик для проверки точности и скорости")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--img-size", type=int, default=640)
+    parser.add_argument("--tolerance", type=float, default=2.0, help="допустимая ошибка точек, пиксели")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    import cv2
+    from NeuroVisionQt.mediapipeModel.mediapipeModel import MediaPipePose
+
+    args = parse_args(argv)
+    cap = cv2.VideoCapture(args.video)
+    frames = []
+    while len(frames) < args.frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        print(f"Не удалось прочитать кадры: {args.video}", file=sys.stderr)
+        return 1
+
+    helper = MediaPipePose.__new__(MediaPipePose)  # только постобработка YOLO, без графа Mediapipe
+
+    def postprocess(pred, ratio, pad, frame):
+        detections = helper.process_predictions(pred)
+        keypoints = MediaPipePose.decode_keypoints(detections).cpu().numpy().copy()
+        return helper.scale_coords(keypoints, ratio, pad, frame.shape[:2])
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    report = compare_backends(args.weights, frames, postprocess, backends, args.img_size,
+                              cache_dir=args.cache_dir)
+    print(json.dumps({"results": report, "selected": select_backend(report, args.tolerance)}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import numpy as np
+import torch
+
+from utils.datasets import letterbox
+
+
+def letterbox_batch(frames, img_size=640, stride=64, auto=True):
+    """
+    Letterbox для пакета кадров одинакового размера.
+    Параметры совпадают с покадровым режимом, поэтому каждый элемент пакета
+    идентичен тензору, который получил бы одиночный кадр.
+    :return: тензор (N, 3, H, W) float32 в диапазоне [0, 1] и список (ratio, pad) на кадр
+    """
+    images = []
+    transforms = []
+    for frame in frames:
+        image, ratio, pad = letterbox(frame, img_size, stride=stride, auto=auto)
+        images.append(image[:, :, ::-1].transpose(2, 0, 1))  # BGR -> RGB, HWC -> CHW
+        transforms.append((ratio, pad))
+    batch = np.ascontiguousarray(np.stack(images))
+    tensor = torch.from_numpy(batch).float().div_(255.0)
+    return tensor, transforms
+
+
+def group_by_shape(frames):
+    """Разбивает пакет на группы кадров одного размера: {shape: [индексы]} в порядке появления"""
+    groups = {}
+    for i, frame in enumerate(frames):
+        groups.setdefault(frame.shape, []).append(i)
+    return groups
+
+
+def infer_batch(frames, forward, postprocess, img_size=640, stride=64, device="cpu", auto=True):
+    """
+    Пакетный инференс YOLO: один прямой проход на группу кадров одного размера.
+    :param forward: функция tensor(N, 3, H, W) -> pred(N, ...), например lambda x: model(x)[0]
+    :param postprocess: функция (pred(1, ...), ratio, pad, frame) -> точки кадра;
+                        получает срез pred[i:i + 1], как при покадровой обработке,
+                        поэтому process_predictions можно использовать без изменений
+    :return: список результатов postprocess в исходном порядке кадров
+    """
+    results = [None] * len(frames)
+    for indices in group_by_shape(frames).values():
+        tensor, transforms = letterbox_batch([frames[i] for i in indices], img_size, stride, auto)
+        with torch.no_grad():
+            pred = forward(tensor.to(device))
+        for j, i in enumerate(indices):
+            ratio, pad = transforms[j]
+            results[i] = postprocess(pred[j:j + 1], ratio, pad, frames[i])
+    return results
@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+FRAME_COUNT = 12
+
+
+class PointModel:
+    """Модель-заглушка: одна точка на человека, координаты зависят от яркости кадра"""
+
+    skeleton = np.zeros((0, 2), dtype=np.int32)
+    skeleton_style = {"color": (0, 255, 0), "radius": 1}
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def process_frame(self, frame):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        value = float(frame[0, 0, 0])
+        return np.array([[[value, value, 1.0]]], dtype=np.float32)
+
+
+class FailingModel:
+    def process_frame(self, frame):
+        raise RuntimeError("сломанные веса")
+
+
+def write_video(path, count=FRAME_COUNT, size=(64, 48)):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, size)
+    for i in range(count):
+        writer.write(np.full((size[1], size[0], 3), i * 10, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    return write_video(str(tmp_path / "clip.avi"))
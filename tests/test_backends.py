@@ -0,0 +1,66 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+backends = pytest.importorskip("NeuroVisionQt.yolo.backends")
+
+
+class TinyDetector(torch.nn.Module):
+    """Свёрточная сеть с выходом как у YOLO в eval: (pred, признаки)"""
+
+    def __init__(self):
+        super().__init__()
+        torch.manual_seed(0)
+        self.conv = torch.nn.Conv2d(3, 4, 3, stride=2, padding=1)
+        self.head = torch.nn.Conv2d(4, 6, 1)
+
+    def forward(self, x):
+        features = torch.relu(self.conv(x))
+        pred = self.head(features).flatten(2).transpose(1, 2)  # (N, H*W, 6)
+        return pred, [features]
+
+
+@pytest.fixture
+def weights(tmp_path):
+    path = tmp_path / "tiny.pt"
+    path.write_bytes(b"tiny detector weights")  # хэш файла — ключ кэша экспорта
+    return str(path)
+
+
+def make(weights, backend, tmp_path, model):
+    return backends.YoloBackend(weights, backend, input_shape=(1, 3, 32, 32),
+                                cache_dir=str(tmp_path / "cache"), warmup=1, model=model)
+
+
+@pytest.mark.parametrize("backend", ["torchscript", "int8-dynamic", "int8-static", "onnx"])
+def test_backend_matches_eager(weights, tmp_path, backend):
+    if backend == "onnx":
+        pytest.importorskip("onnxruntime")
+    model = TinyDetector().eval()
+    batch = torch.rand(3, 3, 32, 32)
+    reference = make(weights, "eager", tmp_path, model)(batch)
+    try:
+        runner = make(weights, backend, tmp_path, model)
+    except RuntimeError:
+        if backend == "int8-static":
+            pytest.skip("статическая квантизация недоступна для этой сборки torch")
+        raise
+    # Пакет из трёх кадров, хотя TorchScript трассирован с одним кадром
+    pred = runner(batch)
+    assert pred.shape == reference.shape
+    tolerance = 0.1 if backend == "int8-static" else 1e-4
+    assert torch.allclose(pred, reference, atol=tolerance)
+
+
+def test_unknown_backend(weights):
+    with pytest.raises(ValueError):
+        backends.YoloBackend(weights, "tensorrt")
+
+
+def test_select_backend_prefers_fast_accurate():
+    report = {
+        "eager": {"ms": 10.0, "error_px": 0.0, "missing": 0},
+        "onnx": {"ms": 5.0, "error_px": 0.5, "missing": 0},
+        "int8-static": {"ms": 3.0, "error_px": 5.0, "missing": 0},
+        "torchscript": {"error": "недоступен"},
+    }
+    assert backends.select_backend(report, tolerance_px=2.0) == "onnx"
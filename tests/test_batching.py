@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+batching = pytest.importorskip("NeuroVisionQt.yolo.batching")  # требует utils из YOLOv7
+
+
+def frames():
+    rng = np.random.default_rng(0)
+    sizes = [(48, 64), (32, 32), (48, 64)]
+    return [rng.integers(0, 255, size + (3,), dtype=np.uint8) for size in sizes]
+
+
+def test_group_by_shape_keeps_order():
+    groups = batching.group_by_shape(frames())
+    assert list(groups.values()) == [[0, 2], [1]]
+
+
+def test_batch_matches_single_frames():
+    calls = []
+
+    def forward(tensor):
+        calls.append(tensor.shape[0])
+        return tensor.mean(dim=(2, 3))  # (N, 3)
+
+    def postprocess(pred, ratio, pad, frame):
+        return pred.clone(), ratio, pad
+
+    batch = batching.infer_batch(frames(), forward, postprocess, img_size=64, stride=32)
+    assert sorted(calls) == [1, 2]  # один проход на группу кадров одного размера
+    for frame, result in zip(frames(), batch):
+        single = batching.infer_batch([frame], forward, postprocess, img_size=64, stride=32)[0]
+        assert torch.allclose(result[0], single[0])
+        assert result[1:] == single[1:]
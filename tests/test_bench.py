@@ -0,0 +1,53 @@
+import time
+
+import numpy as np
+import pytest
+
+from NeuroVisionQt.bench.run import RssSampler, current_rss_mb, compare, bench_model, bench_pipeline
+
+from conftest import PointModel, FRAME_COUNT
+
+
+class DrawModel:
+    def process_frame(self, frame):
+        return np.zeros((1, 1, 3), dtype=np.float32)
+
+    def draw_skeleton(self, frame, points):
+        pass
+
+
+@pytest.mark.skipif(current_rss_mb() is None, reason="RSS процесса недоступен")
+def test_rss_growth_is_per_case():
+    with RssSampler() as heavy:
+        block = np.ones(64 << 20, dtype=np.uint8)  # 64 МБ, реально занятые страницы
+        time.sleep(0.1)  # несколько опросов, пока блок занят
+        del block
+    with RssSampler() as light:
+        pass
+    assert heavy.summary()["rss_growth_mb"] >= 32
+    assert light.summary()["rss_growth_mb"] < 16
+
+
+def test_bench_model_reports_case_memory():
+    frames = [np.zeros((8, 8, 3), dtype=np.uint8) for _ in range(5)]
+    result = bench_model("draw", DrawModel(), frames, warmup=1)
+    assert result["frames"] == 5 and result["fps"] > 0
+    assert "rss_growth_mb" in result and "peak_rss_mb" in result
+
+
+def test_compare_flags_regressions():
+    baseline = {"results": [{"kind": "model", "name": "a", "resolution": "480p",
+                             "fps": 100.0, "p95_ms": 10.0}]}
+    slower = [{"kind": "model", "name": "a", "resolution": "480p", "fps": 80.0, "p95_ms": 10.5}]
+    assert len(compare(slower, baseline, tolerance=0.1)) == 1
+    same = [{"kind": "model", "name": "a", "resolution": "480p", "fps": 95.0, "p95_ms": 10.5}]
+    assert compare(same, baseline, tolerance=0.1) == []
+
+
+def test_pipeline_reports_end_to_end_percentiles(video_path):
+    result = bench_pipeline(video_path, {"point": PointModel(delay=0.005)})
+    assert result["frames"] == FRAME_COUNT
+    assert 5 <= result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]  # модель в пути кадра
+    baseline = {"results": [dict(result, resolution="480p")]}
+    slower = dict(result, resolution="480p", p95_ms=result["p95_ms"] * 2)
+    assert len(compare([slower], baseline, tolerance=0.1)) == 1
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("PyQt5")
+display = pytest.importorskip("NeuroVisionQt.display")
+
+
+def test_fit_size_keeps_aspect_ratio():
+    assert display.fit_size(1920, 1080, 640, 640) == (640, 360)
+    assert display.fit_size(100, 200, 50, 50) == (25, 50)
+    assert display.fit_size(100, 200, 0, 50) == (100, 200)
+
+
+def test_pool_skips_frames_when_gui_lags():
+    pool = display.FrameBufferPool(max_buffers=2)
+    first, second = pool.acquire((4, 4, 3)), pool.acquire((4, 4, 3))
+    assert pool.acquire((4, 4, 3)) is None
+    pool.release(first)
+    assert pool.acquire((4, 4, 3)) is first  # буфер переиспользуется
+    pool.release(second)
+
+
+def test_converter_downscales_to_rgb_buffer():
+    converter = display.DisplayConverter(display.FrameBufferPool(max_buffers=1))
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    frame[..., 0] = 255  # синий в BGR
+    shown = converter.convert(frame, (100, 100))
+    assert shown.array.shape == (50, 100, 3)
+    assert shown.array[0, 0].tolist() == [0, 0, 255]
+    assert converter.convert(frame, (100, 100)) is None  # единственный буфер ещё на экране
+    shown.release()
+    assert converter.convert(frame, (100, 100)) is not None
@@ -0,0 +1,178 @@
+import threading
+
+import numpy as np
+
+from NeuroVisionQt.cache import ResultCache, MISSING
+from NeuroVisionQt.executor import ModelExecutor
+from NeuroVisionQt.registry import ModelRegistry, distinct_models
+
+
+class SizedModel:
+    """Точка с координатами (size, size): видно, с какими параметрами создана модель"""
+
+    def __init__(self, size=1):
+        self.size = size
+
+    def process_frame(self, frame):
+        return np.array([[[self.size, self.size, 1.0]]], dtype=np.float32)
+
+
+def registry():
+    return (ModelRegistry()
+            .register("a", SizedModel, size=5)
+            .register("a_2", SizedModel, size=5)
+            .register("b", SizedModel, size=7))
+
+
+def test_distinct_models_drops_aliases_of_shared_instance():
+    models = registry()
+    active = {name: models.acquire(name) for name in ("a", "a_2", "b")}
+    assert list(distinct_models(active)) == ["a", "b"]
+    assert list(distinct_models({"x": None, "y": SizedModel()})) == ["y"]
+
+
+def test_models_run_concurrently_in_dict_order():
+    barrier = threading.Barrier(2, timeout=5)
+
+    class WaitingModel(SizedModel):
+        def process_frame(self, frame):
+            barrier.wait()  # при последовательном запуске первая модель не дождётся второй
+            return super().process_frame(frame)
+
+    shared = WaitingModel(3)
+    models = {"b": WaitingModel(7), "a": shared, "a_2": shared}
+    executor = ModelExecutor(max_workers=4)
+    try:
+        results = executor.infer(np.zeros((4, 4, 3), dtype=np.uint8), models)
+    finally:
+        executor.shutdown()
+    assert [name for name, _, _ in results] == ["b", "a", "a_2"]
+    assert results[1][2] is results[2][2]  # общий экземпляр запущен один раз
+    assert results[0][2][0, 0, 0] == 7
+
+
+def test_process_pool_worker_uses_registry_config():
+    models = registry()
+    executor = ModelExecutor(process_models={"a"}, max_processes=1)
+    try:
+        frame = np.zeros((4, 4, 3), dtype=np.uint8)
+        results = executor.infer(frame, {"a": models.acquire("a"), "b": models.acquire("b")})
+    finally:
+        executor.shutdown()
+    assert [name for name, _, _ in results] == ["a", "b"]
+    assert results[0][2][0, 0, 0] == 5  # конструктор без параметров дал бы size=1
+    assert results[1][2][0, 0, 0] == 7
+
+
+class CountingModel(SizedModel):
+    def __init__(self, size=1):
+        super().__init__(size)
+        self.calls = 0
+
+    def process_frame(self, frame):
+        self.calls += 1
+        return super().process_frame(frame)
+
+
+def test_cache_lookup_once_per_frame():
+    cache = ResultCache()
+    executor = ModelExecutor(cache=cache)
+    models = {"a": CountingModel(), "b": CountingModel(2)}
+    frame = np.zeros((4, 4, 3), dtype=np.uint8)
+
+    results, cached = executor.cached_results(models, ("video", 0))
+    assert results is None and cached == {}
+    executor.infer(frame, models, ("video", 0), cached=cached)
+    assert cache.misses == 2
+
+    results, _ = executor.cached_results(models, ("video", 0))
+    assert [name for name, _, _ in results] == ["a", "b"]
+    assert cache.hits == 2 and models["a"].calls == 1
+    executor.shutdown()
+
+
+def test_batch_uses_result_cache():
+    cache = ResultCache()
+    executor = ModelExecutor(cache=cache)
+    model = CountingModel()
+    frames = [np.zeros((4, 4, 3), dtype=np.uint8) for _ in range(3)]
+    keys = [("video", i) for i in range(3)]
+
+    executor.infer_batch(frames[:2], {"a": model}, keys[:2])
+    assert model.calls == 2
+    batch_results = executor.infer_batch(frames, {"a": model}, keys)
+    assert model.calls == 3  # только кадр 2 не был в кэше
+    assert len(batch_results) == 3 and all(results[0][0] == "a" for results in batch_results)
+    executor.shutdown()
+
+
+def test_result_cache_keys_and_disk(tmp_path):
+    model = SizedModel()
+    key = ResultCache.make_key("video", 1, "a", model)
+    assert key != ResultCache.make_key("video", 1, "a", model, resolution=360)
+    assert len(key) == 4  # без разрешения ключ прежней формы
+
+    cache = ResultCache(disk_dir=str(tmp_path))
+    cache.put(key, np.ones((1, 2, 3), dtype=np.float32))
+    reloaded = ResultCache(disk_dir=str(tmp_path))
+    np.testing.assert_array_equal(reloaded.get(key), np.ones((1, 2, 3)))
+    assert reloaded.get(ResultCache.make_key("video", 2, "a", model), MISSING) is MISSING
+
+
+def test_result_cache_memory_budget():
+    points = np.zeros(16, dtype=np.float32)
+    cache = ResultCache(memory_budget=points.nbytes * 2)
+    for i in range(3):
+        cache.put(i, points)
+    assert len(cache) == 2 and cache.get(0) is None
+
+
+class CenterModel:
+    """Точка в центре полученного изображения: видно, в каком разрешении шёл инференс"""
+
+    def __init__(self):
+        self.shapes = []
+
+    def process_frame(self, frame):
+        self.shapes.append(frame.shape[:2])
+        h, w = frame.shape[:2]
+        return np.array([[[w / 2, h / 2, 1.0]]], dtype=np.float32)
+
+
+def test_inference_resolution_maps_points_back():
+    model = CenterModel()
+    executor = ModelExecutor()
+    executor.set_resolution("center", 50)
+    frame = np.zeros((200, 400, 3), dtype=np.uint8)
+    results = executor.infer(frame, {"center": model})
+    batch = executor.infer_batch([frame, frame], {"center": model})
+    executor.shutdown()
+    assert model.shapes == [(50, 100)] * 3
+    for points in (results[0][2], batch[0][0][2], batch[1][0][2]):
+        np.testing.assert_allclose(points[0, 0, :2], [200, 100])
+
+
+class BatchModel(CountingModel):
+    def __init__(self, size=1):
+        super().__init__(size)
+        self.batches = []
+
+    def process_batch(self, frames):
+        self.batches.append(len(frames))
+        return [self.process_frame(frame) for frame in frames]
+
+
+def test_batch_with_per_frame_models_shares_instances():
+    shared = BatchModel(5)
+    own = [CountingModel(1), CountingModel(2), CountingModel(3)]  # как shared=False на поток
+    per_frame = [{"yolo": shared, "pose": model} for model in own]
+    per_frame[2] = {"pose": own[2]}  # у третьего потока общая модель не отмечена
+    frames = [np.zeros((4, 4, 3), dtype=np.uint8) for _ in range(3)]
+    executor = ModelExecutor()
+    batch_results = executor.infer_batch(frames, per_frame)
+    executor.shutdown()
+    assert shared.batches == [2]  # общий экземпляр — один пакет из кадров двух потоков
+    assert [model.calls for model in own] == [1, 1, 1]
+    assert [[name for name, _, _ in results] for results in batch_results] == [
+        ["yolo", "pose"], ["yolo", "pose"], ["pose"]]
+    assert [results[-1][2][0, 0, 0] for results in batch_results] == [1, 2, 3]
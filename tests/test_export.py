@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+
+from NeuroVisionQt.export import VideoExporter, codec_for, output_size
+
+
+def frame(value, size=(48, 64)):
+    return np.full(size + (3,), value, dtype=np.uint8)
+
+
+def read_all(path):
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, image = capture.read()
+        if not ret:
+            break
+        frames.append(image)
+    capture.release()
+    return frames
+
+
+def test_output_size_and_codec():
+    assert output_size(1920, 1080, 360) == (640, 360)
+    assert output_size(641, 361, 181) == (320, 180)  # чётные стороны для кодеков
+    assert output_size(640, 360, 720) == (640, 360)  # без увеличения
+    assert codec_for("OUT.AVI") == "MJPG" and codec_for("out.webm") == "mp4v"
+
+
+def test_skipped_frames_are_duplicated(tmp_path):
+    path = str(tmp_path / "out.avi")
+    exporter = VideoExporter(path, fps=30)
+    exporter.start()
+    for index in (0, 1, 4, 5):  # кадры 2 и 3 пропущены
+        assert exporter.submit(index, frame(index * 40))
+    exporter.close()
+    assert exporter.error is None
+    assert exporter.summary()["written"] == 4 and exporter.duplicated == 2
+    values = [int(image[0, 0, 0]) for image in read_all(path)]
+    assert len(values) == 6
+    assert abs(values[2] - 40) < 8 and abs(values[3] - 40) < 8  # копии кадра 1
+
+
+def test_seek_back_is_not_filled(tmp_path):
+    exporter = VideoExporter(str(tmp_path / "out.avi"), fps=30, max_gap=2)
+    exporter.start()
+    for index in (10, 11, 0, 20):  # назад и слишком далеко вперёд
+        exporter.submit(index, frame(0))
+    exporter.close()
+    assert exporter.written == 4 and exporter.duplicated == 0
+
+
+def test_overlay_drawn_on_copy_at_output_size(tmp_path):
+    calls = []
+
+    class Renderer:
+        def render(self, image, results, scale=1.0, rgb=False):
+            calls.append((image.shape, scale))
+            image[:] = 255
+
+    source = frame(0)
+    exporter = VideoExporter(str(tmp_path / "out.avi"), fps=30, out_height=24, renderer=Renderer())
+    exporter.start()
+    exporter.submit(0, source, results=[("m", None, np.zeros((1, 1, 3), np.float32))])
+    exporter.close()
+    assert calls == [((24, 32, 3), 0.5)]
+    assert not source.any()  # кадр конвейера не изменён
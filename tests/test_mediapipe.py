@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("mediapipe")
+pytest.importorskip("torch")
+mediapipe_model = pytest.importorskip("NeuroVisionQt.mediapipeModel.mediapipeModel")
+
+
+def pose():
+    return object.__new__(mediapipe_model.MediaPipePose)  # scale_coords не использует модель
+
+
+def test_scale_coords_integer_points():
+    coords = np.array([[[12, 24, 1]]], dtype=np.int64)
+    scaled = pose().scale_coords(coords, (2.0, 2.0), (2, 4), (100, 100))
+    assert scaled.dtype == np.float32
+    np.testing.assert_allclose(scaled, [[[5, 10, 1]]])
+    assert coords[0, 0, 0] == 12  # исходный массив не изменён
+
+
+def test_scale_coords_float_in_place():
+    coords = np.array([[12.0, 24.0, 0.5]], dtype=np.float32)
+    assert pose().scale_coords(coords, (2.0, 2.0), (2, 4), (100, 100)) is coords
+    np.testing.assert_allclose(coords, [[5, 10, 0.5]])
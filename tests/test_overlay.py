@@ -0,0 +1,87 @@
+import cv2
+import numpy as np
+import pytest
+
+from NeuroVisionQt.overlay import OverlayRenderer, OverlayLayer, draw_keypoints, edge_array
+from NeuroVisionQt.resolution import ProxyFrames, scale_points
+
+
+class CircleModel:
+    """Модель без skeleton: рисует точки сама, цветом BGR (0, 0, 255) — красным"""
+
+    def draw_skeleton(self, frame, points):
+        for x, y in np.asarray(points)[..., :2].reshape(-1, 2):
+            cv2.circle(frame, (int(x), int(y)), 2, (0, 0, 255), -1)
+
+
+class EdgeModel:
+    skeleton = edge_array([(0, 1)])
+    skeleton_style = {"color": (0, 0, 255), "thickness": 1, "radius": 0}
+
+
+def test_fallback_draws_bgr_colors_on_rgb_buffer():
+    image = np.zeros((50, 50, 3), dtype=np.uint8)
+    # Список вместо массива и масштаб отображения 0.5: точка (40, 40) -> (20, 20)
+    OverlayRenderer().render(image, [("circle", CircleModel(), [[40.0, 40.0]])], scale=0.5, rgb=True)
+    assert image[20, 20].tolist() == [255, 0, 0]
+    assert image[40, 40].tolist() == [0, 0, 0]
+
+
+def test_vector_skeleton_swaps_colors_for_rgb():
+    image = np.zeros((20, 20, 3), dtype=np.uint8)
+    points = np.array([[[2, 10, 1], [17, 10, 1]]], dtype=np.float32)
+    draw_keypoints(image, points, EdgeModel.skeleton, rgb=True, **EdgeModel.skeleton_style)
+    assert image[10, 10].tolist() == [255, 0, 0]
+
+
+def test_hidden_points_are_not_drawn():
+    image = np.zeros((20, 20, 3), dtype=np.uint8)
+    points = np.array([[[2, 10, 0], [17, 10, 1]]], dtype=np.float32)
+    draw_keypoints(image, points, EdgeModel.skeleton, thickness=1, radius=0)
+    assert not image.any()
+
+
+def test_layer_is_reused_until_results_change():
+    calls = []
+
+    class Renderer:
+        def render(self, image, results, scale=1.0, rgb=False):
+            calls.append(results)
+            image[0, 0] = 255
+
+    layer = OverlayLayer(Renderer())
+    results = [("m", None, np.ones((1, 1, 3), dtype=np.float32))]
+    for _ in range(3):
+        image = np.zeros((4, 4, 3), dtype=np.uint8)
+        layer.composite(image, results)
+        assert image[0, 0].tolist() == [255, 255, 255]
+    assert len(calls) == 1
+    layer.composite(np.zeros((4, 4, 3), dtype=np.uint8), [("m", None, np.ones((1, 1, 3)))])
+    assert len(calls) == 2
+
+
+def test_scale_points_copies_and_converts():
+    points = np.array([[[10, 20, 0.5]]], dtype=np.float32)
+    scaled = scale_points(points, 0.5)
+    assert scaled is not points
+    np.testing.assert_allclose(scaled, [[[20, 40, 0.5]]])
+    np.testing.assert_allclose(scale_points([[1, 2]], 0.5), [[2, 4]])
+    assert scale_points(None, 0.5) is None
+    assert scale_points(points, 1.0) is points
+
+
+def test_scale_points_rejects_non_points():
+    with pytest.raises(TypeError):
+        scale_points({"x": 1}, 0.5)
+    with pytest.raises(TypeError):
+        scale_points(np.zeros(3), 0.5)
+
+
+def test_proxy_frames_are_shared_per_height():
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    proxies = ProxyFrames(frame)
+    image, scale = proxies.get(50)
+    assert image.shape == (50, 100, 3) and scale == 0.5
+    assert proxies.get(50)[0] is image
+    assert proxies.get(200)[0] is frame  # кадр не увеличивается
+    assert proxies.get(None) == (frame, 1.0)
@@ -0,0 +1,169 @@
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from NeuroVisionQt.pipeline import (
+    FrameQueue, StageStats, DecoderStage, collect_batch, END_OF_STREAM, DROP_OLDEST, DROP_NEWEST,
+    BLOCK
+)
+from NeuroVisionQt.headless import HeadlessRunner
+from NeuroVisionQt.profiling import Profiler
+from NeuroVisionQt.recording import KeypointReader
+from NeuroVisionQt.seek import KeyframeIndex, FrameCache
+from NeuroVisionQt.sources import LiveCapture
+
+from conftest import PointModel, FailingModel, FRAME_COUNT
+
+
+def test_drop_oldest_evicts_first_item():
+    queue = FrameQueue(maxsize=2, policy=DROP_OLDEST)
+    for item in (1, 2, 3):
+        assert queue.put(item)
+    assert queue.dropped == 1
+    assert [queue.get(timeout=0), queue.get(timeout=0)] == [2, 3]
+
+
+def test_drop_newest_rejects_unless_forced():
+    queue = FrameQueue(maxsize=1, policy=DROP_NEWEST)
+    assert queue.put(1)
+    assert not queue.put(2)
+    assert queue.put(END_OF_STREAM, force=True)
+    assert queue.get(timeout=0) is END_OF_STREAM
+
+
+def test_block_waits_for_space():
+    queue = FrameQueue(maxsize=1, policy=BLOCK)
+    assert queue.put(1)
+    assert not queue.put(2, timeout=0.05)
+    threading.Timer(0.05, queue.get).start()
+    assert queue.put(2, timeout=2.0)
+    assert queue.get(timeout=0) == 2
+
+
+def test_close_releases_waiters():
+    queue = FrameQueue(maxsize=1, policy=BLOCK)
+    queue.put(1)
+    threading.Timer(0.05, queue.close).start()
+    assert not queue.put(2)
+    assert queue.get(timeout=0) == 1
+    assert queue.get(timeout=0) is None
+
+
+def test_collect_batch_stops_at_end_of_stream():
+    queue = FrameQueue(maxsize=8, policy=BLOCK)
+    for item in (1, 2, END_OF_STREAM, 3):
+        queue.put(item)
+    assert collect_batch(queue, 8, timeout_ms=100) == [1, 2, END_OF_STREAM]
+
+
+@pytest.mark.parametrize("batch_size", [1, 4])
+def test_headless_keeps_every_frame(video_path, batch_size):
+    model = PointModel(delay=0.01)
+    runner = HeadlessRunner({"point": model}, batch_size=batch_size)
+    # Маленькая очередь вывода и медленная модель: при BLOCK кадры ждут, а не теряются
+    summary = runner.process(video_path)
+    assert summary["frames"] == FRAME_COUNT
+    assert summary["stages"]["inference"]["dropped"] == 0
+
+
+@pytest.mark.parametrize("batch_size", [1, 4])
+def test_headless_raises_on_model_error(video_path, batch_size):
+    runner = HeadlessRunner({"broken": FailingModel()}, batch_size=batch_size)
+    result = {}
+
+    def target():
+        try:
+            runner.process(video_path)
+        except RuntimeError as exc:
+            result["error"] = exc
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive(), "конвейер завис после ошибки модели"
+    assert "сломанные веса" in str(result["error"])
+
+
+def test_headless_batch_reuses_disk_cache(video_path, tmp_path):
+    for expected_calls in (FRAME_COUNT, 0):
+        model = PointModel()
+        runner = HeadlessRunner({"point": model}, batch_size=4, cache_dir=str(tmp_path / "cache"))
+        assert runner.process(video_path)["frames"] == FRAME_COUNT
+        assert model.calls == expected_calls
+
+
+@pytest.mark.parametrize("suffix", [".nvk", ".jsonl"])
+def test_recorded_frames_match_video_frames(video_path, tmp_path, suffix):
+    path = str(tmp_path / ("points" + suffix))
+    HeadlessRunner({"point": PointModel()}).process(video_path, keypoints_out=path)
+    if suffix == ".jsonl":
+        records = [json.loads(line) for line in (tmp_path / "points.jsonl").read_text().splitlines()]
+        assert [record["frame"] for record in records] == list(range(FRAME_COUNT))
+        return
+    reader = KeypointReader(path)
+    assert reader.frame_range == (0, FRAME_COUNT)
+    for index in range(FRAME_COUNT):
+        # Кадр i видео залит яркостью i * 10, PointModel ставит точку в (яркость, яркость)
+        assert abs(reader.keypoints(index, "point")[0, 0, 0] - index * 10) <= 3
+
+
+class SkeletonModel(PointModel):
+    """Человек из трёх точек размером 100 пикселей, смещается на 10 пикселей за кадр"""
+
+    def process_frame(self, frame):
+        x = float(frame[0, 0, 0])
+        return np.array([[[x, 0, 1], [x + 100, 0, 1], [x, 100, 1]]], dtype=np.float32)
+
+
+def test_tracking_ids_reach_recording(video_path, tmp_path):
+    runner = HeadlessRunner({"point": SkeletonModel()})
+    runner.temporal_smoothing = True
+    path = str(tmp_path / "points.nvk")
+    runner.process(video_path, keypoints_out=path)
+    reader = KeypointReader(path)
+    first, last = reader.frame_range
+    # Один и тот же человек на всех кадрах: один ID
+    assert {int(reader.people(i, "point")[0][0]) for i in range(first, last)} == {0}
+
+
+class DeadLiveCapture(LiveCapture):
+    """Живой источник, который открывается, но не отдаёт кадры (отключённая камера)"""
+
+    def _open(self):
+        return None
+
+
+class LiveOwner:
+    is_running = True
+    is_paused = False
+    loop_video = False
+    paced = True
+    speed = 1.0
+    base_delay = 33
+    overlay_on_display = True
+
+    def __init__(self, cap):
+        self.cap = cap
+        self.keyframes = KeyframeIndex()
+        self.frame_cache = FrameCache()
+        self.profiler = Profiler(trace=False)
+
+    def take_seek_target(self):
+        return -1
+
+
+def test_decoder_stops_while_live_source_is_silent():
+    owner = LiveOwner(DeadLiveCapture("camera", reconnect_min=0.05))
+    queue = FrameQueue(1, DROP_OLDEST)
+    decoder = DecoderStage(owner, queue, StageStats("decode"))
+    decoder.start()
+    time.sleep(0.3)
+    owner.is_running = False  # как VideoThread.stop(): источник освобождается только после join
+    queue.close()
+    decoder.join(timeout=2.0)
+    alive = decoder.is_alive()
+    owner.cap.release()
+    assert not alive and decoder.error is None
@@ -0,0 +1,43 @@
+import csv
+import json
+
+from NeuroVisionQt.profiling import LatencyWindow, Profiler
+
+
+def test_latency_window_percentiles():
+    window = LatencyWindow(size=100)
+    assert window.percentiles() == {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    for ms in range(1, 201):
+        window.add(float(ms))
+    summary = window.summary()
+    assert summary["count"] == 200  # всего измерений, окно хранит последние 100
+    assert summary["p50"] == 151.0 and summary["p99"] == 199.0
+    assert summary["mean"] == 150.5
+
+
+def test_profiler_records_stages_and_exports(tmp_path):
+    profiler = Profiler()
+    profiler.record("decode", 1.0, 1.002)
+    profiler.record("model:pose", 1.0, 1.010)
+    with profiler.measure("convert"):
+        pass
+    summary = profiler.summary()
+    assert list(summary) == ["convert", "decode", "model:pose"]
+    assert abs(summary["model:pose"]["p50"] - 10.0) < 1e-6
+    assert len(profiler.hud_lines()) == 3
+
+    profiler.export(str(tmp_path / "stats.json"))
+    profiler.export(str(tmp_path / "stats.csv"))
+    profiler.export(str(tmp_path / "run.trace.json"))
+    assert json.loads((tmp_path / "stats.json").read_text())["decode"]["count"] == 1
+    rows = list(csv.DictReader((tmp_path / "stats.csv").read_text().splitlines()))
+    assert [row["stage"] for row in rows] == ["convert", "decode", "model:pose"]
+    events = json.loads((tmp_path / "run.trace.json").read_text())["traceEvents"]
+    assert {event["cat"] for event in events} == {"convert", "decode", "model"}
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler(trace=False)
+    profiler.enabled = False
+    profiler.record("decode", 0.0, 1.0)
+    assert profiler.summary() == {}
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from NeuroVisionQt.recording import KeypointWriter, KeypointReader
+
+
+def pose(frame_idx, people=2, keypoints=3):
+    points = np.zeros((people, keypoints, 3), dtype=np.float32)
+    points[..., 0] = frame_idx
+    points[..., 1] = np.arange(keypoints)
+    points[..., 2] = 1.0
+    return points
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "points.nvk")
+    with KeypointWriter(path, chunk_rows=10) as writer:
+        for frame_idx in range(20):
+            writer.add(frame_idx, "pose", pose(frame_idx))
+            writer.add(frame_idx, "other", pose(frame_idx, people=1))
+
+    reader = KeypointReader(path)
+    assert reader.models == ["pose", "other"]
+    assert reader.frame_range == (0, 20)
+    np.testing.assert_array_equal(reader.keypoints(7, "pose"), pose(7))
+    np.testing.assert_array_equal(reader.keypoints(7, "other"), pose(7, people=1))
+    columns = reader.frames(5, 15)
+    assert sorted(set(columns["frame_idx"].tolist())) == list(range(5, 15))
+    assert reader.keypoints(7, "missing").shape == (0, 0, 3)
+
+
+def test_backward_frame_indices(tmp_path):
+    # Цикл видео в GUI: 5, 6, 7, затем снова с начала
+    path = str(tmp_path / "loop.nvk")
+    with KeypointWriter(path) as writer:
+        for frame_idx in (5, 6, 7, 0, 1, 2):
+            writer.add(frame_idx, "pose", pose(frame_idx))
+
+    reader = KeypointReader(path)
+    assert reader.frame_range == (0, 8)
+    assert reader.frames(0, 1)["frame_idx"].tolist() == [0] * 6
+    np.testing.assert_array_equal(reader.keypoints(1, "pose"), pose(1))
+    np.testing.assert_array_equal(reader.keypoints(6, "pose"), pose(6))
+    assert sorted(set(reader.frames(0, 10)["frame_idx"].tolist())) == [0, 1, 2, 5, 6, 7]
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "bad.nvk"
+    path.write_bytes(b"not a keypoint file")
+    with pytest.raises(ValueError):
+        KeypointReader(str(path))
+
+
+def test_track_ids_are_stored_in_person_column(tmp_path):
+    path = str(tmp_path / "ids.nvk")
+    with KeypointWriter(path) as writer:
+        writer.add_results(0, [("pose", None, pose(0)), ("other", None, pose(0, people=1))],
+                           track_ids={"pose": [7, 3]})
+
+    reader = KeypointReader(path)
+    ids, points = reader.people(0, "pose")
+    assert ids.tolist() == [3, 7]
+    np.testing.assert_array_equal(points, pose(0)[::-1])
+    assert reader.people(0, "other")[0].tolist() == [0]  # без сопровождения — номер строки
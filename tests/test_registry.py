@@ -0,0 +1,92 @@
+import threading
+
+from NeuroVisionQt.registry import ModelRegistry
+
+
+class Model:
+    created = 0
+
+    def __init__(self, size=1):
+        Model.created += 1
+        self.size = size
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_same_config_shares_instance():
+    registry = ModelRegistry().register("a", Model).register("b", Model).register("c", Model, size=2)
+    assert registry.acquire("a") is registry.acquire("b")
+    assert registry.acquire("c") is not registry.acquire("a")
+
+
+def test_unshared_instance_per_owner():
+    registry = ModelRegistry().register("pose", Model, shared=False)
+    first, second = object(), object()
+    model = registry.acquire("pose", owner=first)
+    assert registry.acquire("pose", owner=first) is model
+    assert registry.acquire("pose", owner=second) is not model
+    assert registry.is_loaded("pose", owner=first)
+    assert not registry.is_loaded("pose")
+
+
+def test_unload_idle_only_after_release():
+    registry = ModelRegistry(idle_timeout=10).register("a", Model)
+    owner = object()
+    model = registry.acquire("a", owner=owner)
+    assert registry.unload_idle(now=1e9) == 0
+    registry.release("a", owner=owner)
+    assert registry.unload_idle() == 0  # ещё не истёк idle_timeout
+    assert registry.unload_idle(now=1e9) == 1
+    assert model.closed and not registry.is_loaded("a")
+
+
+def test_lazy_factory_and_errors():
+    registry = ModelRegistry()
+    registry.register("missing", "no_such_module_for_tests:Model")
+    registry.register("ok", "argparse:Namespace")
+    assert "ModuleNotFoundError" in registry.check("missing")
+    assert registry.error("missing") == registry.check("missing")
+    assert registry.check("ok") is None
+    assert registry.get("ok") is registry.get("ok")
+
+
+def test_get_loaded_model_while_another_builds():
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_model():
+        started.set()
+        finish.wait(5)
+        return Model()
+
+    registry = ModelRegistry().register("fast", Model).register("slow", slow_model)
+    fast = registry.get("fast")
+    builder = threading.Thread(target=registry.get, args=("slow",))
+    builder.start()
+    try:
+        assert started.wait(5)
+        # Общая блокировка не удерживается на время создания медленной модели
+        assert registry.acquire("fast") is fast
+        assert registry.error("slow") is None and not registry.is_loaded("slow")
+    finally:
+        finish.set()
+        builder.join()
+    assert registry.is_loaded("slow")
+
+
+def test_concurrent_get_builds_once():
+    created = []
+
+    def counted():
+        created.append(1)
+        return Model()
+
+    registry = ModelRegistry().register("a", counted)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("a"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and all(model is results[0] for model in results)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+roi = pytest.importorskip("NeuroVisionQt.roi")  # требует mediapipe и torch
+
+
+def test_iou_matrix():
+    a = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float32)
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10]], dtype=np.float32)
+    iou = roi.iou_matrix(a, b)
+    np.testing.assert_allclose(iou, [[1.0, 50 / 150], [0.0, 0.0]], rtol=1e-6)
+    assert roi.iou_matrix(a, np.zeros((0, 4), np.float32)).shape == (2, 0)
+
+
+def test_box_tracker_keeps_ids_and_extrapolates():
+    tracker = roi.BoxTracker(max_misses=1)
+    tracker.update([[0, 0, 10, 20], [100, 0, 110, 20]])
+    tracker.update([[2, 0, 12, 20], [100, 0, 110, 20]])
+    assert [track.track_id for track in tracker.tracks] == [0, 1]
+    tracker.predict()  # кадр без детекции: рамка движется с прежней скоростью
+    np.testing.assert_allclose(tracker.tracks[0].box, [4, 0, 14, 20])
+
+    tracker.update([[100, 0, 110, 20]])
+    assert [track.track_id for track in tracker.tracks] == [0, 1]  # первый пропущен один раз
+    tracker.update([[100, 0, 110, 20], [300, 0, 310, 20]])
+    assert [track.track_id for track in tracker.tracks] == [1, 2]
+
+
+def test_box_tracker_follows_detect_every_schedule():
+    tracker = roi.BoxTracker()
+    detect_every = 5  # как RoiPoseModel: update на кадрах с детекцией, иначе predict
+    for frame in range(31):
+        person = np.array([100 + 2 * frame, 0, 150 + 2 * frame, 100], dtype=np.float32)
+        if frame % detect_every == 0:
+            tracker.update([person])
+        else:
+            tracker.predict()
+        assert [track.track_id for track in tracker.tracks] == [0]
+        # До второй детекции скорость неизвестна, дальше рамка идёт вместе с человеком
+        limit = 2 * detect_every if frame < detect_every else 1.0
+        assert np.abs(tracker.tracks[0].box - person).max() <= limit
+
+
+def test_refine_keeps_detection_velocity():
+    tracker = roi.BoxTracker()
+    tracker.update([[0, 0, 40, 80]])
+    tracker.predict()
+    tracker.update([[2, 0, 42, 80]])
+    tracker.refine(tracker.tracks[0], [10, 10, 30, 70])  # рамка точек уже рамки детектора
+    tracker.predict()
+    np.testing.assert_allclose(tracker.tracks[0].box, [11, 10, 31, 70])
@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+
+from NeuroVisionQt.scheduler import DeadlineScheduler, AdaptiveStride, ResultCarry
+
+
+def points(x):
+    return np.array([[[x, x, 1.0]]], dtype=np.float32)
+
+
+def test_deadline_scheduler_counts_missed_frames():
+    scheduler = DeadlineScheduler(max_skip=60)
+    scheduler.set_rate(0.01, 1.0, 0)
+    assert scheduler.wait_time(10) > 0
+    scheduler._anchor_time = time.perf_counter() - 0.105
+    assert scheduler.frames_behind(0) == 10
+
+
+def test_deadline_scheduler_moves_anchor_when_far_behind():
+    scheduler = DeadlineScheduler(max_skip=5)
+    scheduler.set_rate(0.01, 1.0, 0)
+    scheduler._anchor_time = time.perf_counter() - 1.0
+    assert scheduler.frames_behind(0) == 0
+    assert scheduler.wait_time(1) > 0
+
+
+def test_adaptive_stride_follows_latency():
+    stride = AdaptiveStride(max_stride=8, min_stride=2)
+    stride.observe(0.1)
+    assert stride.update(0.04) == 3
+    assert stride.update(1.0) == 2  # не меньше min_stride
+    stride.observe(10.0)
+    assert stride.update(0.04) == 8  # не больше max_stride
+    assert stride.should_infer(0)
+    assert not stride.should_infer(7)
+    assert stride.should_infer(8)
+    assert stride.should_infer(3)  # перемотка назад
+
+
+def test_carry_extrapolates_linearly():
+    carry = ResultCarry()
+    models = {"a": object()}
+    carry.update(0, [("a", None, points(0))])
+    carry.update(2, [("a", None, points(4))])
+    (name, _, predicted), = carry.predict(3, models)
+    np.testing.assert_allclose(predicted[0, 0, :2], [6, 6])
+    assert predicted[0, 0, 2] == 1.0
+
+
+def test_carry_matches_previous_results_by_name():
+    carry = ResultCarry()
+    carry.update(0, [("b", None, points(100))])
+    carry.update(1, [("a", None, points(0)), ("b", None, points(101))])
+    predicted = dict((name, p) for name, _, p in carry.predict(2, {"a": 1, "b": 2}))
+    np.testing.assert_array_equal(predicted["a"], points(0))  # нет прошлого результата — перенос
+    np.testing.assert_allclose(predicted["b"][0, 0, :2], [102, 102])
+
+
+def test_carry_rejects_changed_model_set():
+    carry = ResultCarry()
+    carry.update(0, [("a", None, points(0))])
+    assert carry.predict(1, {"a": 1, "b": 2}) is None
+    assert carry.predict(1, {"a": 1})[0][2] is not None
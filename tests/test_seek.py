@@ -0,0 +1,101 @@
+import cv2
+import numpy as np
+
+from NeuroVisionQt.seek import KeyframeIndex, FrameCache, SeekPlanner
+
+
+class FakeCapture:
+    """Видео из count кадров: считает декодированные (read) и пропущенные (grab) кадры"""
+
+    def __init__(self, count=100):
+        self.count = count
+        self.position = 0
+        self.reads = []
+        self.grabs = 0
+        self.seeks = []
+
+    def set(self, prop, value):
+        assert prop == cv2.CAP_PROP_POS_FRAMES
+        self.position = int(value)
+        self.seeks.append(self.position)
+
+    def grab(self):
+        if self.position >= self.count:
+            return False
+        self.position += 1
+        self.grabs += 1
+        return True
+
+    def read(self):
+        if self.position >= self.count:
+            return False, None
+        self.reads.append(self.position)
+        frame = np.full((2, 2, 3), self.position % 256, dtype=np.uint8)
+        self.position += 1
+        return True, frame
+
+
+def planner(keyframes=(0, 30, 60, 90), budget=1 << 20):
+    return SeekPlanner(KeyframeIndex(list(keyframes)), FrameCache(memory_budget=budget), prefetch=4)
+
+
+def test_keyframe_floor():
+    index = KeyframeIndex([0, 30, 60])
+    assert index.floor(45) == 30
+    assert index.floor(60) == 60
+    assert KeyframeIndex().floor(10) is None
+
+
+def test_frame_cache_evicts_least_recent():
+    frame = np.zeros((10, 10, 3), dtype=np.uint8)
+    cache = FrameCache(memory_budget=frame.nbytes * 2)
+    cache.put(1, frame)
+    cache.put(2, frame)
+    cache.get(1)
+    cache.put(3, frame)
+    assert 1 in cache and 3 in cache and 2 not in cache
+
+
+def test_catch_up_only_grabs():
+    seek = planner()
+    cap = FakeCapture()
+    cap.position = 10
+    assert seek.reposition(cap, 10, 25) == 25
+    assert cap.reads == [] and cap.grabs == 15 and cap.seeks == []
+
+
+def test_backward_user_seek_prefetches_before_target():
+    seek = planner()
+    cap = FakeCapture()
+    cap.position = 50
+    seek.note_seek(50, 40)
+    assert seek.reposition(cap, 50, 40, user_seek=True) == 40
+    assert cap.seeks == [30]
+    assert cap.reads == [36, 37, 38, 39]
+    assert all(i in seek.frame_cache for i in range(36, 40))
+
+
+def test_forward_user_seek_does_not_decode():
+    seek = planner()
+    cap = FakeCapture()
+    seek.note_seek(10, 20)
+    assert seek.reposition(cap, 10, 20, user_seek=True) == 20
+    assert cap.reads == []
+
+
+def test_read_ahead_follows_direction():
+    seek = planner()
+    cap = FakeCapture()
+    cap.position = 20
+    seek.note_seek(10, 20)
+    assert seek.read_ahead(cap, 20, 20) == 24
+    assert cap.reads == [20, 21, 22, 23]
+
+    cap = FakeCapture()
+    cap.position = 45
+    seek.note_seek(60, 45)
+    assert seek.read_ahead(cap, 45, 45) == 45
+    assert cap.seeks == [30] and cap.reads == [41, 42, 43, 44]
+    # Кадры уже в кэше: повторное чтение ничего не декодирует
+    assert seek.read_ahead(cap, 45, 45) == 45
+    assert cap.reads == [41, 42, 43, 44]
@@ -0,0 +1,56 @@
+import time
+
+import numpy as np
+
+from NeuroVisionQt.sources import LiveCapture, parse_source
+
+
+class FakeCap:
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def read(self):
+        if not self.frames:
+            return False, None
+        return True, self.frames.pop(0)
+
+    def release(self):
+        pass
+
+
+class FlakyCapture(LiveCapture):
+    """Источник открывается, но каждое соединение отдаёт не больше frames кадров"""
+
+    def __init__(self, frames_per_connection=0, **kwargs):
+        self.frames_per_connection = frames_per_connection
+        self.opens = 0
+        super().__init__("fake", **kwargs)
+
+    def _open(self):
+        self.opens += 1
+        frame = np.zeros((2, 2, 3), dtype=np.uint8)
+        return FakeCap([frame] * self.frames_per_connection)
+
+
+def test_parse_source():
+    assert parse_source("0") == (0, True)
+    assert parse_source("rtsp://camera/stream") == ("rtsp://camera/stream", True)
+    assert parse_source("clip.mp4") == ("clip.mp4", False)
+
+
+def test_failed_reads_back_off():
+    capture = FlakyCapture(reconnect_min=0.05, reconnect_max=1.0)
+    time.sleep(0.5)
+    capture.release()
+    # 0.05 + 0.1 + 0.2 + ... : за полсекунды не больше пяти попыток, а не тысячи
+    assert 1 <= capture.opens <= 5
+
+
+def test_frames_are_delivered_and_release_is_prompt():
+    capture = FlakyCapture(frames_per_connection=3, reconnect_min=10.0, reconnect_max=10.0)
+    ret, frame = capture.read(timeout=2.0)
+    assert ret and frame.shape == (2, 2, 3)
+    start = time.monotonic()
+    capture.release()
+    assert time.monotonic() - start < 1.0  # пауза переподключения прерывается
+    assert capture.read(timeout=0.1) == (False, None)
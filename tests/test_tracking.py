@@ -0,0 +1,63 @@
+import numpy as np
+
+from NeuroVisionQt.tracking import OneEuroFilter, PoseTracker, TemporalLayer
+
+
+def skeleton(x, y, visibility=1.0):
+    """Три точки размером 20 пикселей с центром (x, y)"""
+    return np.array([[x - 10, y, visibility], [x + 10, y, visibility], [x, y + 10, visibility]],
+                    dtype=np.float32)
+
+
+def test_one_euro_smooths_jitter_and_keeps_hidden_points():
+    smoother = OneEuroFilter(np.zeros((2, 2)), min_cutoff=1.0, beta=0.0)
+    jittered = [smoother(np.full((2, 2), (-1) ** i), 1 / 30)[0, 0] for i in range(30)]
+    assert max(abs(value) for value in jittered[10:]) < 0.5
+
+    mask = np.array([True, False])
+    value = smoother(np.full((2, 2), 100.0), 1 / 30, mask)
+    assert value[0, 0] > 1 and abs(value[1, 0]) < 0.5
+
+
+def test_tracker_keeps_ids_and_follows_order():
+    tracker = PoseTracker()
+    tracker.update(np.stack([skeleton(50, 50), skeleton(200, 50)]), 0.0)
+    first_ids = list(tracker.ids)
+    # Люди поменялись местами в результате модели и немного сдвинулись
+    tracker.update(np.stack([skeleton(202, 51), skeleton(52, 51)]), 1 / 30)
+    assert tracker.ids == first_ids[::-1]
+    # Новый человек далеко от известных получает новый ID
+    tracker.update(np.stack([skeleton(52, 52), skeleton(400, 400)]), 2 / 30)
+    assert tracker.ids[0] == first_ids[0] and tracker.ids[1] not in first_ids
+
+
+def test_tracker_forgets_after_max_misses():
+    tracker = PoseTracker(max_misses=1)
+    tracker.update(skeleton(50, 50)[None], 0.0)
+    tracker.update(np.zeros((0, 3, 3), np.float32), 0.1)
+    assert len(tracker.tracks) == 1
+    tracker.update(np.zeros((0, 3, 3), np.float32), 0.2)
+    assert tracker.tracks == []
+
+
+def test_temporal_layer_extrapolates_skipped_frames():
+    layer = TemporalLayer(frame_period=0.1, beta=1.0)
+    models = {"pose": None}
+    for index in range(5):
+        smoothed = layer.update(index, [("pose", None, skeleton(50 + 10 * index, 50)[None])])
+    predicted = layer.predict(5, models)
+    assert [name for name, _, _ in predicted] == ["pose"]
+    center = predicted[0][2][0, :, 0].mean()
+    last = smoothed[0][2][0, :, 0].mean()
+    assert center > last  # движение вправо продолжается
+    assert layer.ids("pose") == [0]
+    assert layer.predict(5, {"other": None}) is None
+
+
+def test_temporal_layer_disabled_carries_results():
+    layer = TemporalLayer()
+    layer.set_enabled(False)
+    points = skeleton(50, 50)[None]
+    layer.update(0, [("pose", None, points)])
+    predicted = layer.predict(1, {"pose": None})
+    assert predicted[0][2] is points and layer.ids("pose") == []